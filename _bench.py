@@ -0,0 +1,248 @@
+#_bench.py
+from .server import _wsserver, _server, _client, _tls, _kvclient
+from ._cmap import cmap
+from ._kvdb import kvengine
+from ._evlog import uevlog
+from .lib.ai.oaiftrs.sec.scai import SecurityAI
+import os
+import sys
+import time
+import socket
+import tempfile
+import threading
+import statistics
+import asyncio
+import websockets
+__all__ = ["ubench"]
+class _lockeddict:
+    #single-lock baseline for ubench.cmap
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+    def incr(self, key, delta=1):
+        with self.lock:
+            value = self.data.get(key, 0) + delta
+            self.data[key] = value
+            return value
+class _listlog:
+    #the previous uevlog: a list trimmed with pop(0) and a strftime'd string per event, for ubench.evlog
+    def __init__(self, cap):
+        self.log = []
+        self.cap = cap
+    def write(self, event, category="info"):
+        self.log.append(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [{category.upper()}] {event}")
+        if len(self.log) > self.cap:
+            self.log.pop(0)
+class ubench:
+    @staticmethod
+    def ws(clients=100, messages=1000, size=64, batch=1, compression=None, host="127.0.0.1"):
+        return asyncio.run(ubench._ws(int(clients), int(messages), int(size), int(batch), compression, host))
+    @staticmethod
+    async def _ws(clients, messages, size, batch, compression, host):
+        hub = _wsserver(host, 0, compression=compression, maxqueue=messages + 1, batch=batch)
+        server = await hub.listen()
+        uri = f"ws://{host}:{hub.port}"
+        subs = [await websockets.connect(uri, compression=compression, max_size=None) for _ in range(clients)]
+        for ws in subs:
+            await ws.send("sub bench")
+            await ws.recv()
+        payload = "x" * size
+        async def drain(ws):
+            got = 0
+            while got < messages:
+                await ws.recv()
+                got += 1
+        pub = await websockets.connect(uri, compression=compression)
+        t0 = time.perf_counter()
+        readers = [asyncio.create_task(drain(ws)) for ws in subs + [pub]]
+        for _ in range(messages):
+            await pub.send(f"pub bench {payload}")
+        await asyncio.gather(*readers)
+        elapsed = time.perf_counter() - t0
+        for ws in subs + [pub]:
+            await ws.close()
+        server.close()
+        await server.wait_closed()
+        deliveries = clients * messages
+        return {
+            "clients": clients,
+            "messages": messages,
+            "size": size,
+            "batch": batch,
+            "compression": compression,
+            "deliveries": deliveries,
+            "seconds": round(elapsed, 4),
+            "deliveries_per_sec": round(deliveries / elapsed, 1) if elapsed else 0.0,
+            "slow": hub.slow,
+        }
+    @staticmethod
+    def tls(rounds=100, host="127.0.0.1"):
+        with tempfile.TemporaryDirectory() as tmp:
+            cert, key = _tls.selfsigned(tmp)
+            srv = _server(host, 0, ssl_context=_tls.server_context(cert, key), verbose=False)
+            listener = srv.bind()
+            threading.Thread(target=srv.serve, args=(listener,), daemon=True).start()
+            cli = _client(host, srv.port, ssl_context=_tls.client_context(cafile=cert))
+            full, resumed, reused = [], [], 0
+            for i in range(int(rounds)):
+                full.append(ubench._handshake(cli, False))
+                resumed.append(ubench._handshake(cli, True))
+                reused += cli.resumed
+            cli.close()
+            listener.close()
+        return {
+            "rounds": int(rounds),
+            "full_ms": round(statistics.median(full) * 1000, 3),
+            "resumed_ms": round(statistics.median(resumed) * 1000, 3),
+            "speedup": round(statistics.median(full) / statistics.median(resumed), 2),
+            "resumed_ratio": round(reused / int(rounds), 3),
+        }
+    @staticmethod
+    def _handshake(cli, resume):
+        cli.close()
+        if not resume:
+            cli.session = None
+        cli.sock = cli._socket()
+        t0 = time.perf_counter()
+        cli.connect()
+        elapsed = time.perf_counter() - t0
+        cli.send("ping")
+        cli.recv()  #reads the post-handshake session tickets along with the reply
+        return elapsed
+    @staticmethod
+    def cmap(threads=(1, 2, 4, 8), ops=200000, keys=10000, shards=16):
+        #80% get / 20% incr over a shared key space, cmap against one dict behind one lock
+        gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+        runs = []
+        for n in threads:
+            for name, store in (("cmap", cmap(shards)), ("dict+lock", _lockeddict())):
+                elapsed = ubench._hammer(store, int(n), int(ops), int(keys))
+                runs.append({"impl": name, "threads": int(n), "ops_per_sec": round(int(ops) / elapsed, 1)})
+        return {"gil": gil, "ops": int(ops), "keys": int(keys), "shards": int(shards), "runs": runs}
+    @staticmethod
+    def _hammer(store, nthreads, ops, keys):
+        per = ops // nthreads
+        barrier = threading.Barrier(nthreads + 1)
+        def work(t):
+            names = [f"k{(j * 7919 + t) % keys}" for j in range(per)]
+            barrier.wait()
+            for j, key in enumerate(names):
+                if j % 5 == 0:
+                    store.incr(key)
+                else:
+                    store.get(key)
+        workers = [threading.Thread(target=work, args=(t,)) for t in range(nthreads)]
+        for w in workers:
+            w.start()
+        barrier.wait()
+        t0 = time.perf_counter()
+        for w in workers:
+            w.join()
+        return time.perf_counter() - t0
+    @staticmethod
+    def evlog(events=200000, threads=(1, 4), capacity=(500, 50000)):
+        #per-event cost of uevlog.write against the old list/pop(0) log, per ring size and writer count
+        saved = uevlog.MAX, uevlog.FILE
+        uevlog.FILE = None
+        runs = []
+        try:
+            for cap in capacity:
+                for n in threads:
+                    uevlog.resize(int(cap))
+                    uevlog.clear()
+                    for name, write in (("ring", uevlog.write), ("list+pop(0)", _listlog(int(cap)).write)):
+                        elapsed = ubench._writers(write, int(n), int(events))
+                        runs.append({"impl": name, "capacity": int(cap), "threads": int(n),
+                                     "ns_per_event": round(elapsed / int(events) * 1e9, 1)})
+        finally:
+            uevlog.resize(saved[0])
+            uevlog.FILE = saved[1]
+        return {"events": int(events), "runs": runs}
+    @staticmethod
+    def _writers(write, nthreads, events):
+        per = events // nthreads
+        barrier = threading.Barrier(nthreads + 1)
+        def work(t):
+            barrier.wait()
+            for j in range(per):
+                write(j, "bench")
+        workers = [threading.Thread(target=work, args=(t,)) for t in range(nthreads)]
+        for w in workers:
+            w.start()
+        barrier.wait()
+        t0 = time.perf_counter()
+        for w in workers:
+            w.join()
+        return time.perf_counter() - t0
+    @staticmethod
+    def logscan(lines=1000000, workers=(1, 2, 4, 8), path=None):
+        #SecurityAI.analyzeParallel throughput over a synthetic auth log, per worker process count.
+        #speedup is relative to the first entry of workers; the log is written to a temp file unless path is given
+        security = SecurityAI()
+        tmp = None
+        if path is None:
+            tmp = tempfile.NamedTemporaryFile("w", suffix=".log", delete=False)
+            with tmp:
+                ubench._authlog(tmp, int(lines))
+            path = tmp.name
+        size = os.path.getsize(path)
+        runs = []
+        try:
+            for n in workers:
+                t0 = time.perf_counter()
+                report = security.analyzeParallel(path, workers=int(n), max_anomalies=100)
+                elapsed = time.perf_counter() - t0
+                runs.append({"workers": int(n), "seconds": round(elapsed, 3),
+                             "lines_per_sec": round(report["lines"] / elapsed, 1)})
+        finally:
+            if tmp is not None:
+                os.unlink(path)
+        for run in runs:
+            run["speedup"] = round(run["lines_per_sec"] / runs[0]["lines_per_sec"], 2)
+        return {"lines": report["lines"] if runs else 0, "bytes": size, "cpus": os.cpu_count(), "runs": runs}
+    @staticmethod
+    def _authlog(f, lines):
+        #sshd-style lines: mostly accepted logins, some failed passwords, a few injection attempts
+        for i in range(lines):
+            ip = f"10.{i % 7}.{i % 13}.{i % 251}"
+            stamp = f"Jan  1 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+            if i % 10 < 3:
+                f.write(f"{stamp} host sshd[{i}]: Failed password for root from {ip} port 22 ssh2\n")
+            elif i % 500 == 7:
+                f.write(f"{stamp} host httpd: GET /item?id=1 UNION SELECT password FROM users from {ip}\n")
+            else:
+                f.write(f"{stamp} host sshd[{i}]: Accepted publickey for deploy from {ip} port 22 ssh2\n")
+    @staticmethod
+    def kv(ops=20000, depths=(1, 16, 128), clients=1, size=32, host="127.0.0.1"):
+        #SET then GET throughput against a local kv server, per pipeline depth
+        srv = _server(host, 0, kv=kvengine(), verbose=False)
+        listener = srv.bind()
+        threading.Thread(target=srv.serve, args=(listener,), daemon=True).start()
+        value = "x" * int(size)
+        runs = []
+        for depth in depths:
+            conns = [_kvclient(host, srv.port, batch=depth) for _ in range(int(clients))]
+            per = int(ops) // len(conns)
+            row = {"depth": int(depth), "clients": len(conns)}
+            for op in ("set", "get"):
+                def work(c, t):
+                    keys = [f"k{t}:{j}" for j in range(per)]
+                    for i in range(0, per, depth):
+                        with c.pipeline():
+                            for key in keys[i:i + depth]:
+                                c.set(key, value) if op == "set" else c.get(key)
+                workers = [threading.Thread(target=work, args=(c, t)) for t, c in enumerate(conns)]
+                t0 = time.perf_counter()
+                for w in workers:
+                    w.start()
+                for w in workers:
+                    w.join()
+                row[f"{op}_per_sec"] = round(per * len(conns) / (time.perf_counter() - t0), 1)
+            runs.append(row)
+            for c in conns:
+                c.close()
+        listener.close()
+        return {"ops": int(ops), "size": int(size), "runs": runs}
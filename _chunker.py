@@ -0,0 +1,215 @@
+#_chunker.py
+import os
+import re
+import io
+import mmap
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+__all__ = ["chunker", "span"]
+MODES = ("fixed", "tokens", "line", "sentence")
+_BOUNDARY = {  #(str pattern, bytes pattern); a chunk may end right after a match
+    "line": (re.compile(r"\n"), re.compile(rb"\n")),
+    "sentence": (re.compile(r"[.!?][\"')\]]*\s+|\n\s*\n"), re.compile(rb"[.!?][\"')\]]*\s+|\n\s*\n")),
+}
+_WORD = (re.compile(r"\S+\s*|\s+"), re.compile(rb"\S+\s*|\s+"))  #token stand-in when tiktoken is missing
+class span:
+    #one chunk: offsets into the shared source. Binary sources are not copied until text() or bytes();
+    #a mapped file stays mapped for as long as any of its spans is alive
+    __slots__ = ("source", "start", "end", "index")
+    def __init__(self, source, start, end, index):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.index = index
+    @property
+    def view(self):
+        #zero-copy memoryview for bytes/mmap sources; str has no buffer, so str sources return a copied slice
+        if isinstance(self.source, str):
+            return self.source[self.start:self.end]
+        return memoryview(self.source)[self.start:self.end]
+    def text(self, encoding="utf-8", errors="replace"):
+        if isinstance(self.source, str):
+            return self.source[self.start:self.end]
+        with memoryview(self.source) as mv:
+            return str(mv[self.start:self.end], encoding, errors)
+    def bytes(self):
+        if isinstance(self.source, str):
+            return self.source[self.start:self.end].encode()
+        return self.source[self.start:self.end]
+    def __len__(self):
+        return self.end - self.start
+    def __str__(self):
+        return self.text()
+    def __repr__(self):
+        return f"span(index={self.index}, start={self.start}, end={self.end})"
+class chunker:
+    @staticmethod
+    def chunks(source, size=4096, mode="fixed", overlap=0, encoding="cl100k_base"):
+        #yields spans over a str, a bytes-like object, an mmap, a binary file object or an os.PathLike.
+        #size/overlap count chars (str), bytes, or tokens in "tokens" mode; a plain str is text, not a path
+        if mode not in MODES:
+            raise ValueError(f"chunker: mode must be one of {MODES}, got {mode!r}")
+        size, overlap = int(size), int(overlap)
+        if size <= 0 or not 0 <= overlap < size:
+            raise ValueError("chunker: need size > 0 and 0 <= overlap < size")
+        buf = chunker._buffer(source)
+        if mode == "fixed":
+            offsets = chunker._fixed(buf, size, overlap)
+        elif mode == "tokens":
+            offsets = chunker._grouped(buf, chunker._tokenends(buf, encoding, size), size, overlap)
+        else:
+            offsets = chunker._bounded(buf, size, overlap, _BOUNDARY[mode][not isinstance(buf, str)])
+        for i, (start, end) in enumerate(offsets):
+            yield span(buf, start, end, i)
+    @staticmethod
+    def file(path, **options):
+        with open(os.fspath(path), "rb") as f:
+            yield from chunker.chunks(f, **options)
+    @staticmethod
+    def count(source, encoding="cl100k_base"):
+        #tokens in source without building a list of them
+        return sum(1 for _ in chunker._tokenends(chunker._buffer(source), encoding, 4096))
+    @staticmethod
+    def _buffer(source):
+        if isinstance(source, (str, bytes, bytearray, memoryview, mmap.mmap)):
+            return source
+        if isinstance(source, os.PathLike):
+            with open(os.fspath(source), "rb") as f:
+                return chunker._mapped(f)
+        if hasattr(source, "fileno"):
+            return chunker._mapped(source)
+        raise TypeError(f"chunker: cannot chunk {type(source).__name__}")
+    @staticmethod
+    def _mapped(f):
+        #the map holds its own descriptor, so the file may be closed right away; the map itself is released
+        #with the last reference to it, i.e. once the generator and every span it yielded are gone
+        try:
+            size = os.fstat(f.fileno()).st_size
+        except (OSError, io.UnsupportedOperation):
+            size = None
+        if not size:
+            #empty files cannot be mapped and pipes have no size; read what there is
+            data = f.read()
+            return data.encode() if isinstance(data, str) else data
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            m.madvise(mmap.MADV_SEQUENTIAL)
+        return m
+    @staticmethod
+    def _align(buf, pos, floor):
+        #moves pos back off UTF-8 continuation bytes so a chunk never splits a character
+        if isinstance(buf, str):
+            return pos
+        for back in range(4):
+            p = pos - back
+            if p <= floor:
+                break
+            if buf[p] & 0xC0 != 0x80:
+                return p
+        return pos
+    @staticmethod
+    def _fixed(buf, size, overlap):
+        n = len(buf)
+        start = 0
+        while start < n:
+            end = min(start + size, n)
+            if end < n:
+                end = chunker._align(buf, end, start)
+            yield start, end
+            if end >= n:
+                return
+            nxt = chunker._align(buf, end - overlap, start) if overlap else end
+            start = nxt if nxt > start else end
+    @staticmethod
+    def _bounded(buf, size, overlap, pattern):
+        #cuts after the last boundary inside the window, or hard-cuts when the window has none
+        n = len(buf)
+        start = 0
+        while start < n:
+            end = min(start + size, n)
+            if end < n:
+                cut = None
+                for m in pattern.finditer(buf, start, end):
+                    cut = m.end()
+                end = cut if cut and cut > start else chunker._align(buf, end, start)
+            yield start, end
+            if end >= n:
+                return
+            nxt = end
+            if overlap:
+                #the overlap starts at the first boundary inside the last `overlap` units
+                m = pattern.search(buf, max(end - overlap, start + 1), end)
+                if m is not None and start < m.end() < end:
+                    nxt = m.end()
+            start = nxt
+    @staticmethod
+    def _grouped(buf, ends, size, overlap):
+        start = 0
+        current = []
+        fresh = 0  #tokens not yet covered by an emitted chunk
+        for end in ends:
+            current.append(end)
+            fresh += 1
+            if len(current) == size:
+                yield start, current[-1]
+                start = current[size - overlap - 1]
+                current = current[size - overlap:]
+                fresh = 0
+        if fresh:
+            yield start, len(buf)
+    @staticmethod
+    def _encoder(encoding):
+        if not isinstance(encoding, str):
+            return encoding  #an already-built tiktoken.Encoding
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.get_encoding(encoding)
+        except Exception:
+            return None
+    @staticmethod
+    def _tokenends(buf, encoding, size):
+        #absolute end offset of every token; text is tokenized one bounded window at a time
+        enc = chunker._encoder(encoding)
+        binary = not isinstance(buf, str)
+        n = len(buf)
+        window = max(size * 16, 1 << 16)
+        pos = 0
+        while pos < n:
+            stop = min(pos + window, n)
+            if stop < n:
+                #end the window on whitespace so no word is split across two encode calls
+                lo = max(pos, stop - 4096)
+                tail = buf[lo:stop]
+                tail = bytes(tail) if isinstance(tail, memoryview) else tail
+                ws = max(tail.rfind(b"\n" if binary else "\n"), tail.rfind(b" " if binary else " "))
+                stop = lo + ws + 1 if ws >= 0 and lo + ws > pos else chunker._align(buf, stop, pos)
+            piece = buf[pos:stop]
+            yield from (pos + e for e in chunker._pieceends(piece, enc, binary))
+            pos = stop
+    @staticmethod
+    def _pieceends(piece, enc, binary):
+        if enc is not None:
+            try:
+                text = bytes(piece).decode("utf-8") if binary else piece
+            except UnicodeDecodeError:
+                text = None
+            if text is not None:
+                tokens = enc.encode(text, disallowed_special=())
+                if binary:
+                    total = 0
+                    for b in enc.decode_tokens_bytes(tokens):
+                        total += len(b)
+                        yield total
+                    return
+                _, starts = enc.decode_with_offsets(tokens)
+                for i in range(1, len(starts)):
+                    if starts[i] > starts[i - 1]:
+                        yield starts[i]
+                if starts:
+                    yield len(text)
+                return
+        for m in _WORD[binary].finditer(piece):
+            yield m.end()
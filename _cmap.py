@@ -0,0 +1,371 @@
+#_cmap.py
+import sys
+import time
+import random
+import fnmatch
+import itertools
+import weakref
+import threading
+import collections
+__all__ = ["cmap"]
+_MISSING = object()
+EVICTION_POLICIES = ("lru", "lfu")
+EVICTION_SAMPLE = 16  #shards compared per eviction on maps with more shards than this
+_TALLIES = ("hits", "misses", "evictions", "expirations")
+_THITS, _TMISSES, _TEVICTIONS, _TEXPIRATIONS = range(len(_TALLIES))
+class _tallyowner:
+    #lives in one thread's local storage; when the thread exits it is freed and its tally folded into the totals
+    __slots__ = ("__weakref__",)
+def _fold(lock, tallies, folded, tally):
+    #takes the map's parts rather than the map, so a finalizer never keeps a cmap alive
+    with lock:
+        tallies.pop(id(tally), None)
+        for n, count in enumerate(tally):
+            folded[n] += count
+class _lru:
+    #keys map to the map-wide clock tick of their last use, so heads of different shards can be compared
+    def __init__(self, clock):
+        self.clock = clock
+        self.order = collections.OrderedDict()
+    def add(self, key):
+        self.order[key] = next(self.clock)
+        self.order.move_to_end(key)
+    def touch(self, key):
+        if key in self.order:
+            self.order[key] = next(self.clock)
+            self.order.move_to_end(key)
+    def remove(self, key):
+        self.order.pop(key, None)
+    def head(self):
+        #(rank, key) of this shard's victim, or None when empty; lower ranks are evicted first
+        for key, stamp in self.order.items():
+            return stamp, key
+        return None
+class _lfu:
+    #O(1) LFU: keys live in per-frequency buckets, ties go to the least recently used key
+    def __init__(self, clock):
+        self.clock = clock
+        self.freq = {}
+        self.buckets = {}
+        self.minfreq = 0
+    def add(self, key):
+        if key in self.freq:
+            return self.touch(key)
+        self.freq[key] = 1
+        self.buckets.setdefault(1, collections.OrderedDict())[key] = next(self.clock)
+        self.minfreq = 1
+    def touch(self, key):
+        f = self.freq.get(key)
+        if f is None:
+            return
+        self._unlink(key, f)
+        self.freq[key] = f + 1
+        self.buckets.setdefault(f + 1, collections.OrderedDict())[key] = next(self.clock)
+        if self.minfreq == f and f not in self.buckets:
+            self.minfreq = f + 1
+    def remove(self, key):
+        f = self.freq.pop(key, None)
+        if f is not None:
+            self._unlink(key, f)
+    def head(self):
+        if not self.freq:
+            return None
+        if self.minfreq not in self.buckets:
+            self.minfreq = min(self.buckets)
+        for key, stamp in self.buckets[self.minfreq].items():
+            return (self.minfreq, stamp), key
+    def _unlink(self, key, f):
+        bucket = self.buckets[f]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[f]
+class cmap:
+    #striped-lock map: every key hashes to one shard, and each shard has its own dict and lock
+    def __init__(self, shards=16, onset=None, ondel=None, maxsize=None, maxbytes=None, policy="lru", sizeof=None):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"cmap: policy must be one of {EVICTION_POLICIES}, got {policy!r}")
+        n = 1
+        while n < int(shards):
+            n <<= 1
+        self.mask = n - 1
+        self.shards = [{} for _ in range(n)]
+        self.locks = [threading.Lock() for _ in range(n)]
+        self.expiry = [{} for _ in range(n)]  #key -> wall-clock deadline, only for keys written with a ttl
+        self.onset = onset  #called as onset(key, value, deadline) under the shard lock after every write
+        self.ondel = ondel  #called as ondel(key) under the shard lock after every removal
+        #bounds hold for the whole map; eviction compares the victims of up to EVICTION_SAMPLE shards
+        self.bounded = maxsize is not None or maxbytes is not None
+        self.maxsize = int(maxsize) if maxsize is not None else None
+        self.maxbytes = int(maxbytes) if maxbytes is not None else None
+        self.sizeof = sizeof or (lambda key, value: sys.getsizeof(key) + sys.getsizeof(value))
+        clock = itertools.count()
+        self.trackers = [(_lfu if policy == "lfu" else _lru)(clock) for _ in range(n)] if self.bounded else None
+        self.sizes = [{} for _ in range(n)] if maxbytes is not None else None
+        self.nbytes = [0] * n
+        #hits/misses/evictions/expirations are tallied per thread, so no counter is shared between shard locks;
+        #a thread's tally is folded into `folded` when it exits, so short-lived threads leave nothing behind
+        self.tallies = {}
+        self.folded = [0] * len(_TALLIES)
+        self.tallylock = threading.Lock()
+        self.local = threading.local()
+    def get(self, key, default=None):
+        i = hash(key) & self.mask
+        if not self.bounded and key not in self.expiry[i]:
+            #plain keys stay lock-free
+            value = self.shards[i].get(key, _MISSING)
+            if value is _MISSING:
+                self._tally()[_TMISSES] += 1
+                return default
+            self._tally()[_THITS] += 1
+            return value
+        with self.locks[i]:
+            value = self._live(i, key)
+            if value is _MISSING:
+                self._tally()[_TMISSES] += 1
+                return default
+            self._tally()[_THITS] += 1
+            if self.trackers is not None:
+                self.trackers[i].touch(key)
+            return value
+    def set(self, key, value, ttl=None):
+        i = hash(key) & self.mask
+        with self.locks[i]:
+            self._store(i, key, value, ttl)
+        if self.bounded:
+            self._shrink(key)
+    def delete(self, key):
+        i = hash(key) & self.mask
+        with self.locks[i]:
+            if self._live(i, key) is _MISSING:
+                return False
+            self._remove(i, key, None)
+            return True
+    def get_or_set(self, key, value, ttl=None):
+        i = hash(key) & self.mask
+        with self.locks[i]:
+            current = self._live(i, key)
+            if current is not _MISSING:
+                return current
+            self._store(i, key, value, ttl)
+        if self.bounded:
+            self._shrink(key)
+        return value
+    def compare_and_set(self, key, expected, value, ttl=None):
+        #expected=None matches a missing key
+        i = hash(key) & self.mask
+        with self.locks[i]:
+            current = self._live(i, key)
+            if (None if current is _MISSING else current) != expected:
+                return False
+            self._store(i, key, value, ttl)
+        if self.bounded:
+            self._shrink(key)
+        return True
+    def incr(self, key, delta=1):
+        i = hash(key) & self.mask
+        with self.locks[i]:
+            current = self._live(i, key)
+            current = 0 if current is _MISSING else current
+            value = int(current) + delta
+            #string stores stay strings, and a running ttl is kept
+            self._store(i, key, str(value) if isinstance(current, str) else value, None, self.expiry[i].get(key))
+        if self.bounded:
+            self._shrink(key)
+        return value
+    def mget(self, keys, default=None):
+        #keys are grouped per shard so each shard lock is taken once
+        keys = list(keys)
+        out = [default] * len(keys)
+        groups = {}
+        for n, key in enumerate(keys):
+            groups.setdefault(hash(key) & self.mask, []).append(n)
+        tally = self._tally()
+        for i, positions in groups.items():
+            with self.locks[i]:
+                for n in positions:
+                    value = self._live(i, keys[n])
+                    if value is _MISSING:
+                        tally[_TMISSES] += 1
+                        continue
+                    tally[_THITS] += 1
+                    if self.trackers is not None:
+                        self.trackers[i].touch(keys[n])
+                    out[n] = value
+        return out
+    def mset(self, mapping, ttl=None):
+        #groups keys per shard so each shard lock is taken once
+        groups = {}
+        for key, value in dict(mapping).items():
+            groups.setdefault(hash(key) & self.mask, []).append((key, value))
+        for i, pairs in groups.items():
+            with self.locks[i]:
+                for key, value in pairs:
+                    self._store(i, key, value, ttl)
+        if self.bounded:
+            self._shrink()
+    def expire(self, keys):
+        #drops the keys that are due; returns (key, deadline) for the ones still in the future
+        now = time.time()
+        pending = []
+        for key in keys:
+            i = hash(key) & self.mask
+            with self.locks[i]:
+                deadline = self.expiry[i].get(key)
+                if deadline is None:
+                    continue
+                if deadline <= now:
+                    self._remove(i, key, _TEXPIRATIONS)
+                else:
+                    pending.append((key, deadline))
+        return pending
+    def scan(self, cursor=0, count=100, match=None):
+        #walks whole shards until `count` keys are collected; the returned cursor is 0 once every shard is done
+        keys = []
+        i = int(cursor)
+        now = time.time()
+        while i <= self.mask and len(keys) < count:
+            with self.locks[i]:
+                expiry = self.expiry[i]
+                keys.extend(k for k in self.shards[i] if (k not in expiry or expiry[k] > now)
+                            and (match is None or fnmatch.fnmatchcase(str(k), match)))
+            i += 1
+        return (0 if i > self.mask else i), keys
+    def ttl(self, key):
+        deadline = self.expiry[hash(key) & self.mask].get(key)
+        return None if deadline is None else max(0.0, deadline - time.time())
+    @property
+    def counters(self):
+        with self.tallylock:
+            totals = [sum(column) for column in zip(self.folded, *self.tallies.values())]
+        return dict(zip(_TALLIES, totals))
+    def stats(self):
+        out = self.counters
+        out["entries"] = len(self)
+        out["bytes"] = sum(self.nbytes)
+        return out
+    def snapshot(self, deadlines=False):
+        #expired keys the sweeper has not reached yet are left out, as in scan()
+        out = {}
+        expiry = {}
+        now = time.time()
+        for i, lock in enumerate(self.locks):
+            with lock:
+                due = {k for k, deadline in self.expiry[i].items() if deadline <= now}
+                if due:
+                    out.update((k, v) for k, v in self.shards[i].items() if k not in due)
+                    expiry.update((k, d) for k, d in self.expiry[i].items() if k not in due)
+                else:
+                    out.update(self.shards[i])
+                    expiry.update(self.expiry[i])
+        return (out, expiry) if deadlines else out
+    def keys(self):
+        return list(self.snapshot())
+    def items(self):
+        return list(self.snapshot().items())
+    def values(self):
+        return list(self.snapshot().values())
+    def clear(self):
+        for i, lock in enumerate(self.locks):
+            with lock:
+                for key in list(self.shards[i]):
+                    self._remove(i, key, None)
+    def _live(self, i, key):
+        #caller holds the shard lock; expired keys are dropped on sight
+        value = self.shards[i].get(key, _MISSING)
+        if value is not _MISSING and key in self.expiry[i] and self.expiry[i][key] <= time.time():
+            self._remove(i, key, _TEXPIRATIONS)
+            return _MISSING
+        return value
+    def _store(self, i, key, value, ttl, deadline=None):
+        if ttl is not None:
+            deadline = time.time() + float(ttl)
+        if deadline is not None:
+            self.expiry[i][key] = deadline
+        else:
+            self.expiry[i].pop(key, None)
+        self.shards[i][key] = value
+        if self.onset is not None:
+            self.onset(key, value, deadline)
+        if not self.bounded:
+            return
+        self.trackers[i].add(key)
+        if self.sizes is not None:
+            size = self.sizeof(key, value)
+            self.nbytes[i] += size - self.sizes[i].get(key, 0)
+            self.sizes[i][key] = size
+    def _over(self):
+        #counts stored entries, expired or not: they hold memory until swept
+        if self.maxsize is not None and self._stored() > self.maxsize:
+            return True
+        return self.maxbytes is not None and sum(self.nbytes) > self.maxbytes and self._stored() > 1
+    def _shrink(self, keep=_MISSING):
+        #called after the writer's shard lock is released; each pass peeks at the victim of every sampled
+        #shard (one lock at a time) and evicts the lowest-ranked one, skipping the key just written
+        while self._over():
+            best = None
+            if self.mask + 1 > EVICTION_SAMPLE:
+                best = self._victim(random.sample(range(self.mask + 1), EVICTION_SAMPLE), keep)
+            if best is None:
+                best = self._victim(range(self.mask + 1), keep)  #no sample, or every sampled shard was empty
+            if best is None:
+                return
+            rank, victim, i = best
+            with self.locks[i]:
+                #another writer may have touched or evicted it meanwhile; then the next pass looks again
+                if self.trackers[i].head() == (rank, victim):
+                    self._remove(i, victim, _TEVICTIONS)
+    def _victim(self, shards, keep):
+        #(rank, key, shard) of the lowest-ranked head among shards, or None
+        best = None
+        for i in shards:
+            with self.locks[i]:
+                head = self.trackers[i].head()
+            if head is not None and head[1] != keep and (best is None or head[0] < best[0]):
+                best = head + (i,)
+        return best
+    def _remove(self, i, key, reason):
+        del self.shards[i][key]
+        self.expiry[i].pop(key, None)
+        if self.trackers is not None:
+            self.trackers[i].remove(key)
+        if self.sizes is not None:
+            self.nbytes[i] -= self.sizes[i].pop(key, 0)
+        if reason is not None:
+            self._tally()[reason] += 1
+        if self.ondel is not None:
+            self.ondel(key)
+    def _tally(self):
+        #this thread's [hits, misses, evictions, expirations]; only the owning thread writes to it
+        try:
+            return self.local.tally
+        except AttributeError:
+            tally = self.local.tally = [0] * len(_TALLIES)
+            owner = self.local.owner = _tallyowner()
+            with self.tallylock:
+                self.tallies[id(tally)] = tally
+            weakref.finalize(owner, _fold, self.tallylock, self.tallies, self.folded, tally)
+            return tally
+    def _stored(self):
+        return sum(len(shard) for shard in self.shards)
+    def __len__(self):
+        #live entries: only keys written with a ttl are checked against the clock
+        now = time.time()
+        return self._stored() - sum(1 for expiry in self.expiry for deadline in list(expiry.values()) if deadline <= now)
+    def __contains__(self, key):
+        i = hash(key) & self.mask
+        if key not in self.expiry[i]:
+            return key in self.shards[i]
+        with self.locks[i]:
+            return self._live(i, key) is not _MISSING
+    def __iter__(self):
+        return iter(self.keys())
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    def __setitem__(self, key, value):
+        self.set(key, value)
+    def __delitem__(self, key):
+        if not self.delete(key):
+            raise KeyError(key)
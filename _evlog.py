@@ -1,31 +1,138 @@
 #_evlog.py
 import time
+import itertools
+import threading
+from ._logsink import logsink
 __all__ = ["uevlog"]
-class uevlog:
-    LOG = []              #in-memory circular log
+_EMPTY = (-1, 0.0, 0, None)
+class _evlogtype(type):
+    @property
+    def LOG(cls):
+        #read-only stand-in for the old list of formatted entries, oldest first
+        return cls.dump()
+class uevlog(metaclass=_evlogtype):
+    #preallocated ring of structured records: event number `seq` lives in slot seq % MAX as a
+    #(seq, timestamp, category id, message) tuple and is only turned into text by recent()/dump()
     MAX = 500             #max events stored
     FILE = None           #optional log file
+    CATEGORIES = {}       #category name -> id
+    NAMES = []            #category id -> name
+    _cap = 0
+    _slots = []           #one tuple store per event, so a reader never sees a half-written record
+    _tops = {}            #thread ident -> one past the newest seq that thread stored; each thread writes only its
+                          #own entry, so the max over them never moves backwards and appends take no lock
+    _next = itertools.count()
+    _off = frozenset()    #muted category ids
+    _lock = threading.RLock()  #category registration and resize only; appends take no lock
     @staticmethod
-    def _stamp():
-        return time.strftime("%Y-%m-%d %H:%M:%S")
+    def _stamp(ts=None):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
     @classmethod
-    def set_file(cls, filepath):
+    def set_file(cls, filepath, **options):
+        #options (flushbytes, interval, maxbytes, rotate, backups, ...) go to the file's shared logsink
+        if cls.FILE and cls.FILE != filepath:
+            logsink.shared(cls.FILE).flush()
         cls.FILE = filepath
+        if filepath and options:
+            logsink.configure(filepath, **options)
+    @classmethod
+    def category(cls, name):
+        #id for a category name, registering it on first use
+        cid = cls.CATEGORIES.get(name)
+        if cid is None:
+            with cls._lock:
+                cid = cls.CATEGORIES.get(name)
+                if cid is None:
+                    cid = len(cls.NAMES)
+                    cls.NAMES.append(name)
+                    cls.CATEGORIES[name] = cid
+        return cid
     @classmethod
     def write(cls, event, category="info"):
-        entry = f"[{cls._stamp()}] [{category.upper()}] {event}"
-        cls.LOG.append(entry)
-        if len(cls.LOG) > cls.MAX:
-            cls.LOG.pop(0)
+        #returns the event's seq, or None when its category is muted
+        cid = cls.CATEGORIES.get(category)
+        if cid is None:
+            cid = cls.category(category)
+        if cid in cls._off:
+            return None
+        if cls._cap != cls.MAX:
+            cls.resize(cls.MAX)
+        ts = time.time()
+        seq = next(cls._next)  #atomic under the GIL, so concurrent writers get distinct slots
+        cls._slots[seq % cls._cap] = (seq, ts, cid, event)
+        cls._tops[threading.get_ident()] = seq + 1
         if cls.FILE:
-            with open(cls.FILE, "a", encoding="utf-8") as f:
-                f.write(entry + "\n")
+            logsink.shared(cls.FILE).write(cls._format(ts, category, event) + "\n")
+        return seq
+    @classmethod
+    def enable(cls, *categories):
+        #unmutes the given categories, or all of them when called without arguments
+        cls._off = frozenset() if not categories else cls._off - {cls.category(c) for c in categories}
+    @classmethod
+    def disable(cls, *categories):
+        cls._off = cls._off | {cls.category(c) for c in categories}
+    @classmethod
+    def seq(cls):
+        #one past the newest event number; since(uevlog.seq()) only returns events written after this call
+        return max(tuple(cls._tops.values()), default=0)
+    @classmethod
+    def since(cls, seq=0, category=None):
+        #(seq, timestamp, category, message) for every stored event numbered >= seq, oldest first; stops at
+        #the first slot still being written, so a poller can resume from the last seq it saw plus one
+        out = []
+        if not cls._cap:
+            return out
+        want = None if category is None else cls.CATEGORIES.get(category, -1)
+        s = max(int(seq), cls.seq() - cls._cap, 0)
+        slots, cap, names = cls._slots, cls._cap, cls.NAMES
+        while True:
+            record = slots[s % cap]
+            if record[0] != s:
+                if record[0] > s:  #overwritten while we were reading; skip ahead to what is still stored
+                    s = max(s + 1, cls.seq() - cap)
+                    continue
+                break
+            if want is None or record[2] == want:
+                out.append((s, record[1], names[record[2]], record[3]))
+            s += 1
+        return out
     @classmethod
-    def recent(cls, n=10):
-        return cls.LOG[-n:]
+    def records(cls, n=None, category=None):
+        out = cls.since(0, category)
+        return out if n is None else out[-int(n):] if n else []
     @classmethod
-    def dump(cls):
-        return list(cls.LOG)
+    def recent(cls, n=10, category=None):
+        if category is None:
+            top = cls.seq()
+            start = max(top - int(n), 0) if n else top
+            out = cls.since(start)
+        else:
+            out = cls.records(n, category)
+        return [cls._format(ts, name, message) for _, ts, name, message in out]
+    @classmethod
+    def dump(cls, category=None):
+        return [cls._format(ts, name, message) for _, ts, name, message in cls.since(0, category)]
+    @classmethod
+    def flush(cls):
+        if cls.FILE:
+            logsink.shared(cls.FILE).flush()
     @classmethod
     def clear(cls):
-        cls.LOG.clear()
+        #forgets stored events; seq numbers keep counting so pollers are not confused
+        with cls._lock:
+            cls._cap = 0
+            cls.resize(cls.MAX)
+    @classmethod
+    def resize(cls, capacity):
+        #keeps the newest events that still fit
+        with cls._lock:
+            keep = cls.since(0) if cls._cap else []
+            cap = max(int(capacity), 1)
+            slots = [_EMPTY] * cap
+            for s, ts, name, message in keep[-cap:]:
+                slots[s % cap] = (s, ts, cls.CATEGORIES[name], message)
+            cls._slots = slots
+            cls.MAX = cls._cap = cap
+    @classmethod
+    def _format(cls, ts, category, message):
+        return f"[{cls._stamp(ts)}] [{str(category).upper()}] {message}"
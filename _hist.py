@@ -0,0 +1,162 @@
+#_hist.py
+import os
+import atexit
+import threading
+import collections
+__all__ = ["histring"]
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r")
+def _unescape(line):
+    if "\\" not in line:
+        return line
+    out = []
+    it = iter(line)
+    for ch in it:
+        if ch == "\\":
+            nxt = next(it, "")
+            out.append({"n": "\n", "r": "\r"}.get(nxt, nxt))
+        else:
+            out.append(ch)
+    return "".join(out)
+class histring:
+    #fixed-capacity ring: entry number `seq` lives in slot seq % capacity, so append and lookup are O(1);
+    #the slot list grows with the first `capacity` appends instead of being allocated up front
+    def __init__(self, capacity=100000, path=None, flushevery=64):
+        self.capacity = int(capacity)
+        self.buf = []
+        self.seq = 0                     #number of entries ever appended
+        self.grams = {}                  #trigram -> deque of seqs, ascending
+        self.lock = threading.Lock()
+        self.path = None
+        self.file = None
+        self.ondisk = 0                  #lines in the append-only file
+        self.flushevery = int(flushevery)
+        self.unflushed = 0
+        if path is not None:
+            self.open(path)
+    def __len__(self):
+        return min(self.seq, self.capacity)
+    @property
+    def first(self):
+        return self.seq - len(self)
+    def __getitem__(self, index):
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("histring index out of range")
+        return self.buf[(self.first + index) % self.capacity]
+    def __iter__(self):
+        first = self.first
+        return (self.buf[s % self.capacity] for s in range(first, first + len(self)))
+    def tail(self, n):
+        first = max(self.first, self.seq - int(n))
+        return [self.buf[s % self.capacity] for s in range(first, self.seq)]
+    def append(self, text):
+        text = str(text)
+        with self.lock:
+            if len(self) == self.capacity:
+                self._unindex(self.first)
+            self._store(text)
+            if self.file is not None:
+                self.file.write(_escape(text) + "\n")
+                self.ondisk += 1
+                self.unflushed += 1
+                if self.unflushed >= self.flushevery:
+                    self.flush()
+                if self.ondisk >= 4 * self.capacity:
+                    self.compact()
+    def clear(self):
+        with self.lock:
+            self.buf = []
+            self.grams = {}
+            self.seq = 0
+            if self.file is not None:
+                self.compact()
+    def search(self, query, limit=None, prefix=False):
+        #newest first, as (index, text); trigrams narrow the candidates, then each one is checked.
+        #queries under 3 characters have no trigram, so they scan the ring newest first until `limit` hits.
+        #runs under the lock: append rewrites slots and postings, and a deque cannot be iterated while it grows
+        query = str(query)
+        match = (lambda t: t.startswith(query)) if prefix else (lambda t: query in t)
+        out = []
+        with self.lock:
+            first = self.first
+            if len(query) < 3:
+                candidates = range(self.seq - 1, first - 1, -1)
+            else:
+                postings = [self.grams.get(query[i:i + 3]) for i in range(len(query) - 2)]
+                if not all(postings):
+                    return []
+                candidates = reversed(min(postings, key=len))
+            for s in candidates:
+                if s < first:
+                    break
+                text = self.buf[s % self.capacity]
+                if match(text):
+                    out.append((s - first, text))
+                    if limit is not None and len(out) >= limit:
+                        break
+        return out
+    def open(self, path):
+        #loads the newest `capacity` lines, then keeps appending to the same file
+        self.close()
+        self.path = str(path)
+        lines = collections.deque(maxlen=self.capacity)
+        self.ondisk = 0
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8", newline="\n") as f:
+                for line in f:
+                    lines.append(line)
+                    self.ondisk += 1
+        with self.lock:
+            self.buf = []
+            self.grams = {}
+            self.seq = 0
+            for line in lines:
+                self._store(_unescape(line.rstrip("\n")))
+        self.file = open(self.path, "a", encoding="utf-8", newline="\n", buffering=1 << 16)
+        atexit.register(self.close)
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+            self.unflushed = 0
+    def compact(self):
+        #rewrites the file with just the live entries; the caller holds the lock
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n", buffering=1 << 16) as f:
+            f.writelines(_escape(text) + "\n" for text in self)
+        self.file.close()
+        os.replace(tmp, self.path)
+        self.file = open(self.path, "a", encoding="utf-8", newline="\n", buffering=1 << 16)
+        self.ondisk = len(self)
+        self.unflushed = 0
+    def close(self):
+        if self.file is None:
+            return
+        atexit.unregister(self.close)
+        self.flush()
+        self.file.close()
+        self.file = None
+    def _store(self, text):
+        #caller holds the lock and has unindexed the entry this one replaces
+        if len(self.buf) < self.capacity:
+            self.buf.append(text)  #not full yet, so seq == len(self.buf)
+        else:
+            self.buf[self.seq % self.capacity] = text
+        self._index(self.seq, text)
+        self.seq += 1
+    def _index(self, seq, text):
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            posting = self.grams.get(gram)
+            if posting is None:
+                posting = self.grams[gram] = collections.deque()
+            posting.append(seq)
+    def _unindex(self, seq):
+        #the evicted entry is always the oldest, so it sits at the left end of each of its postings
+        text = self.buf[seq % self.capacity]
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            posting = self.grams[gram]
+            posting.popleft()
+            if not posting:
+                del self.grams[gram]
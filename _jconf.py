@@ -0,0 +1,230 @@
+#_jconf.py
+import os
+import sys
+import copy
+import json
+import select
+import struct
+import ctypes
+import tempfile
+import threading
+__all__ = ["jsonconfig"]
+_EVENT = struct.Struct("iIII")  #inotify_event: wd, mask, cookie, name length
+_IN_WATCH = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  #modify, close_write, moved_from/to, create, delete
+_MISSING = object()
+def _umask():
+    #os.umask can only be read by setting it, which races with other threads creating files; Linux exposes it
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+def _inotify(directory, name, callback):
+    #calls callback() whenever `name` in `directory` changes; returns a stop function, or None without inotify
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), _IN_WATCH) < 0:
+        os.close(fd)
+        return None
+    target = os.fsencode(name)
+    stop = threading.Event()
+    def loop():
+        while not stop.is_set():
+            if not select.select([fd], [], [], 0.5)[0]:
+                continue
+            try:
+                buf = os.read(fd, 1 << 16)
+            except BlockingIOError:
+                continue
+            pos = 0
+            while pos + _EVENT.size <= len(buf):
+                _, _, _, n = _EVENT.unpack_from(buf, pos)
+                if buf[pos + _EVENT.size:pos + _EVENT.size + n].rstrip(b"\0") == target:
+                    callback()
+                pos += _EVENT.size + n
+        os.close(fd)
+    threading.Thread(target=loop, name="jsonconfig-watch", daemon=True).start()
+    return stop.set
+class jsonconfig:
+    #cached view of one JSON file: re-parsed only when its (mtime, inode, size) changes
+    def __init__(self, path, watch=False, indent=4):
+        self.path = os.path.abspath(str(path))
+        self.indent = int(indent)
+        self.lock = threading.RLock()
+        self.doc = {}
+        self.key = None       #stat signature of the file the cache was built from
+        self.frags = {}       #key path tuple -> serialized dict subtree, reused by partial writes
+        self.stale = True
+        self.unwatch = None
+        if watch:
+            self.unwatch = _inotify(os.path.dirname(self.path), os.path.basename(self.path), self._changed)
+    @property
+    def watching(self):
+        return self.unwatch is not None
+    def document(self):
+        #a copy of the parsed document, so callers cannot edit the cache behind its serialized fragments
+        with self.lock:
+            return copy.deepcopy(self._document())
+    def get(self, path=None, default=None):
+        with self.lock:
+            node = self._walk(self._document(), path)
+            if node is _MISSING:
+                return default
+            return copy.deepcopy(node) if isinstance(node, (dict, list)) else node
+    def __contains__(self, path):
+        with self.lock:
+            return self._walk(self._document(), path) is not _MISSING
+    def set(self, path, value):
+        self.update({path: value})
+    def update(self, changes):
+        #{dotted path: value}; only subtrees on a changed path are serialized again
+        with self.lock:
+            doc = self._document()
+            for path, value in dict(changes).items():
+                keys = self._split(path)
+                node = doc
+                for k in keys[:-1]:
+                    node = self._child(node, k, create=True)
+                self._assign(node, keys[-1], copy.deepcopy(value))
+                self._invalidate(keys)
+            self._write()
+    def delete(self, path):
+        with self.lock:
+            keys = self._split(path)
+            parent = self._walk(self._document(), keys[:-1])
+            if not isinstance(parent, (dict, list)):
+                return False
+            try:
+                del parent[int(keys[-1]) if isinstance(parent, list) else keys[-1]]
+            except (KeyError, IndexError, ValueError):
+                return False
+            self._invalidate(keys)
+            self._write()
+            return True
+    def replace(self, data):
+        with self.lock:
+            self.doc = copy.deepcopy(dict(data))
+            self.frags = {}
+            self._write()
+    def dumps(self):
+        with self.lock:
+            return self._render(self._document(), (), 0)
+    def close(self):
+        if self.unwatch is not None:
+            self.unwatch()
+            self.unwatch = None
+    def _changed(self):
+        self.stale = True
+    def _document(self):
+        #the cached parsed document; with inotify active the file is only stat'ed after a change event
+        if self.stale or not self.watching:
+            self._refresh()
+        return self.doc
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+    def _refresh(self):
+        self.stale = False
+        key = self._signature()
+        if key == self.key:
+            return
+        with self.lock:
+            doc = {}
+            if key is not None:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        doc = json.load(f)
+                except (json.JSONDecodeError, UnicodeDecodeError, FileNotFoundError):
+                    doc = {}
+            self.doc = doc if isinstance(doc, dict) else {}
+            self.frags = {}
+            self.key = key
+    def _write(self):
+        text = self._render(self.doc, (), 0)
+        directory = os.path.dirname(self.path)
+        fd, tmp = tempfile.mkstemp(prefix=".jsonconfig-", dir=directory)
+        try:
+            #mkstemp creates 0600; keep an existing file's mode, or give a new one the usual 0666 minus umask
+            mode = os.stat(self.path).st_mode & 0o7777 if self.key is not None else 0o666 & ~_umask()
+            os.chmod(tmp, mode)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.key = self._signature()  #our own write does not invalidate the cache
+    def _render(self, node, path, level):
+        #matches json.dump(..., indent=self.indent); non-empty dicts are cached per key path
+        if not (isinstance(node, dict) and node):
+            text = json.dumps(node, indent=self.indent)
+            return text.replace("\n", "\n" + " " * (self.indent * level)) if level else text
+        text = self.frags.get(path)
+        if text is None:
+            pad = " " * (self.indent * (level + 1))
+            items = (f"{pad}{json.dumps(str(k))}: {self._render(v, path + (str(k),), level + 1)}" for k, v in node.items())
+            text = "{\n" + ",\n".join(items) + "\n" + " " * (self.indent * level) + "}"
+            self.frags[path] = text
+        return text
+    def _invalidate(self, keys):
+        keys = tuple(str(k) for k in keys)
+        for i in range(len(keys)):
+            self.frags.pop(keys[:i], None)
+        n = len(keys)
+        for path in [p for p in self.frags if p[:n] == keys]:
+            del self.frags[path]
+    @staticmethod
+    def _split(path):
+        if isinstance(path, (list, tuple)):
+            return list(path)
+        return str(path).split(".")
+    def _walk(self, node, path):
+        if path is None:
+            return node
+        for k in self._split(path):
+            node = self._child(node, k)
+            if node is _MISSING:
+                return _MISSING
+        return node
+    @staticmethod
+    def _child(node, k, create=False):
+        if isinstance(node, dict):
+            if k not in node and create:
+                node[k] = {}
+            return node.get(k, _MISSING)
+        if isinstance(node, list):
+            try:
+                return node[int(k)]
+            except (ValueError, IndexError):
+                if create:
+                    raise KeyError(f"jsonconfig: no list index {k!r}")
+                return _MISSING
+        if create:
+            raise KeyError(f"jsonconfig: cannot descend into {type(node).__name__} at {k!r}")
+        return _MISSING
+    @staticmethod
+    def _assign(node, k, value):
+        if isinstance(node, list):
+            node[int(k)] = value
+        elif isinstance(node, dict):
+            node[k] = value
+        else:
+            raise KeyError(f"jsonconfig: cannot set {k!r} on {type(node).__name__}")
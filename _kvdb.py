@@ -0,0 +1,298 @@
+#_kvdb.py
+import os
+import zlib
+import time
+import struct
+import pickle
+import atexit
+import functools
+import threading
+from ._cmap import cmap, _MISSING
+__all__ = ["kvengine"]
+FSYNC_POLICIES = ("always", "batch", "os")
+_CRC = struct.Struct("<I")      #crc32 of the record body
+_BODY = struct.Struct("<BII")   #op, key length, value length
+_HEAD = _CRC.size + _BODY.size
+_DEADLINE = struct.Struct("<d")  #prefix of a SETX value: wall-clock expiry
+_SET = 1
+_DEL = 2
+_SETX = 3
+_SETO = 4   #non-string values are pickled, so they come back with their type
+_SETXO = 5
+class _timerwheel:
+    #hashed wheel of `slots` buckets, `tick` seconds each; keys due in a later revolution are rescheduled on sight
+    def __init__(self, tick=1.0, slots=512):
+        self.tick = float(tick)
+        self.slots = int(slots)
+        self.wheel = [set() for _ in range(self.slots)]
+        self.lock = threading.Lock()
+        self.cursor = int(time.time() / self.tick)
+    def schedule(self, key, deadline):
+        with self.lock:
+            self.wheel[int(deadline / self.tick) % self.slots].add(key)
+    def advance(self, now):
+        due = []
+        with self.lock:
+            end = int(now / self.tick)
+            for t in range(self.cursor, min(end, self.cursor + self.slots - 1) + 1):
+                slot = self.wheel[t % self.slots]
+                due.extend(slot)
+                slot.clear()
+            self.cursor = end
+        return due
+class kvengine:
+    def __init__(self, path=None, fsync="batch", interval=0.05, compact=64 << 20, shards=16,
+                 maxsize=None, maxbytes=None, policy="lru", sizeof=None, tick=1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"kvengine: fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.fsync = fsync
+        self.interval = float(interval)     #batch/os: seconds between background flushes
+        self.compactat = int(compact)       #WAL size that triggers a background compaction
+        self.data = cmap(shards, maxsize=maxsize, maxbytes=maxbytes, policy=policy, sizeof=sizeof)
+        self.wheel = _timerwheel(tick)      #active expiry; reads also expire lazily
+        self.reaper = None
+        self.lock = threading.RLock()       #guards the WAL file; shard locks order writes per key
+        self.wal = None
+        self.walsize = 0
+        self.dirty = False
+        self.compacting = False
+        self.closed = False
+        if path is not None:
+            self._recover()
+            self.data.onset = self._logset
+            self.data.ondel = self._logdel
+            self.flusher = threading.Thread(target=self._flushloop, name="kvengine-flush", daemon=True)
+            self.flusher.start()
+            atexit.register(self.close)
+            for key, deadline in self.data.snapshot(deadlines=True)[1].items():
+                self._schedule(key, deadline)
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+    def set(self, key, value, ttl=None):
+        self.data.set(key, value, ttl)
+        if ttl is not None:
+            self._schedule(key, time.time() + float(ttl))
+    def delete(self, key):
+        return self.data.delete(key)
+    def get_or_set(self, key, value, ttl=None):
+        current = self.data.get_or_set(key, value, ttl)
+        if ttl is not None and current is value:
+            self._schedule(key, time.time() + float(ttl))
+        return current
+    def compare_and_set(self, key, expected, value, ttl=None):
+        ok = self.data.compare_and_set(key, expected, value, ttl)
+        if ok and ttl is not None:
+            self._schedule(key, time.time() + float(ttl))
+        return ok
+    def incr(self, key, delta=1):
+        return self.data.incr(key, delta)
+    def mget(self, keys, default=None):
+        return self.data.mget(keys, default)
+    def mset(self, mapping, ttl=None):
+        mapping = dict(mapping)
+        self.data.mset(mapping, ttl)
+        if ttl is not None:
+            deadline = time.time() + float(ttl)
+            for key in mapping:
+                self._schedule(key, deadline)
+    def scan(self, cursor=0, count=100, match=None):
+        return self.data.scan(cursor, count, match)
+    def ttl(self, key):
+        #seconds left, or None for keys without a ttl
+        return self.data.ttl(key)
+    def stats(self):
+        return self.data.stats()
+    def cached(self, key, compute, ttl=None):
+        value = self.data.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+    @staticmethod
+    def memokey(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        return lambda args, kwargs: f"{name}{args!r}{sorted(kwargs.items())!r}" if kwargs else f"{name}{args!r}"
+    def memoize(self, ttl=None):
+        def decorate(func):
+            key = self.memokey(func)
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.cached(key(args, kwargs), lambda: func(*args, **kwargs), ttl)
+            return wrapper
+        return decorate
+    def keys(self):
+        return list(self.data)
+    def items(self):
+        return list(self.data.items())
+    def __len__(self):
+        return len(self.data)
+    def __contains__(self, key):
+        return key in self.data
+    def flush(self):
+        with self.lock:
+            if self.wal is None:
+                return
+            self.wal.flush()
+            self.dirty = False
+            fd = self.wal.fileno()
+        if self.fsync != "os":
+            os.fsync(fd)
+    def compact(self):
+        #rotate the WAL under the lock, then write the snapshot without blocking writers
+        with self.lock:
+            if self.wal is None or self.compacting:
+                return False
+            self.compacting = True
+            try:
+                if not os.path.exists(self.path + ".wal.old"):
+                    self.wal.flush()
+                    os.fsync(self.wal.fileno())
+                    self.wal.close()
+                    os.replace(self.path + ".wal", self.path + ".wal.old")
+                    self.wal = open(self.path + ".wal", "ab", buffering=1 << 20)
+                    self.walsize = 0
+            except BaseException:
+                self.compacting = False
+                raise
+        try:
+            #shards are copied after the rotation, so replaying the new WAL over this snapshot is idempotent
+            self._writesnapshot(*self.data.snapshot(deadlines=True))
+            os.remove(self.path + ".wal.old")
+        finally:
+            self.compacting = False
+        return True
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        if self.wal is not None:
+            self.flush()
+            with self.lock:
+                self.wal.close()
+                self.wal = None
+    @staticmethod
+    def _record(op, key, value, deadline=None):
+        k = key.encode()
+        v = value if isinstance(value, bytes) else value.encode()
+        if deadline is not None:
+            v = _DEADLINE.pack(deadline) + v
+        body = _BODY.pack(op, len(k), len(v)) + k + v
+        return _CRC.pack(zlib.crc32(body)) + body
+    @classmethod
+    def _setrecord(cls, key, value, deadline=None):
+        #strings are logged as text and anything else pickled; None for values pickle cannot handle
+        if isinstance(value, str):
+            return cls._record(_SET if deadline is None else _SETX, key, value, deadline)
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        return cls._record(_SETO if deadline is None else _SETXO, key, data, deadline)
+    def _logset(self, key, value, deadline=None):
+        rec = self._setrecord(key, value, deadline)
+        #an unpicklable value only lives in memory; the delete keeps an older logged value from coming back
+        self._append(self._record(_DEL, key, "") if rec is None else rec)
+    def _logdel(self, key):
+        self._append(self._record(_DEL, key, ""))
+    def _append(self, rec):
+        with self.lock:
+            if self.wal is None:
+                return
+            self.wal.write(rec)
+            self.walsize += len(rec)
+            if self.fsync == "always":
+                self.wal.flush()
+                os.fsync(self.wal.fileno())
+            else:
+                self.dirty = True
+    def _flushloop(self):
+        while not self.closed:
+            time.sleep(self.interval)
+            if self.dirty and not self.closed:
+                try:
+                    self.flush()
+                except (OSError, ValueError):
+                    pass
+            if self.walsize >= self.compactat and not self.compacting and not self.closed:
+                threading.Thread(target=self.compact, name="kvengine-compact", daemon=True).start()
+    def _schedule(self, key, deadline):
+        self.wheel.schedule(key, deadline)
+        if self.reaper is None:
+            with self.lock:
+                if self.reaper is None:
+                    self.reaper = threading.Thread(target=self._reaploop, name="kvengine-expire", daemon=True)
+                    self.reaper.start()
+    def _reaploop(self):
+        while not self.closed:
+            time.sleep(self.wheel.tick)
+            for key, deadline in self.data.expire(self.wheel.advance(time.time())):
+                self.wheel.schedule(key, deadline)
+    def _recover(self):
+        for suffix in (".snap", ".wal.old", ".wal"):
+            good = self._replay(self.path + suffix)
+            if suffix == ".wal" and good is not None and good < os.path.getsize(self.path + ".wal"):
+                with open(self.path + ".wal", "r+b") as f:
+                    f.truncate(good)  #drop a torn tail left by a crash mid-append
+        self.wal = open(self.path + ".wal", "ab", buffering=1 << 20)
+        self.walsize = self.wal.tell()
+        if os.path.exists(self.path + ".wal.old"):
+            self.compact()  #a previous compaction did not finish
+    def _replay(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            buf = f.read()
+        pos = 0
+        while pos + _HEAD <= len(buf):
+            crc, = _CRC.unpack_from(buf, pos)
+            op, klen, vlen = _BODY.unpack_from(buf, pos + _CRC.size)
+            end = pos + _HEAD + klen + vlen
+            if end > len(buf) or zlib.crc32(buf[pos + _CRC.size:end]) != crc:
+                break
+            try:
+                key, value, left = self._decode(buf, pos + _HEAD, op, klen, end)
+            except (AttributeError, ImportError):
+                key, value, left = buf[pos + _HEAD:pos + _HEAD + klen].decode(), _MISSING, None  #its class is gone
+            except Exception:
+                break  #anything else undecodable is damage: replay (and the WAL) end at the last good record
+            if value is _MISSING or (left is not None and left <= 0):
+                self.data.delete(key)  #deleted, unloadable, or expired while we were down
+            else:
+                self.data.set(key, value, left)
+            pos = end
+        return pos
+    @staticmethod
+    def _decode(buf, start, op, klen, end):
+        #(key, value or _MISSING for a delete, seconds left or None) of the record body at buf[start:end]
+        key = buf[start:start + klen].decode()
+        start += klen
+        if op == _DEL:
+            return key, _MISSING, None
+        if op not in (_SET, _SETX, _SETO, _SETXO):
+            raise ValueError(f"kvengine: unknown WAL op {op}")
+        left = None
+        if op in (_SETX, _SETXO):
+            deadline, = _DEADLINE.unpack_from(buf, start)
+            start += _DEADLINE.size
+            left = deadline - time.time()
+        raw = buf[start:end]
+        return key, (raw.decode() if op in (_SET, _SETX) else pickle.loads(raw)), left
+    def _writesnapshot(self, snap, deadlines=None):
+        deadlines = deadlines or {}
+        tmp = self.path + ".snap.tmp"
+        with open(tmp, "wb", buffering=1 << 20) as f:
+            for key, value in snap.items():
+                rec = self._setrecord(key, value, deadlines.get(key))
+                if rec is not None:
+                    f.write(rec)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path + ".snap")
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
@@ -0,0 +1,265 @@
+#_loadgen.py
+from .server import _packet, _hub, _server, _wsserver, _httpserver
+import os
+import sys
+import socket
+import contextlib
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import tempfile
+import websockets
+__all__ = ["uloadgen"]
+PROTOCOLS = ("tcp", "ws", "http")
+SERVERS = ("standalone", "hub")
+class _hdr:
+    #log-linear buckets: values keep `bits` significant bits, so every bucket is within 2**(1-bits) relative error
+    def __init__(self, bits=7):
+        self.bits = int(bits)
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+    def record(self, value):
+        v = max(0, int(value))
+        e = max(0, v.bit_length() - self.bits)
+        key = (e, v >> e)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.sum += v
+        self.min = v if self.min is None or v < self.min else self.min
+        self.max = max(self.max, v)
+    def merge(self, other):
+        for key, n in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + n
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    def percentile(self, p):
+        if not self.total:
+            return 0
+        rank = max(1, round(self.total * p / 100.0))
+        seen = 0
+        for e, m in sorted(self.counts):
+            seen += self.counts[(e, m)]
+            if seen >= rank:
+                return min(((m + 1) << e) - 1, self.max)
+        return self.max
+    def summary(self):
+        return {
+            "min": self.min or 0,
+            "mean": round(self.sum / self.total, 1) if self.total else 0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max,
+        }
+class _conn:
+    def __init__(self, protocol, host, port):
+        self.protocol = protocol
+        self.host = host
+        self.port = int(port)
+        self.reader = self.writer = self.ws = None
+    async def open(self):
+        if self.protocol == "ws":
+            self.ws = await websockets.connect(f"ws://{self.host}:{self.port}", compression=None)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+    async def call(self, command):
+        if self.protocol == "ws":
+            await self.ws.send(command)
+            return await self.ws.recv()
+        if self.protocol == "tcp":
+            self.writer.write(_packet.encode(command))
+            await self.writer.drain()
+            return await _packet.aread(self.reader)
+        if command.startswith("/"):
+            target = command  #a plain path, e.g. a static file
+        else:
+            target = "/route?q=" + command.replace("%", "%25").replace(" ", "%20").replace("&", "%26").replace("#", "%23")
+        self.writer.write(f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        return await self.reader.readexactly(length)
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self.writer is not None:
+            self.writer.close()
+class uloadgen:
+    @staticmethod
+    def run(protocol="tcp", host="127.0.0.1", port=5050, clients=16, rate=None, duration=10.0, mix=None, requests=None, seed=None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"loadgen: protocol must be one of {PROTOCOLS}, got {protocol!r}")
+        return asyncio.run(uloadgen._run(protocol, host, port, int(clients), rate, duration, mix or {"ping": 1}, requests, seed))
+    @staticmethod
+    def local(protocol="tcp", server="standalone", **options):
+        #starts a server on a free localhost port and drives it: the standalone _server/_wsserver/_httpserver for
+        #the protocol, or server="hub" for the unified _hub. The standalone HTTP server has no /route, so its
+        #default mix fetches a static file it serves from a temporary root
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"loadgen: protocol must be one of {PROTOCOLS}, got {protocol!r}")
+        if server not in SERVERS:
+            raise ValueError(f"loadgen: server must be one of {SERVERS}, got {server!r}")
+        if server == "hub":
+            async def start():
+                hub = _hub("127.0.0.1", 0, 0, 0)
+                return (await hub.listen())[protocol], hub.close
+            return uloadgen._background(start, protocol, options)
+        if protocol == "ws":
+            async def start():
+                ws = _wsserver("127.0.0.1", 0)
+                srv = await ws.listen()
+                async def close():
+                    srv.close()
+                    await srv.wait_closed()
+                return ws.port, close
+            return uloadgen._background(start, protocol, options)
+        if protocol == "tcp":
+            tcp = _server("127.0.0.1", 0, verbose=False)
+            sock = tcp.bind()
+            def serve():
+                with contextlib.suppress(OSError):  #raised in accept() once the socket is shut down
+                    tcp.serve(sock)
+            threading.Thread(target=serve, daemon=True).start()
+            try:
+                return uloadgen.run("tcp", "127.0.0.1", tcp.port, **options)
+            finally:
+                sock.shutdown(socket.SHUT_RDWR)
+                sock.close()
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "bench.txt"), "wb") as f:
+                f.write(b"x" * 1024)
+            http = _httpserver("127.0.0.1", 0, root=root)
+            thread = threading.Thread(target=http.server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                options["mix"] = options.get("mix") or {"/bench.txt": 1}
+                return uloadgen.run("http", "127.0.0.1", http.port, **options)
+            finally:
+                http.stop()
+                http.server.server_close()
+                thread.join()
+    @staticmethod
+    def _background(start, protocol, options):
+        #start() runs on a fresh event loop in a thread and returns (port, async close), kept up for one run()
+        ready = threading.Event()
+        box = {}
+        def serve():
+            async def main():
+                box["port"], close = await start()
+                box["loop"] = asyncio.get_running_loop()
+                box["stop"] = asyncio.Event()
+                ready.set()
+                await box["stop"].wait()
+                await close()
+            asyncio.run(main())
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        ready.wait()
+        try:
+            return uloadgen.run(protocol, "127.0.0.1", box["port"], **options)
+        finally:
+            box["loop"].call_soon_threadsafe(box["stop"].set)
+            thread.join()
+    @staticmethod
+    async def _run(protocol, host, port, clients, rate, duration, mix, requests, seed):
+        rng = random.Random(seed)
+        commands, weights = list(mix), list(mix.values())
+        hist = _hdr()
+        counts = dict.fromkeys(commands, 0)
+        state = {"errors": 0, "sent": 0}
+        interval = clients / float(rate) if rate else 0.0  #per-client gap between intended send times
+        loop = asyncio.get_running_loop()
+        start = loop.time() + 0.05
+        deadline = start + float(duration)
+        async def worker(i):
+            conn = _conn(protocol, host, port)
+            try:
+                await conn.open()
+            except OSError:
+                state["errors"] += 1
+                return
+            intended = start + i * interval / max(clients, 1)
+            try:
+                while loop.time() < deadline and (requests is None or state["sent"] < requests):
+                    if interval:
+                        delay = intended - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    command = rng.choices(commands, weights)[0]
+                    state["sent"] += 1
+                    t0 = loop.time()
+                    try:
+                        await conn.call(command)
+                    except (OSError, asyncio.IncompleteReadError, websockets.ConnectionClosed):
+                        state["errors"] += 1
+                        return
+                    #latency runs from the intended send time when rate-limited (corrects coordinated omission)
+                    hist.record((loop.time() - (intended if interval else t0)) * 1e6)
+                    counts[command] += 1
+                    intended += interval
+            finally:
+                await conn.close()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = max(min(loop.time(), deadline) - start, 1e-9)
+        return {
+            "protocol": protocol,
+            "target": f"{host}:{port}",
+            "clients": clients,
+            "rate": rate,
+            "duration": round(elapsed, 3),
+            "requests": hist.total,
+            "errors": state["errors"],
+            "throughput": round(hist.total / elapsed, 1),
+            "latency_us": hist.summary(),
+            "routes": counts,
+        }
+    @staticmethod
+    def main(argv=None):
+        parser = argparse.ArgumentParser(prog="python -m stamp._loadgen", description="Load generator for stamp.server")
+        parser.add_argument("protocol", choices=PROTOCOLS)
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int)
+        parser.add_argument("--local", action="store_true", help="start a local server on a free port and target it")
+        parser.add_argument("--server", choices=SERVERS, default="standalone",
+                            help="with --local: the protocol's standalone server or the unified hub")
+        parser.add_argument("--clients", type=int, default=16)
+        parser.add_argument("--rate", type=float, help="target requests/sec across all clients (default: unthrottled)")
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--requests", type=int, help="stop after this many requests")
+        parser.add_argument("--mix", help="weighted commands, e.g. 'ping=3,echo hi=1'; HTTP paths start with '/'")
+        parser.add_argument("--json", help="also write the result to this file")
+        args = parser.parse_args(argv)
+        mix = {}
+        for part in (args.mix.split(",") if args.mix else ()):
+            command, _, weight = part.rpartition("=")
+            mix[command or weight] = float(weight) if command else 1.0
+        options = dict(clients=args.clients, rate=args.rate, duration=args.duration, requests=args.requests)
+        if mix:
+            options["mix"] = mix
+        if args.local:
+            result = uloadgen.local(args.protocol, args.server, **options)
+        else:
+            if args.port is None:
+                parser.error("--port is required unless --local is given")
+            result = uloadgen.run(args.protocol, args.host, args.port, **options)
+        out = json.dumps(result, indent=2)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(out + "\n")
+        print(out)
+        return 0
+if __name__ == "__main__":
+    sys.exit(uloadgen.main())
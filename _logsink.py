@@ -0,0 +1,192 @@
+#_logsink.py
+import os
+import time
+import queue
+import atexit
+import threading
+__all__ = ["logsink"]
+_CLOSE = object()
+class logsink:
+    #one open append handle per file, opened by the first write; writers only enqueue, and a background thread
+    #batches the lines into a single write when `flushbytes` are pending, `interval` seconds have passed, or on
+    #flush()/close()
+    _shared = {}
+    _sharedlock = threading.Lock()
+    _names = {}  #path as passed to shared() -> (sink, cwd it was resolved in, or None for absolute paths)
+    def __init__(self, path, maxqueue=8192, flushbytes=1 << 16, interval=1.0, maxbytes=None, rotate=None, backups=5,
+                 encoding="utf-8"):
+        self.path = os.path.abspath(os.fspath(path))
+        self.flushbytes = int(flushbytes)
+        self.interval = float(interval)
+        self.maxbytes = int(maxbytes) if maxbytes else None   #rotate before a batch would grow the file past this
+        self.rotate = float(rotate) if rotate else None       #rotate every `rotate` seconds (86400 = daily)
+        self.backups = int(backups)                           #path.1 ... path.N are kept
+        self.encoding = encoding
+        self.queue = queue.Queue(int(maxqueue))               #bounded: writers block instead of growing memory
+        self.lock = threading.Lock()
+        self.thread = None
+        self.closed = False
+        self.error = None                                     #first OSError hit by the writer thread
+        self.failure = None                                   #what killed the writer thread, raised from then on
+        self.file = None                                      #opened by the first write, so errors surface there
+        self.rollover = self._nextrollover()
+    @classmethod
+    def shared(cls, path, **options):
+        #the process-wide sink for path; options only apply when it is first created. a name seen before is
+        #answered without abspath or the lock, so per-write callers can pass the path every time
+        name = os.fspath(path)
+        hit = cls._names.get(name)
+        if hit is not None and not hit[0].closed and (hit[1] is None or hit[1] == os.getcwd()):
+            return hit[0]
+        key = os.path.abspath(name)
+        with cls._sharedlock:
+            sink = cls._shared.get(key)
+            if sink is None or sink.closed:
+                sink = cls._shared[key] = cls(key, **options)
+            cls._names[name] = (sink, None if os.path.isabs(name) else os.getcwd())
+            return sink
+    @classmethod
+    def configure(cls, path, **options):
+        #replaces the shared sink for path with one built from options; the old one is flushed and closed
+        key = os.path.abspath(os.fspath(path))
+        with cls._sharedlock:
+            old = cls._shared.get(key)
+            sink = cls._shared[key] = cls(key, **options)
+            for name, (cached, cwd) in list(cls._names.items()):
+                if cached is old:
+                    cls._names[name] = (sink, cwd)
+        if old is not None:
+            old.close()
+        return sink
+    @classmethod
+    def flushall(cls, timeout=None):
+        with cls._sharedlock:
+            sinks = list(cls._shared.values())
+        for sink in sinks:
+            if not sink.closed:
+                sink.flush(timeout)
+    def write(self, text):
+        if self.closed:
+            raise ValueError(f"logsink: {self.path} is closed")
+        self._check()
+        if self.thread is None:
+            self._start()
+        if not self._put(str(text)):
+            self._check()
+    def flush(self, timeout=None):
+        #blocks until everything written so far has reached the OS; raises instead if the writer thread died
+        if self.thread is None or self.closed:
+            return
+        done = threading.Event()
+        if self._put(done):
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not done.wait(0.1 if deadline is None else max(0.0, min(0.1, deadline - time.monotonic()))):
+                if not self.thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                    break
+        self._check()
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        if self.thread is not None:
+            atexit.unregister(self.close)
+            if self._put(_CLOSE):
+                self.thread.join()
+        if self.file is not None:
+            self.file.close()
+        with logsink._sharedlock:
+            if logsink._shared.get(self.path) is self:
+                del logsink._shared[self.path]
+    def _start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            if self.file is None:
+                self.file = self._open()
+            self.thread = threading.Thread(target=self._loop, name=f"logsink-{os.path.basename(self.path)}", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+    def _put(self, item):
+        #False once the writer thread is gone, rather than blocking forever on a full queue nobody drains
+        while True:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if not self.thread.is_alive():
+                    return False
+    def _check(self):
+        if self.failure is not None:
+            raise self.failure
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+    def _loop(self):
+        try:
+            self._drain()
+        except BaseException as e:
+            self.failure = e
+            raise
+    def _drain(self):
+        pending = []
+        size = 0
+        due = 0.0
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, due - time.monotonic()) if pending else None)
+            except queue.Empty:
+                item = None
+            if type(item) is str:
+                if not pending:
+                    due = time.monotonic() + self.interval
+                pending.append(item)
+                size += len(item)
+                if size < self.flushbytes and time.monotonic() < due:
+                    continue
+            if pending:
+                self._emit("".join(pending))
+                pending = []
+                size = 0
+            if item is _CLOSE:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+    def _emit(self, data):
+        #a failed rotation is reported, and the batch still goes to the file that stayed open
+        try:
+            if self.rotate is not None and time.time() >= self.rollover:
+                self._rotate()
+            elif self.maxbytes is not None and 0 < self.file.tell() and self.file.tell() + len(data) > self.maxbytes:
+                self._rotate()
+        except (OSError, ValueError) as e:
+            self._report(e)
+        try:
+            self.file.write(data)
+            self.file.flush()
+        except (OSError, ValueError) as e:
+            self._report(e)
+    def _report(self, error):
+        if self.error is None:
+            self.error = error
+    def _open(self):
+        return open(self.path, "a", encoding=self.encoding, buffering=1 << 16)
+    def _nextrollover(self):
+        if self.rotate is None:
+            return None
+        return (time.time() // self.rotate + 1) * self.rotate
+    def _rotate(self):
+        #renames while the old handle is still open; if that fails the sink keeps writing to a usable file.
+        #the next rollover moves on either way, so a failing rename is not retried on every batch
+        try:
+            if self.backups > 0:
+                for i in range(self.backups - 1, 0, -1):
+                    if os.path.exists(f"{self.path}.{i}"):
+                        os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                open(self.path, "w").close()
+        finally:
+            self.rollover = self._nextrollover()
+            old, self.file = self.file, self._open()
+            old.close()
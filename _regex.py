@@ -1,23 +1,187 @@
 #_regex.py
 import re
-__all__ = ["rgx"]
+import threading
+import collections
+__all__ = ["rgx", "multipattern"]
+class multipattern:
+    #many patterns compiled into one alternation, so a line that matches none of them (the common case in log
+    #scanning) costs a single regex pass. Two forms are built: `prefilter`, a non-capturing alternation that keeps
+    #re's literal-prefix and charset optimizations, and `combined`, the same alternation as `(?P<_g0>p0)|...`,
+    #which is only ever run anchored at a position the prefilter found. Patterns that cannot be combined
+    #(backreferences, clashing group names, mid-pattern global flags, different flags) are tried one by one
+    def __init__(self, patterns, flags=0):
+        items = list(patterns.items()) if isinstance(patterns, dict) else list(enumerate(patterns))
+        self.names = [name for name, _ in items]
+        self.patterns = [re.compile(p, flags) if isinstance(p, (str, bytes)) else p for _, p in items]
+        self.flags = flags
+        binary = bool(self.patterns) and isinstance(self.patterns[0].pattern, bytes)
+        base = re.compile(b"" if binary else "", flags).flags
+        combine = [i for i, p in enumerate(self.patterns)
+                   if p.flags == base and isinstance(p.pattern, bytes) == binary and not _backrefs(p.pattern)]
+        self.prefilter = self.combined = None
+        self.slots = []  #alternative k of the combined forms is pattern slots[k]
+        if combine:
+            self.bar = b"|" if binary else "|"
+            named = self._build(combine, b"(?P<_g%d>%s)" if binary else "(?P<_g%d>%s)")
+            if named is None:
+                #find the offenders (typically a leading "(?i)" that is no longer leading) and keep them aside
+                combine = [i for i in combine if self._compiles(i, b"(?:%s)" if binary else "(?:%s)")]
+                named = self._build(combine, b"(?P<_g%d>%s)" if binary else "(?P<_g%d>%s)")
+            if named is not None:
+                self.combined = named
+                self.prefilter = self._build(combine, b"(?:%s)" if binary else "(?:%s)", named=False)
+                self.slots = combine
+        self.loose = [i for i in range(len(items)) if i not in self.slots]
+    def _build(self, indexes, form, named=True):
+        parts = [form % ((i, self.patterns[i].pattern) if named else self.patterns[i].pattern) for i in indexes]
+        try:
+            return re.compile(self.bar.join(parts), self.flags) if parts else None
+        except re.error:
+            return None
+    def _compiles(self, i, form):
+        try:
+            re.compile(self.bar + form % self.patterns[i].pattern, self.flags)
+            return True
+        except re.error:
+            return False
+    def _at(self, text, m):
+        #index of the pattern the prefilter matched with, by re-running the named form at that position
+        hit = self.combined.match(text, m.start())
+        return int(hit.lastgroup[2:])
+    def search(self, text):
+        #(name, match) for the leftmost match of any pattern, ties going to the earlier pattern; or None
+        best = None
+        if self.prefilter is not None:
+            m = self.prefilter.search(text)
+            if m is not None:
+                i = self._at(text, m)
+                best = (m.start(), i, self.patterns[i].match(text, m.start()) or m)
+        for i in self.loose:
+            m = self.patterns[i].search(text)
+            if m is not None and (best is None or (m.start(), i) < best[:2]):
+                best = (m.start(), i, m)
+        return None if best is None else (self.names[best[1]], best[2])
+    def which(self, text):
+        #name of the first pattern, in list order, that matches anywhere in text; or None.
+        #the alternation only filters: a line it rejects is rejected by every combined pattern
+        for i in self._candidates(text):
+            if self.patterns[i].search(text) is not None:
+                return self.names[i]
+        return None
+    def matches(self, text):
+        #names of every pattern that matches anywhere in text, in list order
+        return [self.names[i] for i in self._candidates(text) if self.patterns[i].search(text) is not None]
+    def finditer(self, text):
+        #(name, match) for non-overlapping matches of the combined alternation, left to right
+        if self.loose:
+            raise ValueError("multipattern.finditer: some patterns could not be combined")
+        for m in self.prefilter.finditer(text):
+            yield self.names[self._at(text, m)], m
+    def _candidates(self, text):
+        if self.prefilter is not None and self.prefilter.search(text) is None:
+            return self.loose
+        return range(len(self.patterns))
+    def __len__(self):
+        return len(self.patterns)
+def _backrefs(pattern):
+    #numbered or named backreferences would point at the wrong group once wrapped in the alternation
+    if isinstance(pattern, bytes):
+        pattern = pattern.decode("latin-1")
+    return re.search(r"\\[1-9]|\(\?P=", pattern) is not None
 class rgx:
+    MAX = 1024                        #compiled patterns kept; re's own cache is 512 and shared with everyone
+    _cache = collections.OrderedDict()
+    _lock = threading.Lock()
+    _stats = {"hits": 0, "misses": 0, "evictions": 0}
     @staticmethod
-    def find(pattern, text):
-        return re.findall(pattern, text)
+    def compile(pattern, flags=0):
+        if isinstance(pattern, re.Pattern):
+            return pattern
+        key = (type(pattern), pattern, flags)
+        cache = rgx._cache
+        with rgx._lock:
+            compiled = cache.get(key)
+            if compiled is not None:
+                cache.move_to_end(key)
+                rgx._stats["hits"] += 1
+                return compiled
+            rgx._stats["misses"] += 1
+        compiled = re.compile(pattern, flags)
+        rgx._put(key, compiled)
+        return compiled
     @staticmethod
-    def exists(pattern, text):
-        return re.search(pattern, text) is not None
+    def multi(patterns, flags=0):
+        #cached multipattern for a list (names are indexes) or a {name: pattern} dict
+        if isinstance(patterns, multipattern):
+            return patterns
+        key = (multipattern, tuple(patterns.items()) if isinstance(patterns, dict) else tuple(patterns), flags)
+        with rgx._lock:
+            compiled = rgx._cache.get(key)
+            if compiled is not None:
+                rgx._cache.move_to_end(key)
+                rgx._stats["hits"] += 1
+                return compiled
+            rgx._stats["misses"] += 1
+        compiled = multipattern(patterns, flags)
+        rgx._put(key, compiled)
+        return compiled
     @staticmethod
-    def replace(pattern, repl, text, count=0):
-        return re.sub(pattern, repl, text, count)
+    def _put(key, compiled):
+        with rgx._lock:
+            rgx._cache[key] = compiled
+            while len(rgx._cache) > rgx.MAX:
+                rgx._cache.popitem(last=False)
+                rgx._stats["evictions"] += 1
     @staticmethod
-    def extract_groups(pattern, text):
-        m = re.search(pattern, text)
+    def stats():
+        with rgx._lock:
+            out = dict(rgx._stats, size=len(rgx._cache), maxsize=rgx.MAX)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
+    @staticmethod
+    def clear():
+        with rgx._lock:
+            rgx._cache.clear()
+            rgx._stats.update(hits=0, misses=0, evictions=0)
+    @staticmethod
+    def find(pattern, text, flags=0):
+        return rgx.compile(pattern, flags).findall(text)
+    @staticmethod
+    def exists(pattern, text, flags=0):
+        return rgx.compile(pattern, flags).search(text) is not None
+    @staticmethod
+    def replace(pattern, repl, text, count=0, flags=0):
+        return rgx.compile(pattern, flags).sub(repl, text, count)
+    @staticmethod
+    def extract_groups(pattern, text, flags=0):
+        m = rgx.compile(pattern, flags).search(text)
         return m.groups() if m else None
     @staticmethod
-    def split(pattern, text):
-        return re.split(pattern, text)
+    def split(pattern, text, flags=0):
+        return rgx.compile(pattern, flags).split(text)
+    @staticmethod
+    def match(pattern, text, flags=0):
+        return rgx.compile(pattern, flags).fullmatch(text) is not None
+    @staticmethod
+    def find_many(patterns, text, flags=0):
+        #{pattern: findall result} for each pattern (or {name: ...} for a dict of patterns)
+        items = patterns.items() if isinstance(patterns, dict) else ((p, p) for p in patterns)
+        return {name: rgx.compile(p, flags).findall(text) for name, p in items}
     @staticmethod
-    def match(pattern, text):
-        return re.fullmatch(pattern, text) is not None
\ No newline at end of file
+    def scan_lines(pattern, lines, flags=0, first=True):
+        #yields (lineno, line, match) for each line the pattern matches. With a list/dict of patterns it yields
+        #(lineno, line, name) for the first pattern in order that matches, or (lineno, line, [names]) with first=False
+        if isinstance(pattern, (str, bytes, re.Pattern)):
+            search = rgx.compile(pattern, flags).search
+            for lineno, line in enumerate(lines, 1):
+                m = search(line)
+                if m is not None:
+                    yield lineno, line, m
+            return
+        multi = rgx.multi(pattern, flags)
+        test = multi.which if first else multi.matches
+        for lineno, line in enumerate(lines, 1):
+            hit = test(line)
+            if hit is not None and hit != []:
+                yield lineno, line, hit
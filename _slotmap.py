@@ -0,0 +1,72 @@
+#_slotmap.py
+__all__ = ["slotmap"]
+_GEN = 32  #a handle is slot | generation << 32, so a reused slot never answers to an old handle
+_MISSING = object()
+class slotmap:
+    #stable handles over a slot list with a free list, plus a value -> handles index; add/delete/lookup are O(1)
+    def __init__(self):
+        self.slots = []
+        self.gens = []
+        self.free = []
+        self.index = {}  #value -> {handle: None}, oldest first
+    def add(self, value):
+        if self.free:
+            slot = self.free.pop()
+            self.slots[slot] = value
+        else:
+            slot = len(self.slots)
+            self.slots.append(value)
+            self.gens.append(0)
+        handle = slot | self.gens[slot] << _GEN
+        self.index.setdefault(value, {})[handle] = None
+        return handle
+    append = add
+    def get(self, handle, default=None):
+        slot = self._slot(handle)
+        return default if slot is None else self.slots[slot]
+    def find(self, value):
+        #oldest live handle holding value, or None
+        handles = self.index.get(value)
+        return next(iter(handles)) if handles else None
+    def delete(self, handle):
+        slot = self._slot(handle)
+        if slot is None:
+            return False
+        value = self.slots[slot]
+        handles = self.index[value]
+        del handles[handle]
+        if not handles:
+            del self.index[value]
+        self.slots[slot] = _MISSING
+        self.gens[slot] += 1
+        self.free.append(slot)
+        return True
+    def remove(self, value):
+        #like list.remove: drops the oldest entry equal to value
+        handle = self.find(value)
+        if handle is None:
+            raise ValueError(f"slotmap.remove(x): x not in slotmap")
+        self.delete(handle)
+        return handle
+    def items(self):
+        return [(slot | gen << _GEN, value) for slot, (value, gen) in enumerate(zip(self.slots, self.gens)) if value is not _MISSING]
+    def values(self):
+        return [value for value in self.slots if value is not _MISSING]
+    def clear(self):
+        self.slots = []
+        self.gens = []
+        self.free = []
+        self.index = {}
+    def _slot(self, handle):
+        if not isinstance(handle, int) or handle < 0:
+            return None
+        slot = handle & ((1 << _GEN) - 1)
+        if slot >= len(self.slots) or self.gens[slot] != handle >> _GEN or self.slots[slot] is _MISSING:
+            return None
+        return slot
+    def __len__(self):
+        return len(self.slots) - len(self.free)
+    def __contains__(self, value):
+        return value in self.index
+    def __iter__(self):
+        return iter(self.values())
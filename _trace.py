@@ -0,0 +1,120 @@
+#_trace.py
+import os
+import json
+import time
+import random
+import threading
+import functools
+import collections
+from ._evlog import uevlog
+__all__ = ["utrace", "spanrecord"]
+CATEGORY = "trace"  #uevlog category the spans are recorded under
+spanrecord = collections.namedtuple("spanrecord", "name start dur tid args")  #start/dur in perf_counter ns
+_OFF = object()  #span entered while tracing was off: it does not count towards nesting
+_local = threading.local()
+class _span:
+    #context manager and decorator. While utrace.on is False a decorated call costs one attribute check; the
+    #`with` form still builds a _span and runs __enter__/__exit__, which return right after the same check
+    __slots__ = ("name", "args", "start")
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = _OFF
+    def __enter__(self):
+        if not utrace.on:
+            self.start = _OFF
+            return self
+        depth = getattr(_local, "depth", 0)
+        if not depth:
+            #sampling is decided per root span, so a sampled trace always has all of its children
+            _local.sampled = utrace.rate >= 1.0 or random.random() < utrace.rate
+        _local.depth = depth + 1
+        self.start = time.perf_counter_ns() if _local.sampled else None
+        return self
+    def __exit__(self, kind, exc, tb):
+        start = self.start
+        if start is _OFF:
+            return False
+        _local.depth -= 1
+        if start is not None:
+            args = self.args
+            if kind is not None:
+                args = dict(args or (), error=kind.__name__)
+            uevlog.write(spanrecord(self.name, start, time.perf_counter_ns() - start, threading.get_ident(), args), CATEGORY)
+        return False
+    def __call__(self, func):
+        name = self.name or f"{func.__module__}.{func.__qualname__}"
+        args = self.args
+        @functools.wraps(func)
+        def traced(*a, **k):
+            if not utrace.on:
+                return func(*a, **k)
+            with _span(name, args):
+                return func(*a, **k)
+        return traced
+class utrace:
+    on = False     #the single check on every traced call
+    rate = 1.0     #fraction of root spans recorded
+    @staticmethod
+    def span(name=None, **args):
+        #`with utrace.span("db.query", table=t):` or `@utrace.span("name")` / `@utrace.span` on a function
+        if callable(name):
+            return _span(None, None)(name)
+        return _span(name, args or None)
+    @staticmethod
+    def enable(sample=1.0, capacity=None):
+        #capacity resizes the uevlog ring so a long trace is not overwritten by its own tail
+        if capacity:
+            uevlog.resize(capacity)
+        utrace.rate = float(sample)
+        utrace.on = True
+    @staticmethod
+    def disable():
+        utrace.on = False
+    @staticmethod
+    def spans(since=0):
+        return [record for _, _, _, record in uevlog.since(since, CATEGORY)]
+    @staticmethod
+    def summary(since=0):
+        #{name: {"count", "total_ms", "mean_ms", "max_ms"}}, slowest total first
+        out = {}
+        for record in utrace.spans(since):
+            row = out.setdefault(record.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = record.dur / 1e6
+            row["count"] += 1
+            row["total_ms"] += ms
+            row["max_ms"] = max(row["max_ms"], ms)
+        for row in out.values():
+            row["mean_ms"] = round(row["total_ms"] / row["count"], 4)
+            row["total_ms"] = round(row["total_ms"], 4)
+            row["max_ms"] = round(row["max_ms"], 4)
+        return dict(sorted(out.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+    @staticmethod
+    def chrome(path=None, since=0):
+        #Chrome trace event JSON (chrome://tracing, Perfetto, speedscope); written to path when given
+        pid = os.getpid()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        events = []
+        tids = set()
+        for record in utrace.spans(since):
+            event = {"name": record.name, "cat": record.name.split(".", 1)[0], "ph": "X", "pid": pid,
+                     "tid": record.tid, "ts": record.start / 1000, "dur": record.dur / 1000}
+            if record.args:
+                event["args"] = {k: v if isinstance(v, (int, float, bool, type(None))) else str(v) for k, v in record.args.items()}
+            events.append(event)
+            tids.add(record.tid)
+        for tid in sorted(tids):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": names.get(tid, str(tid))}})
+        doc = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(doc, f)
+        return doc
+if os.environ.get("STAMP_TRACE"):
+    #STAMP_TRACE=1 traces everything from import on; STAMP_TRACE=0.05 samples 5% of root spans
+    try:
+        _rate = min(float(os.environ["STAMP_TRACE"]), 1.0)
+    except ValueError:
+        _rate = 0.0
+    if _rate > 0:
+        utrace.enable(sample=_rate)
@@ -0,0 +1,282 @@
+#_xfer.py
+import os
+import sys
+import glob
+import json
+import time
+import errno
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+__all__ = ["transferjob"]
+_NOZEROCOPY = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+_STEP = 1 << 30  #max bytes per copy_file_range/sendfile call
+_STAMP = ".json"  #next to dst.part: the source path, size and mtime the .part file was started from
+class transferjob:
+    #copies (or moves) many files with a thread pool; files land as dst.part and are renamed when complete,
+    #and the optional journal records finished files so a rerun skips them and resumes .part files in place
+    #(only while the source still matches the stamp written next to the .part file)
+    def __init__(self, sources, dest, move=False, workers=8, verify=None, journal=None, progress=None, interval=0.5,
+                 bufsize=1 << 20, root=None, metadata=False):
+        if verify is not None and verify not in hashlib.algorithms_available:
+            raise ValueError(f"transferjob: unknown checksum {verify!r}")
+        self.sources = [sources] if isinstance(sources, (str, os.PathLike)) else list(sources)
+        self.dest = os.fspath(dest)
+        self.move = move
+        self.workers = int(workers)
+        self.verify = verify            #hashlib name; None skips verification
+        self.journal = journal          #path of the resume journal (JSON lines)
+        self.progress = progress        #callable(stats) every `interval` seconds, or True for one status line
+        self.interval = float(interval)
+        self.bufsize = int(bufsize)     #fallback copy buffer
+        self.root = os.fspath(root) if root is not None else None
+        self.metadata = metadata        #copy timestamps too (shutil.copystat) instead of just the mode
+        self.lock = threading.Lock()
+        self.stats = {"files": 0, "done": 0, "skipped": 0, "failed": 0, "bytes": 0, "total": 0, "zerocopy": 0}
+        self.errors = []
+    def plan(self, done=None):
+        #[(src, dst, size)] for every regular file under the sources; globs and directories are expanded.
+        #a missing source the journal shows as already moved is planned too, so run() counts it as skipped
+        done = self._journaled() if done is None else done
+        out = []
+        for source in self.sources:
+            source = os.fspath(source)
+            matches = glob.glob(source, recursive=True) if glob.has_magic(source) else [source]
+            for path in sorted(matches):
+                if os.path.isdir(path):
+                    base = self.root or os.path.dirname(os.path.abspath(path))
+                    for src, st in self._walk(path):
+                        out.append((src, os.path.join(self.dest, os.path.relpath(src, base)), st.st_size))
+                elif os.path.isfile(path):
+                    rel = os.path.relpath(path, self.root) if self.root else os.path.basename(path)
+                    out.append((path, os.path.join(self.dest, rel), os.path.getsize(path)))
+                else:
+                    rel = os.path.relpath(path, self.root) if self.root else os.path.basename(path)
+                    dst = os.path.join(self.dest, rel)
+                    if self._finished(path, dst, done):
+                        out.append((path, dst, done[path][1]))
+                    else:
+                        self._fail(path, FileNotFoundError(errno.ENOENT, "no such file", path))
+        return out
+    def run(self):
+        t0 = time.perf_counter()
+        done = self._journaled()
+        plan = self.plan(done)
+        self.stats["files"] = len(plan)
+        self.stats["total"] = sum(size for _, _, size in plan)
+        stop = threading.Event()
+        reporter = None
+        if self.progress:
+            reporter = threading.Thread(target=self._report, args=(stop, t0), name="transfer-progress", daemon=True)
+            reporter.start()
+        log = open(self.journal, "a", encoding="utf-8") if self.journal else None
+        try:
+            with ThreadPoolExecutor(self.workers) as pool:
+                futures = {}
+                for src, dst, size in plan:
+                    if self._finished(src, dst, done):
+                        with self.lock:
+                            self.stats["skipped"] += 1
+                            self.stats["bytes"] += size
+                        continue
+                    futures[pool.submit(self._transfer, src, dst)] = src
+                for future in as_completed(futures):
+                    src = futures[future]
+                    try:
+                        entry = future.result()
+                    except OSError as e:
+                        self._fail(src, e)
+                        continue
+                    with self.lock:
+                        self.stats["done"] += 1
+                    if log is not None:
+                        log.write(json.dumps(entry) + "\n")
+                        log.flush()
+        finally:
+            if log is not None:
+                log.close()
+            stop.set()
+            if reporter is not None:
+                reporter.join()
+        return self.summary(time.perf_counter() - t0)
+    def summary(self, seconds):
+        out = dict(self.stats)
+        out["seconds"] = round(seconds, 3)
+        out["mb_per_sec"] = round(out["bytes"] / seconds / 1e6, 1) if seconds else 0.0
+        out["errors"] = list(self.errors)
+        return out
+    def _walk(self, top):
+        stack = [top]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path, entry.stat()
+    def _fail(self, src, exc):
+        with self.lock:
+            self.stats["failed"] += 1
+            self.errors.append((os.fspath(src), f"{type(exc).__name__}: {exc}"))
+    def _journaled(self):
+        done = {}
+        if self.journal and os.path.exists(self.journal):
+            with open(self.journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  #torn last line from an interrupted run
+                    done[entry["src"]] = (entry["dst"], entry["size"], entry["mtime_ns"])
+        return done
+    def _finished(self, src, dst, done):
+        #the journal shows src -> dst done: the source is unchanged, or (move) gone with its file in place
+        entry = done.get(src)
+        if entry is None:
+            return False
+        if self.move and not os.path.lexists(src):
+            try:
+                return entry[0] == dst and os.path.getsize(dst) == entry[1]
+            except OSError:
+                return False
+        return entry == self._signature(src, dst)
+    @staticmethod
+    def _signature(src, dst):
+        try:
+            st = os.stat(src)
+            if os.path.getsize(dst) != st.st_size:
+                return None
+        except OSError:
+            return None
+        return (dst, st.st_size, st.st_mtime_ns)
+    def _transfer(self, src, dst):
+        st = os.stat(src)
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        entry = {"src": src, "dst": dst, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if self.move and self.verify is None:
+            try:
+                os.rename(src, dst)  #same filesystem: nothing to copy
+                self._advance(st.st_size)
+                return entry
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+        part = dst + ".part"
+        stamp = {"src": os.path.abspath(src), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        offset = self._resumable(part, stamp)
+        if not offset:
+            with open(part + _STAMP, "w", encoding="utf-8") as f:
+                json.dump(stamp, f)
+        self._advance(offset)
+        with open(src, "rb", buffering=0) as fsrc, open(part, "r+b" if offset else "wb", buffering=0) as fdst:
+            if self.verify is None:
+                self._copy(fsrc, fdst, offset, st.st_size)
+            else:
+                entry[self.verify] = self._copyhashed(fsrc, fdst, offset, st.st_size)
+        if self.metadata:
+            shutil.copystat(src, part)
+        else:
+            shutil.copymode(src, part)
+        if self.verify is not None and self._digest(part) != entry[self.verify]:
+            os.remove(part)
+            os.remove(part + _STAMP)
+            raise OSError(errno.EIO, f"checksum mismatch ({self.verify})", dst)
+        os.replace(part, dst)
+        os.remove(part + _STAMP)
+        if self.move:
+            os.remove(src)
+        return entry
+    @staticmethod
+    def _resumable(part, stamp):
+        #bytes of an existing .part worth keeping: none unless its stamp shows the same source, size and mtime
+        try:
+            with open(part + _STAMP, "r", encoding="utf-8") as f:
+                if json.load(f) != stamp:
+                    return 0
+            offset = os.path.getsize(part)
+        except (OSError, ValueError):
+            return 0
+        return offset if offset <= stamp["size"] else 0
+    def _copy(self, fsrc, fdst, pos, size):
+        #copy_file_range (in-kernel, reflink-capable), then sendfile, then a large reusable buffer
+        src, dst = fsrc.fileno(), fdst.fileno()
+        for zerocopy in ("copy_file_range", "sendfile"):
+            if pos >= size or not hasattr(os, zerocopy):
+                continue
+            try:
+                while pos < size:
+                    if zerocopy == "copy_file_range":
+                        n = os.copy_file_range(src, dst, min(size - pos, _STEP), pos, pos)
+                    else:
+                        os.lseek(dst, pos, os.SEEK_SET)
+                        n = os.sendfile(dst, src, pos, min(size - pos, _STEP))
+                    if not n:
+                        break
+                    pos += n
+                    self._advance(n, zerocopy=True)
+            except OSError as e:
+                if e.errno not in _NOZEROCOPY:
+                    raise
+        if pos < size:
+            self._buffered(fsrc, fdst, pos, size, None)
+    def _copyhashed(self, fsrc, fdst, pos, size):
+        h = hashlib.new(self.verify)
+        if pos:
+            fdst.seek(0)
+            self._feed(fdst, h, pos)  #bytes already in the .part file from an interrupted run
+        self._buffered(fsrc, fdst, pos, size, h)
+        return h.hexdigest()
+    def _buffered(self, fsrc, fdst, pos, size, h):
+        buf = bytearray(min(self.bufsize, max(size - pos, 1)))
+        view = memoryview(buf)
+        fsrc.seek(pos)
+        fdst.seek(pos)
+        while pos < size:
+            n = fsrc.readinto(view)
+            if not n:
+                break
+            fdst.write(view[:n])
+            if h is not None:
+                h.update(view[:n])
+            pos += n
+            self._advance(n)
+        fdst.truncate(pos)
+    def _digest(self, path):
+        h = hashlib.new(self.verify)
+        with open(path, "rb", buffering=0) as f:
+            self._feed(f, h, None)
+        return h.hexdigest()
+    def _feed(self, f, h, limit):
+        buf = bytearray(self.bufsize)
+        view = memoryview(buf)
+        left = limit
+        while left is None or left > 0:
+            n = f.readinto(view if left is None else view[:min(left, len(buf))])
+            if not n:
+                break
+            h.update(view[:n])
+            if left is not None:
+                left -= n
+    def _advance(self, n, zerocopy=False):
+        with self.lock:
+            self.stats["bytes"] += n
+            if zerocopy:
+                self.stats["zerocopy"] += n
+    def _report(self, stop, t0):
+        while not stop.wait(self.interval):
+            self._emit(time.perf_counter() - t0, False)
+        self._emit(time.perf_counter() - t0, True)
+    def _emit(self, elapsed, final):
+        with self.lock:
+            snap = dict(self.stats)
+        snap["seconds"] = round(elapsed, 3)
+        snap["mb_per_sec"] = round(snap["bytes"] / elapsed / 1e6, 1) if elapsed else 0.0
+        if callable(self.progress):
+            self.progress(snap)
+            return
+        pct = 100.0 * snap["bytes"] / snap["total"] if snap["total"] else 100.0
+        line = (f"\rtransfer: {snap['done'] + snap['skipped']}/{snap['files']} files  {pct:5.1f}%  "
+                f"{snap['mb_per_sec']} MB/s  {snap['failed']} failed")
+        sys.stderr.write(line + ("\n" if final else ""))
+        sys.stderr.flush()
@@ -9,6 +9,9 @@ import os
 import re
 import hashlib
 
+from .vscn import VulnScanner
+from ..trc import traced as _traced
+
 class AdvancedSecurityAI:
 	"""
 	Advanced security and threat intelligence class.
@@ -156,12 +159,15 @@ class AdvancedSecurityAI:
 			"recommended_actions": ["update_patching", "monitor_logs", "test_defenses"]
 		}
 	
-	def scanVulnerabilities(codebase):
+	@_traced("oaiftrs.AdvancedSecurityAI.scanVulnerabilities")
+	def scanVulnerabilities(self, codebase, workers=None, cache=None):
 		"""
 		Scan codebase for security vulnerabilities.
 		
 		Parameters:
 			codebase: Path to codebase
+			workers: Scanner threads (default: one per CPU plus four, at most 32)
+			cache: Path of a scan cache file; a rescan only reads files changed since
 		
 		Returns:
 			list: List of vulnerabilities found
@@ -174,56 +180,28 @@ class AdvancedSecurityAI:
 		if not codebase:
 			return []
 		
-		# Check if it's a file path
-		if os.path.isdir(codebase):
-			# Scan directory
-			vulnerabilities = []
-			try:
-				for root, dirs, files in os.walk(codebase):
-					for file in files:
-						if file.endswith(('.py', '.js', '.java', '.cpp')):
-							file_path = os.path.join(root, file)
-							vulnerabilities.extend(self._scanFile(file_path))
-			except Exception:
-				return [{"error": "unable to scan directory"}]
-			
-			return vulnerabilities
-		else:
-			# Scan single file
-			return self._scanFile(codebase)
+		return list(self.iterVulnerabilities(codebase, workers, cache))
+	
+	def iterVulnerabilities(self, codebase, workers=None, cache=None):
+		"""
+		Yield scanVulnerabilities' findings as they are found.
+		
+		Directories are walked with os.scandir and their .py/.js/.java/.cpp
+		files scanned on a thread pool, large files through mmap. Findings come
+		in walk order; a single file is scanned whatever its extension.
+		
+		Example:
+			>>> for finding in sec.iterVulnerabilities("monorepo/", cache=".vulncache.json"):
+			...     print(finding["file"], finding["type"])
+		"""
+		if not codebase:
+			return
+		
+		yield from VulnScanner(cache=cache, workers=workers).scan(codebase)
 	
-	def _scanFile(file_path):
+	def _scanFile(self, file_path):
 		"""Helper method to scan a single file"""
-		vulnerabilities = []
-		
-		try:
-			with open(file_path, 'r', encoding='utf-8') as f:
-				content = f.read()
-			
-			# Check for common vulnerabilities
-			vuln_patterns = {
-				"SQL Injection": ["execute(", "query(\"" + "*", "%s", "SELECT * FROM"],
-				"XSS": ["innerHTML", "eval(", "document.write"],
-				"Hardcoded Credentials": ["password =", "api_key =", "secret ="],
-				"Command Injection": ["os.system(", "subprocess.call", "exec("],
-				"Path Traversal": ["../", "..\\\"", "open(\"" + "*"]
-			}
-			
-			for vuln_type, patterns in vuln_patterns.items():
-				for pattern in patterns:
-					if pattern in content:
-						vulnerabilities.append({
-							"type": vuln_type,
-							"severity": "high" if vuln_type in ["SQL Injection", "Command Injection"] else "medium",
-							"file": file_path,
-							"pattern": pattern
-						})
-						break  # Only report once per vulnerability type
-		
-		except Exception:
-			pass
-		
-		return vulnerabilities
+		return VulnScanner().scanFile(file_path)
 	
 	def behavioralAnalysis(user_activity):
 		"""
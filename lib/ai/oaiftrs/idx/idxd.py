@@ -0,0 +1,641 @@
+"""
+Stamp Disk Index Module
+
+Persistent, memory-mapped segment index behind SmartSearch(index_dir=...).
+
+An index directory holds immutable segment files and a MANIFEST.json naming
+the live ones and the documents deleted from each. A segment file is:
+
+    header    magic, version, counts and section offsets
+    postings  per term: (doc delta, tf) pairs as LEB128 varints
+    lengths   u32 tokens per doc         (BM25 length normalization)
+    uniq      u32 distinct terms per doc (Jaccard unions)
+    docs      fixed-width rows: path offset/length, mtime_ns, size
+    terms     fixed-width rows sorted by term: offset/length, df, postings offset/length
+    blob      UTF-8 paths and terms
+
+Opening an index maps the segments and reads only their headers, so a cold
+process can answer its first query right away; terms are found by binary
+search over the term table and only the postings they need are decoded.
+Writes are buffered and committed as new segments; once there are more than
+max_segments, a background thread merges the newest ones (size-tiered).
+
+Usage:
+    >>> from stamp.oaiftrs.idx.idxd import DiskIndex
+    >>> index = DiskIndex(".search-index")
+    >>> index.update(paths)  # reads new/changed files, commits a segment
+    >>> [(index.path(d), score) for d, score in index.search("machine learning", limit=10)]
+"""
+
+import os
+import json
+import math
+import mmap
+import time
+import struct
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+from heapq import merge as _mergeSorted
+from typing import List, Dict, Tuple, Optional, Iterable
+try:
+	import fcntl
+except ImportError:  # Windows
+	fcntl = None
+
+from .invx import InvertedIndex, tokenize, BM25_K1, BM25_B
+
+# Module-level constants
+MAGIC = b"STIX"
+VERSION = 1
+MANIFEST = "MANIFEST.json"
+LOCKFILE = "LOCK"
+MAX_SEGMENTS = 8
+_HEADER = struct.Struct("<4sIIIQQQQQQQQ")  # magic, version, docs, terms, total tokens, 7 section offsets
+_DOC = struct.Struct("<QIqq")              # path offset, path length, mtime_ns, size
+_TERM = struct.Struct("<QIIQI")            # term offset, term length, df, postings offset, postings length
+
+def _varints(values: Iterable[int], out: bytearray) -> None:
+	"""Append non-negative ints as LEB128 varints."""
+	append = out.append
+	for value in values:
+		while value >= 0x80:
+			append((value & 0x7F) | 0x80)
+			value >>= 7
+		append(value)
+
+def _unvarints(buf: bytes) -> List[int]:
+	"""Decode LEB128 varints; all-single-byte buffers (the common case) decode in C."""
+	if buf.isascii():
+		return list(buf)
+	out = []
+	value = shift = 0
+	for byte in buf:
+		if byte < 0x80:
+			out.append(value | (byte << shift))
+			value = shift = 0
+		else:
+			value |= (byte & 0x7F) << shift
+			shift += 7
+	return out
+
+def _encodePostings(pairs: Iterable[Tuple[int, int]]) -> bytes:
+	"""(doc, tf) pairs in ascending doc order as (delta, tf) varints."""
+	flat = []
+	prev = 0
+	for doc, tf in pairs:
+		flat.append(doc - prev)
+		flat.append(tf)
+		prev = doc
+	if not flat or max(flat) < 0x80:
+		return bytes(flat)
+	out = bytearray()
+	_varints(flat, out)
+	return bytes(out)
+
+def writeSegment(path: str, docs: List[tuple], terms: Iterable[Tuple[bytes, List[Tuple[int, int]]]]) -> None:
+	"""Write a segment file.
+
+	Args:
+	    path: Segment file to create
+	    docs: (path, mtime_ns, size, tokens, distinct terms) per local doc id
+	    terms: (term bytes, [(local doc id, tf), ...]) in ascending term order
+	"""
+	blob = bytearray()
+	doc_rows = bytearray()
+	for doc_path, mtime, size, _, _ in docs:
+		raw = doc_path.encode("utf-8", "surrogateescape")
+		doc_rows += _DOC.pack(len(blob), len(raw), mtime, size)
+		blob += raw
+	term_rows = bytearray()
+	tmp = path + ".tmp"
+	with open(tmp, "wb") as f:
+		f.write(b"\0" * _HEADER.size)
+		pos = _HEADER.size
+		nterms = 0
+		for term, pairs in terms:
+			data = _encodePostings(pairs)
+			term_rows += _TERM.pack(len(blob), len(term), len(pairs), pos, len(data))
+			blob += term
+			f.write(data)
+			pos += len(data)
+			nterms += 1
+		offsets = [pos]
+		for section in (struct.pack(f"<{len(docs)}I", *(d[3] for d in docs)),
+				struct.pack(f"<{len(docs)}I", *(d[4] for d in docs)), doc_rows, term_rows, blob):
+			f.write(section)
+			pos += len(section)
+			offsets.append(pos)
+		f.seek(0)
+		f.write(_HEADER.pack(MAGIC, VERSION, len(docs), nterms, sum(d[3] for d in docs), _HEADER.size, *offsets))
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(tmp, path)
+
+class Segment:
+	"""Read-only view of a segment file through mmap."""
+
+	def __init__(self, path: str):
+		self.path = path
+		self.name = os.path.basename(path)
+		with open(path, "rb") as f:
+			self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		(magic, version, self.ndocs, self.nterms, self.tokens, self._post, lengths, uniq,
+			self._docs, self._terms, self._blob, _) = _HEADER.unpack_from(self._mm, 0)
+		if magic != MAGIC or version != VERSION:
+			self._mm.close()
+			raise ValueError(f"{path}: not a version {VERSION} index segment")
+		view = memoryview(self._mm)
+		self.lengths = view[lengths:lengths + 4 * self.ndocs].cast("I")  # zero-copy u32 arrays
+		self.uniq = view[uniq:uniq + 4 * self.ndocs].cast("I")
+
+	def _term(self, i: int) -> bytes:
+		offset, length = struct.unpack_from("<QI", self._mm, self._terms + i * _TERM.size)
+		start = self._blob + offset
+		return self._mm[start:start + length]
+
+	def find(self, term: bytes) -> Optional[Tuple[int, int, int]]:
+		"""(df, postings offset, postings length) of a term, by binary search; None if absent."""
+		lo, hi = 0, self.nterms
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self._term(mid) < term:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < self.nterms and self._term(lo) == term:
+			_, _, df, offset, length = _TERM.unpack_from(self._mm, self._terms + lo * _TERM.size)
+			return df, offset, length
+		return None
+
+	def postings(self, term: bytes) -> Tuple[List[int], List[int]]:
+		"""(local doc ids, term frequencies) of a term."""
+		entry = self.find(term)
+		if entry is None:
+			return [], []
+		_, offset, length = entry
+		values = _unvarints(self._mm[offset:offset + length])
+		return list(accumulate(values[0::2])), values[1::2]
+
+	def terms(self) -> Iterable[Tuple[bytes, int]]:
+		"""(term, index) in ascending order."""
+		for i in range(self.nterms):
+			yield self._term(i), i
+
+	def tagged(self) -> Iterable[Tuple[bytes, int, "Segment"]]:
+		"""(term, index, self) in ascending term order, for merging segments."""
+		for term, i in self.terms():
+			yield term, i, self
+
+	def postingsAt(self, i: int) -> List[Tuple[int, int]]:
+		_, _, _, offset, length = _TERM.unpack_from(self._mm, self._terms + i * _TERM.size)
+		values = _unvarints(self._mm[offset:offset + length])
+		return list(zip(accumulate(values[0::2]), values[1::2]))
+
+	def doc(self, local: int) -> Tuple[str, int, int]:
+		"""(path, mtime_ns, size) of a local doc id."""
+		offset, length, mtime, size = _DOC.unpack_from(self._mm, self._docs + local * _DOC.size)
+		start = self._blob + offset
+		return self._mm[start:start + length].decode("utf-8", "surrogateescape"), mtime, size
+
+	def close(self) -> None:
+		self.lengths.release()
+		self.uniq.release()
+		self._mm.close()
+
+class DiskIndex:
+	"""Segmented on-disk inverted index with the InvertedIndex query interface.
+
+	Doc ids are ints valid until the next commit or merge; SmartSearch uses
+	them within one locked call. Documents are stored under their absolute,
+	normalized path (InvertedIndex.key), so path() returns that spelling and
+	the index means the same files from any working directory. Statistics are exact: deleted documents are
+	skipped while postings are decoded, not just when segments merge. One
+	process writes an index at a time; every open DiskIndex holds a shared
+	flock on LOCK, so leftover files are only cleaned up by an opener that
+	has the directory to itself.
+	"""
+
+	def __init__(self, directory: str, max_segments: int = MAX_SEGMENTS, background: bool = True,
+			k1: float = BM25_K1, b: float = BM25_B, max_age: float = 0.0):
+		"""Open (or create) the index in directory.
+
+		Args:
+		    directory: Index directory
+		    max_segments: Segment count that triggers a merge after a commit
+		    background: Merge on a background thread (else inside commit())
+		    k1: BM25 term frequency saturation
+		    b: BM25 length normalization
+		    max_age: Seconds a file's stat is trusted before update() checks it again
+		"""
+		self.directory = directory
+		self.max_segments = max_segments
+		self.background = background
+		self.k1 = k1
+		self.b = b
+		self.max_age = max_age
+		self._checked = {}     # path -> time.monotonic() of its last stat in update()
+		self.lock = threading.RLock()
+		self.segments = []     # oldest first
+		self.deleted = {}      # segment name -> set of deleted local ids
+		self.reads = 0         # files read and tokenized by update()
+		self._pending = InvertedIndex()
+		self._paths = None     # path -> (segment, local id), built on the first update()
+		self._merging = None
+		self._generation = 0
+		self._dirty = False    # deletions not yet in the manifest
+		os.makedirs(directory, exist_ok=True)
+		self._lockfile = open(os.path.join(directory, LOCKFILE), "a+b")
+		alone = self._lock(fcntl.LOCK_EX | fcntl.LOCK_NB) if fcntl is not None else False
+		if fcntl is not None and not alone:
+			self._lock(fcntl.LOCK_SH)
+		manifest = os.path.join(directory, MANIFEST)
+		cutoff = None  # without flock: files at least as new as the manifest read here are kept
+		if os.path.exists(manifest):
+			with open(manifest, "r", encoding="utf-8") as f:
+				cutoff = os.fstat(f.fileno()).st_mtime_ns
+				data = json.load(f)
+			self._generation = data["generation"]
+			for name in data["segments"]:
+				self.segments.append(Segment(os.path.join(directory, name)))
+			self.deleted = {name: set(ids) for name, ids in data.get("deleted", {}).items()}
+		if alone:
+			self._cleanup(None)
+			self._lock(fcntl.LOCK_SH)
+		elif fcntl is None and cutoff is not None:
+			self._cleanup(cutoff)
+		self._reindex()
+
+	def _lock(self, how: int) -> bool:
+		try:
+			fcntl.flock(self._lockfile.fileno(), how)
+			return True
+		except BlockingIOError:
+			return False
+
+	def _cleanup(self, cutoff: Optional[int]) -> None:
+		"""Remove segment files a crash or an interrupted merge left behind.
+
+		Another open index may be writing a segment (or its .tmp) that its next
+		manifest names, so this runs only under the exclusive lock; without
+		flock, files modified at or after cutoff (the manifest's mtime_ns) stay.
+		"""
+		live = {s.name for s in self.segments}
+		for name in os.listdir(self.directory):
+			if name.startswith("seg-") and name not in live:
+				path = os.path.join(self.directory, name)
+				try:
+					if cutoff is None or os.stat(path).st_mtime_ns < cutoff:
+						os.remove(path)
+				except OSError:
+					pass
+
+	def _reindex(self) -> None:
+		"""Doc id bases and live totals after the segment list changed."""
+		self._bases = list(accumulate((s.ndocs for s in self.segments), initial=0))
+		docs = tokens = 0
+		for segment in self.segments:
+			dead = self.deleted.get(segment.name, ())
+			docs += segment.ndocs - len(dead)
+			tokens += segment.tokens - sum(segment.lengths[d] for d in dead)
+		self._docs, self._tokens = docs, tokens
+
+	def __len__(self) -> int:
+		return self._docs
+
+	def _locate(self, doc_id: int) -> Tuple[Segment, int]:
+		i = bisect_right(self._bases, doc_id) - 1
+		return self.segments[i], doc_id - self._bases[i]
+
+	def path(self, doc_id: int) -> str:
+		segment, local = self._locate(doc_id)
+		return segment.doc(local)[0]
+
+	# ---- queries -------------------------------------------------------
+
+	def _hits(self, term: str, scope: Optional[set]) -> List[Tuple[Segment, int, List[int], List[int]]]:
+		"""Live postings of term inside scope: (segment, doc id base, local ids, tfs) per segment."""
+		raw = term.encode("utf-8", "surrogateescape")
+		out = []
+		for segment, base in zip(self.segments, self._bases):
+			ids, tfs = segment.postings(raw)
+			if not ids:
+				continue
+			dead = self.deleted.get(segment.name)
+			if dead or scope is not None:
+				kept = [(local, tf) for local, tf in zip(ids, tfs)
+					if (not dead or local not in dead) and (scope is None or base + local in scope)]
+				if not kept:
+					continue
+				ids, tfs = [local for local, _ in kept], [tf for _, tf in kept]
+			out.append((segment, base, ids, tfs))
+		return out
+
+	def _length(self, doc_id: int) -> int:
+		segment, local = self._locate(doc_id)
+		return segment.lengths[local]
+
+	def _ranked(self, scores: Dict[int, float], doc_ids: Optional[List[int]], limit: Optional[int]) -> List[Tuple[int, float]]:
+		if doc_ids is None:
+			ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+		else:
+			order = {d: i for i, d in enumerate(doc_ids)}
+			ranked = sorted(scores.items(), key=lambda item: (-item[1], order[item[0]]))
+		return ranked[:limit] if limit is not None else ranked
+
+	def search(self, query: str, doc_ids: Optional[List[int]] = None, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+		"""BM25 ranking, as InvertedIndex.search, over the whole index or the given doc ids."""
+		with self.lock:
+			scope = None if doc_ids is None else set(doc_ids)
+			n = self._docs if scope is None else len(scope)
+			if not n:
+				return []
+			total = self._tokens if scope is None else sum(self._length(d) for d in scope)
+			avgdl = total / n or 1.0
+			k1, b = self.k1, self.b
+			scores = {}
+			get = scores.get
+			for term in set(tokenize(query)):
+				hits = self._hits(term, scope)
+				df = sum(len(ids) for _, _, ids, _ in hits)
+				if not df:
+					continue
+				idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+				for segment, base, ids, tfs in hits:
+					lengths = segment.lengths
+					for local, tf in zip(ids, tfs):
+						d = base + local
+						scores[d] = get(d, 0.0) + idf * tf * (k1 + 1.0) / (tf + k1 * (1.0 - b + b * lengths[local] / avgdl))
+			return self._ranked(scores, doc_ids, limit)
+
+	def jaccard(self, text: str, doc_ids: Optional[List[int]] = None, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+		"""Jaccard similarity of text's term set with each doc sharing a term, as InvertedIndex.jaccard."""
+		with self.lock:
+			words = set(tokenize(text))
+			scope = None if doc_ids is None else set(doc_ids)
+			common = {}
+			for term in words:
+				for _, base, ids, _ in self._hits(term, scope):
+					for local in ids:
+						d = base + local
+						common[d] = common.get(d, 0) + 1
+			scores = {}
+			for d, shared in common.items():
+				segment, local = self._locate(d)
+				scores[d] = shared / (len(words) + segment.uniq[local] - shared)
+			return self._ranked(scores, doc_ids, limit)
+
+	# ---- writes --------------------------------------------------------
+
+	def _pathMap(self) -> Dict[str, Tuple[Segment, int]]:
+		"""Absolute path -> (segment, local id) of every live doc; read from the doc tables once.
+
+		Indexes written before paths were normalized may hold one file under
+		two spellings; the older doc is deleted at the next commit().
+		"""
+		if self._paths is None:
+			paths = {}
+			for segment in self.segments:
+				dead = self.deleted.get(segment.name, ())
+				for local in range(segment.ndocs):
+					if local not in dead:
+						key = InvertedIndex.key(segment.doc(local)[0])
+						older = paths.get(key)
+						if older is not None:
+							self.deleted.setdefault(older[0].name, set()).add(older[1])
+							self._dirty = True
+						paths[key] = (segment, local)
+			self._paths = paths
+			if self._dirty:
+				self._reindex()
+		return self._paths
+
+	def update(self, files: Iterable[str]) -> List[int]:
+		"""Index new and changed files, drop unreadable ones, commit; returns their doc ids in order."""
+		with self.lock:
+			files = [InvertedIndex.key(path) for path in files]
+			paths = self._pathMap()
+			now = time.monotonic()
+			for path in files:
+				current = paths.get(path)
+				if current is not None and self.max_age and now - self._checked.get(path, -math.inf) < self.max_age:
+					continue
+				try:
+					st = os.stat(path)
+					if current is not None:
+						_, mtime, size = current[0].doc(current[1])
+						if mtime == st.st_mtime_ns and size == st.st_size:
+							self._checked[path] = now
+							continue
+					with open(path, "rb") as f:
+						data = f.read()
+				except OSError:
+					self.remove(path)
+					continue
+				self.add(path, data.decode("utf-8", errors="ignore"), st.st_mtime_ns, st.st_size)
+				self._checked[path] = now
+				self.reads += 1
+			self.commit()
+			paths = self._pathMap()
+			ids = []
+			seen = set()
+			for path in files:
+				current = paths.get(path)
+				if current is None:
+					continue
+				d = self._bases[self.segments.index(current[0])] + current[1]
+				if d not in seen:
+					seen.add(d)
+					ids.append(d)
+			return ids
+
+	def add(self, path: str, text: str, mtime: int = 0, size: int = 0) -> None:
+		"""Buffer text for path, replacing its indexed version at the next commit()."""
+		path = InvertedIndex.key(path)
+		with self.lock:
+			self._delete(path)
+			self._pending.add(path, text, mtime, size)
+
+	def remove(self, path: str) -> None:
+		"""Delete path from the index at the next commit()."""
+		path = InvertedIndex.key(path)
+		with self.lock:
+			self._checked.pop(path, None)
+			self._delete(path)
+			self._pending.remove(path)
+
+	def _delete(self, path: str) -> None:
+		current = self._pathMap().pop(path, None)
+		if current is not None:
+			segment, local = current
+			dead = self.deleted.setdefault(segment.name, set())
+			if local not in dead:
+				dead.add(local)
+				self._dirty = True
+
+	def commit(self) -> None:
+		"""Write buffered documents as a new segment and persist deletions.
+
+		The manifest is only rewritten when a segment was added or a document
+		was deleted, so a no-op update() costs no write or fsync.
+		"""
+		with self.lock:
+			pending = self._pending
+			if not len(pending) and not self._dirty:
+				return
+			if len(pending):
+				order = sorted(pending.docs)
+				local = {d: i for i, d in enumerate(order)}
+				docs = [(pending.docs[d].path, pending.docs[d].mtime, pending.docs[d].size,
+					pending.docs[d].length, len(pending.docs[d].terms)) for d in order]
+				terms = sorted((term.encode("utf-8", "surrogateescape"), sorted((local[d], tf) for d, tf in posting.items()))
+					for term, posting in pending.postings.items())
+				segment = self._newSegment(docs, terms)
+				self.segments.append(segment)
+				if self._paths is not None:
+					for i, doc in enumerate(docs):
+						self._paths[doc[0]] = (segment, i)
+				self._pending = InvertedIndex()
+			self._writeManifest()
+			self._reindex()
+			if len(self.segments) > self.max_segments and self._merging is None:
+				if self.background:
+					self._merging = threading.Thread(target=self._autoMerge, name="DiskIndex.merge", daemon=True)
+					self._merging.start()
+				else:
+					self._autoMerge()
+
+	def _autoMerge(self) -> None:
+		"""Merge newest segments until at most max_segments remain."""
+		try:
+			while True:
+				with self.lock:
+					if len(self.segments) <= self.max_segments:
+						return
+					sources = self._mergeable()
+				self.merge(sources)
+		finally:
+			self._merging = None
+
+	def _mergeable(self) -> List[Segment]:
+		"""The newest run of segments no more than twice as large as the rest of the run.
+
+		Merging similar sizes keeps segment sizes geometric, so each document is
+		rewritten O(log n) times rather than on every merge.
+		"""
+		segments = self.segments
+		run = segments[-2:]
+		total = sum(s.ndocs for s in run)
+		for segment in reversed(segments[:-2]):
+			if segment.ndocs > 2 * total:
+				break
+			run.insert(0, segment)
+			total += segment.ndocs
+		return run
+
+	def _newSegment(self, docs, terms) -> Segment:
+		with self.lock:
+			self._generation += 1
+			name = f"seg-{self._generation:08d}.six"
+		path = os.path.join(self.directory, name)
+		writeSegment(path, docs, terms)
+		return Segment(path)
+
+	def _writeManifest(self) -> None:
+		data = {
+			"version": VERSION,
+			"generation": self._generation,
+			"segments": [s.name for s in self.segments],
+			"deleted": {s.name: sorted(self.deleted[s.name]) for s in self.segments if self.deleted.get(s.name)}
+		}
+		tmp = os.path.join(self.directory, MANIFEST + ".tmp")
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(data, f)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp, os.path.join(self.directory, MANIFEST))
+		self._dirty = False
+
+	def merge(self, sources: Optional[List[Segment]] = None) -> None:
+		"""Merge consecutive segments (default: all) into one, dropping deleted docs.
+
+		The new segment is written without holding the lock; commits made
+		meanwhile keep their own segments, and deletions made meanwhile are
+		carried over to the merged one.
+		"""
+		with self.lock:
+			sources = list(sources if sources is not None else self.segments)
+			snapshot = {s.name: set(self.deleted.get(s.name, ())) for s in sources}
+		if len(sources) < 2:
+			return
+		remap = {}  # segment name -> new local id of each old one (None: deleted)
+		docs = []
+		for segment in sources:
+			dead = snapshot[segment.name]
+			new = remap[segment.name] = [None] * segment.ndocs
+			for old in range(segment.ndocs):
+				if old not in dead:
+					new[old] = len(docs)
+					doc_path, mtime, size = segment.doc(old)
+					docs.append((doc_path, mtime, size, segment.lengths[old], segment.uniq[old]))
+		def terms():
+			current, pairs = None, []
+			for term, i, segment in _mergeSorted(*(s.tagged() for s in sources), key=lambda item: item[0]):
+				if term != current:
+					if pairs:
+						yield current, pairs
+					current, pairs = term, []
+				new = remap[segment.name]
+				pairs.extend((new[old], tf) for old, tf in segment.postingsAt(i) if new[old] is not None)
+			if pairs:
+				yield current, pairs
+		merged = self._newSegment(docs, terms())
+		with self.lock:
+			deleted = set()
+			for segment in sources:
+				new = remap[segment.name]
+				deleted.update(new[old] for old in self.deleted.get(segment.name, set()) - snapshot[segment.name])
+			at = self.segments.index(sources[0])
+			self.segments = self.segments[:at] + [merged] + [s for s in self.segments[at:] if s not in sources]
+			for segment in sources:
+				self.deleted.pop(segment.name, None)
+			if deleted:
+				self.deleted[merged.name] = deleted
+			if self._paths is not None:
+				for path, (segment, old) in list(self._paths.items()):
+					new = remap.get(segment.name)
+					if new is not None:
+						self._paths[path] = (merged, new[old])
+			self._writeManifest()
+			self._reindex()
+			for segment in sources:
+				segment.close()
+				try:
+					os.remove(segment.path)
+				except OSError:
+					pass  # still mapped elsewhere (Windows): removed by the next open
+
+	def wait(self) -> None:
+		"""Block until a background merge has finished."""
+		merging = self._merging
+		if merging is not None:
+			merging.join()
+
+	def close(self) -> None:
+		"""Commit, finish merging and unmap the segments."""
+		self.commit()
+		self.wait()
+		with self.lock:
+			for segment in self.segments:
+				segment.close()
+			self.segments = []
+			self._lockfile.close()  # releases the flock
+
+	def stats(self) -> Dict[str, int]:
+		"""Live docs, segments, deleted docs awaiting a merge and file reads so far."""
+		with self.lock:
+			return {"docs": self._docs, "segments": len(self.segments),
+				"deleted": sum(len(v) for v in self.deleted.values()), "reads": self.reads}
+
+# Main exports
+__all__ = ["DiskIndex", "Segment", "writeSegment"]
@@ -0,0 +1,265 @@
+"""
+Stamp Inverted Index Module
+
+In-memory inverted index behind SmartSearch: term -> postings with term
+frequencies, BM25 ranking, and incremental updates as files change.
+
+Usage:
+    >>> from stamp.oaiftrs.idx.invx import InvertedIndex
+    >>> index = InvertedIndex()
+    >>> ids = index.update(["a.txt", "b.txt"])
+    >>> index.search("machine learning", ids)
+"""
+
+import os
+import math
+import time
+import hashlib
+from collections import Counter
+from typing import List, Dict, Tuple, Optional, Iterable
+
+# Module-level constants
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text: str) -> List[str]:
+	"""Terms of a text, as every SmartSearch method splits it."""
+	return text.lower().split()
+
+class _Doc:
+	"""Doc table row."""
+
+	__slots__ = ("path", "key", "mtime", "size", "digest", "length", "terms", "checked")
+
+	def __init__(self, path, key, mtime, size, digest, length, terms):
+		self.path = path      # as the caller last spelled it
+		self.key = key        # absolute, normalized path the doc is indexed under
+		self.mtime = mtime
+		self.size = size
+		self.digest = digest
+		self.length = length  # tokens, for BM25 length normalization
+		self.terms = terms    # distinct terms, to unlink the postings and for Jaccard
+		self.checked = 0.0
+
+class InvertedIndex:
+	"""Term -> {doc id: term frequency} postings over a set of files.
+
+	Files are (re)read only when their mtime or size changed and their content
+	hash differs from the indexed one. Rankings and statistics are computed over
+	the doc ids a query is scoped to, so results do not depend on what else
+	happens to be indexed. Paths are indexed by their absolute, normalized form,
+	so "a.txt" and "./a.txt" are one doc. With max_docs set, update() evicts the
+	least recently used docs outside its own files once the index grows past it;
+	prune() drops everything outside a given set of files.
+	"""
+
+	def __init__(self, k1: float = BM25_K1, b: float = BM25_B, max_age: float = 0.0, max_docs: Optional[int] = None):
+		"""Initialize InvertedIndex.
+
+		Args:
+		    k1: BM25 term frequency saturation
+		    b: BM25 length normalization
+		    max_age: Seconds a file's stat is trusted before update() checks it again
+		    max_docs: Docs kept after update() (None: no limit)
+		"""
+		self.k1 = k1
+		self.b = b
+		self.max_age = max_age
+		self.max_docs = max_docs
+		self.postings = {}  # term -> {doc id: term frequency}
+		self.docs = {}      # doc id -> _Doc, least recently used first
+		self.ids = {}       # absolute path -> doc id
+		self.reads = 0      # files read and tokenized
+		self._next = 0
+
+	def __len__(self) -> int:
+		return len(self.docs)
+
+	@staticmethod
+	def key(path: str) -> str:
+		"""Index key of a path: absolute and normalized."""
+		return os.path.abspath(path)
+
+	def update(self, files: Iterable[str]) -> List[int]:
+		"""Bring files up to date in the index; returns the doc ids of the readable ones, in order."""
+		ids = []
+		seen = set()
+		for path in files:
+			doc_id = self.refresh(path)
+			if doc_id is not None and doc_id not in seen:
+				seen.add(doc_id)
+				ids.append(doc_id)
+		if self.max_docs is not None and len(self.docs) > self.max_docs:
+			self._evict(len(self.docs) - self.max_docs, seen)
+		return ids
+
+	def prune(self, files: Iterable[str]) -> int:
+		"""Drop every doc whose file is not in files; returns how many were dropped."""
+		keep = {self.key(path) for path in files}
+		stale = [doc_id for doc_id, doc in self.docs.items() if doc.key not in keep]
+		for doc_id in stale:
+			self._drop(doc_id)
+		return len(stale)
+
+	def _evict(self, count: int, keep: set) -> None:
+		"""Drop up to count of the least recently used docs, never one in keep."""
+		victims = []
+		for doc_id in self.docs:
+			if len(victims) >= count:
+				break
+			if doc_id not in keep:
+				victims.append(doc_id)
+		for doc_id in victims:
+			self._drop(doc_id)
+
+	def refresh(self, path: str) -> Optional[int]:
+		"""Doc id of a file, reindexing it if it changed; None (and unindexed) if it cannot be read."""
+		doc_id = self.ids.get(self.key(path))
+		doc = self.docs[doc_id] if doc_id is not None else None
+		if doc is not None:
+			# mark it most recently used and report it under the caller's spelling
+			del self.docs[doc_id]
+			self.docs[doc_id] = doc
+			doc.path = path
+		now = time.monotonic()
+		if doc is not None and self.max_age and now - doc.checked < self.max_age:
+			return doc_id
+		try:
+			st = os.stat(path)
+			if doc is not None and doc.mtime == st.st_mtime_ns and doc.size == st.st_size:
+				doc.checked = now
+				return doc_id
+			with open(path, "rb") as f:
+				data = f.read()
+		except OSError:
+			self.remove(path)
+			return None
+		digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+		if doc is not None and doc.digest == digest:
+			doc.mtime, doc.size, doc.checked = st.st_mtime_ns, st.st_size, now
+			return doc_id
+		doc_id = self.add(path, data.decode("utf-8", errors="ignore"), st.st_mtime_ns, st.st_size, digest)
+		self.docs[doc_id].checked = now
+		return doc_id
+
+	def add(self, path: str, text: str, mtime: int = 0, size: int = 0, digest: Optional[str] = None) -> int:
+		"""Index text under path, replacing what was indexed for it; returns the new doc id."""
+		self.remove(path)
+		counts = Counter(tokenize(text))
+		doc_id = self._next
+		self._next += 1
+		postings = self.postings
+		for term, tf in counts.items():
+			posting = postings.get(term)
+			if posting is None:
+				postings[term] = {doc_id: tf}
+			else:
+				posting[doc_id] = tf
+		key = self.key(path)
+		self.docs[doc_id] = _Doc(path, key, mtime, size, digest, sum(counts.values()), tuple(counts))
+		self.ids[key] = doc_id
+		self.reads += 1
+		return doc_id
+
+	def remove(self, path: str) -> bool:
+		"""Drop a file from the index; returns whether it was indexed."""
+		doc_id = self.ids.get(self.key(path))
+		if doc_id is None:
+			return False
+		self._drop(doc_id)
+		return True
+
+	def _drop(self, doc_id: int) -> None:
+		doc = self.docs.pop(doc_id)
+		del self.ids[doc.key]
+		postings = self.postings
+		for term in doc.terms:
+			posting = postings[term]
+			del posting[doc_id]
+			if not posting:
+				del postings[term]
+
+	def path(self, doc_id: int) -> str:
+		return self.docs[doc_id].path
+
+	def _hits(self, term: str, scope: Optional[set]) -> List[Tuple[int, int]]:
+		"""(doc id, tf) postings of term inside scope, walking whichever side is smaller."""
+		posting = self.postings.get(term)
+		if not posting:
+			return []
+		if scope is None:
+			return list(posting.items())
+		if len(scope) < len(posting):
+			return [(d, posting[d]) for d in scope if d in posting]
+		return [(d, tf) for d, tf in posting.items() if d in scope]
+
+	def _ranked(self, scores: Dict[int, float], doc_ids: Optional[List[int]]) -> List[Tuple[int, float]]:
+		"""Highest score first; ties keep the order of doc_ids (or indexing order)."""
+		if doc_ids is None:
+			return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+		order = {d: i for i, d in enumerate(doc_ids)}
+		return sorted(scores.items(), key=lambda item: (-item[1], order[item[0]]))
+
+	def search(self, query: str, doc_ids: Optional[List[int]] = None, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+		"""BM25 ranking of the docs matching any query term.
+
+		Args:
+		    query: Query text (tokenized like documents; repeated terms count once)
+		    doc_ids: Docs to rank among, which also set N and the average length
+		    limit: Return at most this many
+
+		Returns:
+		    List of (doc id, score), best first
+		"""
+		scope = None if doc_ids is None else set(doc_ids)
+		docs = self.docs
+		n = len(docs) if scope is None else len(scope)
+		if not n:
+			return []
+		total = sum(doc.length for doc in docs.values()) if scope is None else sum(docs[d].length for d in scope)
+		avgdl = total / n or 1.0
+		k1, b = self.k1, self.b
+		scores = {}
+		for term in set(tokenize(query)):
+			hits = self._hits(term, scope)
+			if not hits:
+				continue
+			idf = math.log(1.0 + (n - len(hits) + 0.5) / (len(hits) + 0.5))
+			for d, tf in hits:
+				norm = k1 * (1.0 - b + b * docs[d].length / avgdl)
+				scores[d] = scores.get(d, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+		ranked = self._ranked(scores, doc_ids)
+		return ranked[:limit] if limit is not None else ranked
+
+	def matchCounts(self, query: str, doc_ids: Optional[List[int]] = None) -> Dict[int, int]:
+		"""Distinct query terms found in each matching doc."""
+		return self._common(set(tokenize(query)), doc_ids)
+
+	def _common(self, terms: set, doc_ids: Optional[List[int]]) -> Dict[int, int]:
+		scope = None if doc_ids is None else set(doc_ids)
+		counts = {}
+		for term in terms:
+			for d, _ in self._hits(term, scope):
+				counts[d] = counts.get(d, 0) + 1
+		return counts
+
+	def jaccard(self, text: str, doc_ids: Optional[List[int]] = None, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+		"""Jaccard similarity of text's term set with each doc sharing a term, best first.
+
+		Intersections come from the postings of text's terms; a doc's distinct
+		term count gives the union, so no document is re-read.
+		"""
+		words = set(tokenize(text))
+		common = self._common(words, doc_ids)
+		docs = self.docs
+		scores = {d: shared / (len(words) + len(docs[d].terms) - shared) for d, shared in common.items()}
+		ranked = self._ranked(scores, doc_ids)
+		return ranked[:limit] if limit is not None else ranked
+
+	def stats(self) -> Dict[str, int]:
+		"""Docs, distinct terms, postings and file reads so far."""
+		return {"docs": len(self.docs), "terms": len(self.postings),
+			"postings": sum(len(p) for p in self.postings.values()), "reads": self.reads}
+
+# Main exports
+__all__ = ["InvertedIndex", "tokenize"]
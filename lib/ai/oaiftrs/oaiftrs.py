@@ -12,15 +12,21 @@ Usage:
 
 import os
 import re
+import threading
 from collections import Counter
 from typing import List, Dict, Any, Tuple
 from enum import Enum
 
+from .idx.invx import InvertedIndex
+from .idx.idxd import DiskIndex
+from .trc import traced as _traced
+
 # Module-level constants
 DEFAULT_N_TOP_KEYWORDS = 10
 DEFAULT_SENTIMENT_THRESHOLD = 0.1
 DEFAULT_SIMILARITY_THRESHOLD = 0.7
 DEFAULT_SEARCH_LIMIT = 10
+DEFAULT_MAX_INDEXED_DOCS = 10000
 
 class Sentiment(Enum):
 	"""Sentiment classifications."""
@@ -193,45 +199,69 @@ class NLPText:
 class SmartSearch:
 	"""Semantic search utilities for finding files by meaning."""
 	
-	def __init__(self):
-		"""Initialize SmartSearch engine."""
-		self._index = {}
+	def __init__(self, max_age: float = 0.0, index_dir: str = None, max_docs: int = DEFAULT_MAX_INDEXED_DOCS):
+		"""Initialize SmartSearch engine.
+		
+		Args:
+		    max_age: Seconds a searched file is trusted unchanged before it is
+		        stat'ed again (0 checks every file on every query)
+		    index_dir: Keep the index on disk in this directory (see DiskIndex), so
+		        later processes start from it instead of re-reading every file
+		    max_docs: Files kept in the in-memory index; the least recently
+		        searched ones are dropped beyond it (None: no limit). A disk
+		        index keeps every file, so other values raise with index_dir
+		"""
+		if index_dir:
+			if max_docs not in (None, DEFAULT_MAX_INDEXED_DOCS):
+				raise ValueError("SmartSearch: max_docs only bounds the in-memory index, not index_dir")
+			self._index = DiskIndex(index_dir, max_age=max_age)
+			self._lock = self._index.lock
+		else:
+			self._index = InvertedIndex(max_age=max_age, max_docs=max_docs)
+			self._lock = threading.RLock()
+	
+	def indexFiles(self, files: List[str]) -> int:
+		"""Index files ahead of the first query; returns how many could be read.
+		
+		Later queries only re-read files whose mtime/size and content hash changed.
+		"""
+		with self._lock:
+			return len(self._index.update(files))
 	
+	@_traced("oaiftrs.SmartSearch.searchByMeaning")
 	def searchByMeaning(self, query: str, files: List[str]) -> List[str]:
 		"""Search files by semantic meaning (keyword-based).
 		
 		Args:
 		    query: Search query
-		    files: List of file paths to search
+		    files: List of file paths to search (None: everything indexed, without
+		        checking the files again)
 		
 		Returns:
-		    List of matching file paths
+		    List of matching file paths, best BM25 score first
 		"""
-		if not query or not files:
-			return []
+		return [path for path, _ in self.searchScored(query, files)]
+	
+	def searchScored(self, query: str, files: List[str], limit: int = None) -> List[Tuple[str, float]]:
+		"""searchByMeaning with the BM25 score of each file.
 		
-		query_words = set(query.lower().split())
-		results = []
+		Args:
+		    query: Search query
+		    files: List of file paths to search (None: everything indexed)
+		    limit: Return at most this many
 		
-		for file_path in files:
-			try:
-				if not os.path.exists(file_path):
-					continue
-				
-				with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-					content = f.read()
-				
-				content_words = set(content.lower().split())
-				match_count = len(query_words & content_words)
-				
-				if match_count > 0:
-					results.append((file_path, match_count))
-			except Exception:
-				continue
+		Returns:
+		    List of tuples (file_path, score), best first
+		"""
+		if not query or (files is not None and not files):
+			return []
 		
-		results.sort(key=lambda x: x[1], reverse=True)
-		return [r[0] for r in results]
+		index = self._index
+		with self._lock:
+			doc_ids = index.update(files) if files is not None else None
+			return [(index.path(d), score) for d, score in index.search(query, doc_ids, limit)]
 	
+	@_traced("oaiftrs.SmartSearch.findSimilar")
 	def findSimilar(self, content: str, files: List[str]) -> List[Tuple[str, float]]:
 		"""Find files with similar content.
 		
@@ -245,34 +275,11 @@ class SmartSearch:
 		if not content or not files:
 			return []
 		
-		ref_words = set(content.lower().split())
-		results = []
-		
-		for file_path in files:
-			try:
-				if not os.path.exists(file_path):
-					continue
-				
-				with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-					file_content = f.read()
-				
-				file_words = set(file_content.lower().split())
-				
-				if not ref_words or not file_words:
-					continue
-				
-				intersection = len(ref_words & file_words)
-				union = len(ref_words | file_words)
-				
-				similarity = intersection / union if union > 0 else 0.0
-				
-				if similarity > 0:
-					results.append((file_path, similarity))
-			except Exception:
-				continue
-		
-		results.sort(key=lambda x: x[1], reverse=True)
-		return results[:DEFAULT_SEARCH_LIMIT]
+		index = self._index
+		with self._lock:
+			doc_ids = index.update(files)
+			similar = index.jaccard(content, doc_ids, DEFAULT_SEARCH_LIMIT)
+			return [(index.path(d), similarity) for d, similarity in similar]
 	
 	def contextAwareSearch(self, query: str, context: str, files: List[str]) -> List[str]:
 		"""Search files using query with additional context.
@@ -288,6 +295,7 @@ class SmartSearch:
 		combined_query = f"{query} {context}"
 		return self.searchByMeaning(combined_query, files)
 	
+	@_traced("oaiftrs.SmartSearch.clusterSimilar")
 	def clusterSimilar(self, docs: List[str]) -> List[List[str]]:
 		"""Cluster documents by similarity.
 		
@@ -0,0 +1,271 @@
+"""
+Stamp Security Monitor Module
+
+Online brute-force detection over live auth logs.
+
+Usage:
+    >>> from stamp.oaiftrs.sec.mntr import BruteForceMonitor
+    >>> monitor = BruteForceMonitor(threshold=5, window=60, on_alert=print)
+    >>> monitor.feed("Failed password for root from 10.0.0.5 port 22")
+    >>> threading.Thread(target=monitor.follow, args=("/var/log/auth.log",), daemon=True).start()
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Callable, Iterable, Optional
+
+from .scnr import IP_PATTERN, FAILURE_PATTERN, BRUTE_FORCE_THRESHOLD
+
+try:
+	from ....._evlog import uevlog
+except ImportError:
+	# Loaded outside the stamp package: pollLog needs an explicit log
+	uevlog = None
+
+# Module-level constants
+DEFAULT_WINDOW = 300.0
+DEFAULT_BUCKETS = 10
+DEFAULT_MAX_IPS = 100000
+
+class _IpWindow:
+	"""Failure counts of one IP in time buckets, oldest first."""
+
+	__slots__ = ("buckets", "total", "level")
+
+	def __init__(self):
+		self.buckets = deque()  # [bucket number, count] pairs
+		self.total = 0
+		self.level = 0  # 0 under threshold, 1 alerted at threshold, 2 alerted at threshold * 3
+
+	def expire(self, oldest: int) -> None:
+		buckets = self.buckets
+		while buckets and buckets[0][0] < oldest:
+			self.total -= buckets.popleft()[1]
+
+class BruteForceMonitor:
+	"""Sliding-window failed-login counter per IP that alerts as thresholds are crossed.
+
+	The window is split into `buckets` time buckets, so each IP costs at most
+	that many counters; a bucket leaves the window as a whole. At most
+	`max_ips` IPs are tracked, the least recently failing ones being dropped
+	first. Lines count as failures exactly as in SecurityAI.detectBruteForce:
+	the first IP address of a line containing failed/denied/incorrect.
+	"""
+
+	def __init__(self, threshold: int = BRUTE_FORCE_THRESHOLD, window: float = DEFAULT_WINDOW,
+			buckets: int = DEFAULT_BUCKETS, max_ips: int = DEFAULT_MAX_IPS,
+			on_alert: Optional[Callable[[Dict[str, Any]], None]] = None,
+			clock: Callable[[], float] = time.time):
+		"""Initialize BruteForceMonitor.
+
+		Args:
+		    threshold: Failures within the window that raise an alert
+		    window: Window length in seconds
+		    buckets: Time buckets the window is split into (its resolution)
+		    max_ips: IPs tracked at once; the coldest is evicted beyond that
+		    on_alert: Called with every alert dict as it is raised
+		    clock: Time source for lines fed without a timestamp
+		"""
+		self.threshold = int(threshold)
+		self.window = float(window)
+		self.buckets = max(int(buckets), 1)
+		self.width = self.window / self.buckets
+		self.max_ips = max(int(max_ips), 1)
+		self.on_alert = on_alert
+		self.clock = clock
+		self.lines = 0
+		self.failures = 0
+		self.evicted = 0
+		self.alerts = deque(maxlen=1000)  # most recent alerts
+		self._ips = OrderedDict()  # ip -> _IpWindow, least recently failing first
+		self._lock = threading.Lock()
+		self._logseq = None
+
+	def feed(self, line: str, ts: Optional[float] = None) -> Optional[Dict[str, Any]]:
+		"""Account for one log line; returns the alert it raised, if any."""
+		self.lines += 1
+		m = IP_PATTERN.search(line)
+		if m is None or FAILURE_PATTERN.search(line) is None:
+			return None
+		return self.record(m.group(), ts, line)
+
+	def feedMany(self, lines: Iterable[str], ts: Optional[float] = None) -> List[Dict[str, Any]]:
+		"""feed() every line of an iterable (a list, a file, sys.stdin); returns the alerts raised."""
+		alerts = []
+		for line in lines:
+			alert = self.feed(line, ts)
+			if alert is not None:
+				alerts.append(alert)
+		return alerts
+
+	def record(self, ip: str, ts: Optional[float] = None, line: Optional[str] = None) -> Optional[Dict[str, Any]]:
+		"""Count one failure for ip at time ts (default: now); returns the alert it raised, if any."""
+		now = self.clock() if ts is None else ts
+		bucket = int(now // self.width)
+		with self._lock:
+			self.failures += 1
+			ips = self._ips
+			state = ips.get(ip)
+			if state is None:
+				state = ips[ip] = _IpWindow()
+				if len(ips) > self.max_ips:
+					ips.popitem(last=False)
+					self.evicted += 1
+			else:
+				ips.move_to_end(ip)
+			state.expire(bucket - self.buckets + 1)
+			buckets = state.buckets
+			if buckets and buckets[-1][0] >= bucket:
+				buckets[-1][1] += 1  # same bucket, or a late line counted in the newest one
+			else:
+				buckets.append([bucket, 1])
+			state.total += 1
+			count = state.total
+			level = 0 if count < self.threshold else 2 if count >= self.threshold * 3 else 1
+			if level <= state.level:
+				state.level = level  # re-armed once the count drops back under a threshold
+				return None
+			state.level = level
+			alert = {
+				"ip": ip,
+				"failed_attempts": count,
+				"severity": "critical" if level == 2 else "high",
+				"window": self.window,
+				"time": now,
+				"line": line.strip() if line is not None else None
+			}
+			self.alerts.append(alert)
+		if self.on_alert is not None:
+			self.on_alert(alert)
+		return alert
+
+	def count(self, ip: str, now: Optional[float] = None) -> int:
+		"""Failures of ip inside the window ending at now."""
+		oldest = int((self.clock() if now is None else now) // self.width) - self.buckets + 1
+		with self._lock:
+			state = self._ips.get(ip)
+			if state is None:
+				return 0
+			return sum(count for bucket, count in state.buckets if bucket >= oldest)
+
+	def active(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+		"""IPs at or above the threshold right now, shaped and ordered like SecurityAI.detectBruteForce."""
+		oldest = int((self.clock() if now is None else now) // self.width) - self.buckets + 1
+		with self._lock:
+			counts = [(ip, sum(c for b, c in state.buckets if b >= oldest)) for ip, state in self._ips.items()]
+		attempts = [
+			{
+				"ip": ip,
+				"failed_attempts": count,
+				"severity": "critical" if count >= self.threshold * 3 else "high"
+			}
+			for ip, count in counts if count >= self.threshold
+		]
+		return sorted(attempts, key=lambda x: x['failed_attempts'], reverse=True)
+
+	def prune(self, now: Optional[float] = None) -> int:
+		"""Drop IPs with no failure left in the window; returns how many were dropped."""
+		oldest = int((self.clock() if now is None else now) // self.width) - self.buckets + 1
+		with self._lock:
+			cold = []
+			for ip, state in self._ips.items():
+				if state.buckets and state.buckets[-1][0] >= oldest:
+					break  # ordered by last failure, so every later IP is still warm
+				cold.append(ip)
+			for ip in cold:
+				del self._ips[ip]
+		return len(cold)
+
+	def stats(self) -> Dict[str, Any]:
+		"""Lines, failures, tracked and evicted IPs and alerts so far."""
+		with self._lock:
+			tracked = len(self._ips)
+		return {"lines": self.lines, "failures": self.failures, "tracked_ips": tracked,
+			"evicted_ips": self.evicted, "alerts": len(self.alerts)}
+
+	def follow(self, path, interval: float = 0.5, from_end: bool = True, stop: Optional[threading.Event] = None,
+			encoding: str = "utf-8") -> None:
+		"""Feed lines appended to a file as they arrive, like `tail -F`; runs until stop is set.
+
+		A rotated (replaced) or truncated file is reopened from its start.
+		"""
+		stop = stop or threading.Event()
+		f = None
+		partial = b""
+		try:
+			while not stop.is_set():
+				if f is None:
+					try:
+						f = open(path, "rb")
+					except FileNotFoundError:
+						stop.wait(interval)
+						continue
+					if from_end:
+						f.seek(0, os.SEEK_END)
+					from_end = False  # a file appearing later, or after rotation, is read whole
+					inode = os.fstat(f.fileno()).st_ino
+				chunk = f.read(1 << 16)
+				if chunk:
+					lines = (partial + chunk).split(b"\n")
+					partial = lines.pop()
+					for line in lines:
+						self.feed(line.decode(encoding, "replace").rstrip("\r"))
+					continue
+				try:
+					st = os.stat(path)
+					rotated = st.st_ino != inode or st.st_size < f.tell()
+				except FileNotFoundError:
+					rotated = True
+				if rotated:
+					f.close()
+					f, partial = None, b""
+				else:
+					stop.wait(interval)
+		finally:
+			if f is not None:
+				f.close()
+
+	def readSocket(self, sock, stop: Optional[threading.Event] = None, encoding: str = "utf-8") -> None:
+		"""Feed newline-separated lines received on a connected socket until it closes or stop is set."""
+		partial = b""
+		while stop is None or not stop.is_set():
+			data = sock.recv(1 << 16)
+			if not data:
+				break
+			lines = (partial + data).split(b"\n")
+			partial = lines.pop()
+			for line in lines:
+				self.feed(line.decode(encoding, "replace").rstrip("\r"))
+		if partial:
+			self.feed(partial.decode(encoding, "replace").rstrip("\r"))
+
+	def pollLog(self, category: Optional[str] = None, log=None) -> int:
+		"""Feed uevlog events written since the previous poll (the first poll starts now).
+
+		Events are counted at the time they were logged. Returns the number fed.
+		"""
+		log = log or uevlog
+		if log is None:
+			raise RuntimeError("BruteForceMonitor.pollLog: uevlog is unavailable outside the stamp package")
+		if self._logseq is None:
+			self._logseq = log.seq()
+			return 0
+		events = log.since(self._logseq, category)
+		for seq, ts, name, message in events:
+			self.feed(str(message), ts)
+		if events:
+			self._logseq = events[-1][0] + 1
+		return len(events)
+
+	def watchLog(self, interval: float = 0.5, category: Optional[str] = None, stop: Optional[threading.Event] = None,
+			log=None) -> None:
+		"""pollLog() every interval seconds until stop is set."""
+		stop = stop or threading.Event()
+		self.pollLog(category, log)
+		while not stop.wait(interval):
+			self.pollLog(category, log)
+
+# Main exports
+__all__ = ["BruteForceMonitor"]
@@ -9,9 +9,14 @@ Usage:
     >>> anomalies = security.detectAnomalies(log_lines)
 """
 
+import os
 import re
-from typing import List, Dict, Any
+from enum import Enum
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
 from collections import Counter
+from .scnr import LogScanner, LogAggregate, RuleSet, BLOCK_LINES, readChunks, scanParallel
+from .mntr import BruteForceMonitor
+from ..trc import traced as _traced
 
 # Module-level constants
 DEFAULT_THREAT_THRESHOLD = 0.7
@@ -23,6 +28,28 @@ DEFAULT_SUSPICIOUS_PATTERNS = [
 	r"malware\s+detected",
 	r"suspicious\s+activity"
 ]
+DEFAULT_VULNERABILITY_PATTERNS = {
+	"sql_injection": [
+		r'execute\s*\(\s*[\'"][\w\s]*\+',
+		r'format\s*\(\s*[\'"][\w\s]*%',
+		r'select.*\s+from.*\s+where.*\s*=',
+	],
+	"hardcoded_secrets": [
+		r'(password|api[_-]?key|secret)\s*=\s*["\'][^"\']+["\']',
+		r'token\s*=\s*["\'][^"\']{20,}["\']',
+	],
+	"weak_encryption": [
+		r'md5\s*\(',
+		r'sha1\s*\(',
+		r'base64\.encode\s*\(',
+	],
+	"insecure_random": [
+		r'random\.random\s*\(',
+		r'math\.random\s*\(',
+	]
+}
+_VULNERABILITY_RULES = {vuln_type: RuleSet(patterns, re.IGNORECASE) for vuln_type, patterns in DEFAULT_VULNERABILITY_PATTERNS.items()}
+_ANY_VULNERABILITY = RuleSet([p for patterns in DEFAULT_VULNERABILITY_PATTERNS.values() for p in patterns], re.IGNORECASE)
 
 class ThreatLevel(Enum):
 	"""Security threat levels."""
@@ -45,6 +72,7 @@ class SecurityAI:
 			"low": {"info", "notice", "minor", "trivial"}
 		}
 	
+	@_traced("oaiftrs.SecurityAI.detectAnomalies")
 	def detectAnomalies(self, logs: List[str]) -> List[Dict[str, Any]]:
 		"""Detect anomalies in log data.
 		
@@ -57,23 +85,7 @@ class SecurityAI:
 		if not logs:
 			return []
 		
-		anomalies = []
-		
-		for i, log in enumerate(logs):
-			if not isinstance(log, str):
-				continue
-			
-			for pattern in self.suspicious_patterns:
-				if re.search(pattern, log, re.IGNORECASE):
-					anomalies.append({
-						"line_index": i,
-						"line": log.strip(),
-						"pattern": pattern,
-						"severity": self._classifySeverity(log)
-					})
-					break
-		
-		return anomalies
+		return self._scanner().scan(logs, patterns=False, brute_force=False).anomalies
 	
 	def classifyThreat(self, pattern: str) -> str:
 		"""Classify threat level from pattern.
@@ -126,6 +138,7 @@ class SecurityAI:
 			"data_points": len(data_points)
 		}
 	
+	@_traced("oaiftrs.SecurityAI.scanVulnerabilities")
 	def scanVulnerabilities(self, code: str) -> List[Dict[str, Any]]:
 		"""Scan code for security vulnerabilities.
 		
@@ -141,41 +154,22 @@ class SecurityAI:
 		vulnerabilities = []
 		lines = code.split('\n')
 		
-		vulnerability_patterns = {
-			"sql_injection": [
-				r'execute\s*\(\s*[\'"][\w\s]*\+',
-				r'format\s*\(\s*[\'"][\w\s]*%',
-				r'select.*\s+from.*\s+where.*\s*=',
-			],
-			"hardcoded_secrets": [
-				r'(password|api[_-]?key|secret)\s*=\s*["\'][^"\']+["\']',
-				r'token\s*=\s*["\'][^"\']{20,}["\']',
-			],
-			"weak_encryption": [
-				r'md5\s*\(',
-				r'sha1\s*\(',
-				r'base64\.encode\s*\(',
-			],
-			"insecure_random": [
-				r'random\.random\s*\(',
-				r'math\.random\s*\(',
-			]
-		}
-		
 		for i, line in enumerate(lines, 1):
-			for vuln_type, patterns in vulnerability_patterns.items():
-				for pattern in patterns:
-					if re.search(pattern, line, re.IGNORECASE):
-						vulnerabilities.append({
-							"type": vuln_type,
-							"line": i,
-							"code": line.strip(),
-							"severity": "high" if vuln_type == "hardcoded_secrets" else "medium"
-						})
-						break
+			# One combined pass rejects clean lines; hits are resolved per type in pattern order
+			if not _ANY_VULNERABILITY.test(line):
+				continue
+			for vuln_type, rules in _VULNERABILITY_RULES.items():
+				if rules.first(line) is not None:
+					vulnerabilities.append({
+						"type": vuln_type,
+						"line": i,
+						"code": line.strip(),
+						"severity": "high" if vuln_type == "hardcoded_secrets" else "medium"
+					})
 		
 		return vulnerabilities
 	
+	@_traced("oaiftrs.SecurityAI.analyzeLogPatterns")
 	def analyzeLogPatterns(self, logs: List[str]) -> Dict[str, Any]:
 		"""Analyze log patterns for security insights.
 		
@@ -188,40 +182,9 @@ class SecurityAI:
 		if not logs:
 			return {}
 		
-		# Count error types
-		error_keywords = ["error", "fail", "exception", "critical"]
-		warning_keywords = ["warning", "warn", "alert"]
-		
-		error_count = sum(1 for log in logs if any(kw in log.lower() for kw in error_keywords))
-		warning_count = sum(1 for log in logs if any(kw in log.lower() for kw in warning_keywords))
-		
-		# Extract IP addresses
-		ips = []
-		for log in logs:
-			found_ips = re.findall(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', log)
-			ips.extend(found_ips)
-		
-		ip_frequency = Counter(ips)
-		suspicious_ips = [ip for ip, count in ip_frequency.items() if count > 10]
-		
-		# Time-based analysis
-		timestamps = re.findall(r'\d{2}:\d{2}:\d{2}', ' '.join(logs))
-		hour_distribution = Counter()
-		
-		for ts in timestamps:
-			hour = ts.split(':')[0]
-			hour_distribution[hour] += 1
-		
-		return {
-			"total_logs": len(logs),
-			"error_count": error_count,
-			"warning_count": warning_count,
-			"suspicious_ips": suspicious_ips,
-			"unique_ips": len(ip_frequency),
-			"peak_hours": [h for h, c in hour_distribution.most_common(3)] if hour_distribution else [],
-			"risk_score": self._calculateLogRisk(error_count, warning_count, len(logs))
-		}
+		return self._scanner().scan(logs, anomalies=False, brute_force=False).logPatterns()
 	
+	@_traced("oaiftrs.SecurityAI.detectBruteForce")
 	def detectBruteForce(self, logs: List[str], threshold: int = 5) -> List[Dict[str, Any]]:
 		"""Detect brute force attack patterns.
 		
@@ -235,31 +198,123 @@ class SecurityAI:
 		if not logs:
 			return []
 		
-		failed_attempts = {}
-		
-		for log in logs:
-			# Extract IP and failure indicator
-			ip_match = re.search(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', log)
-			if ip_match:
-				ip = ip_match.group()
-				
-				if re.search(r'failed|denied|incorrect', log, re.IGNORECASE):
-					if ip not in failed_attempts:
-						failed_attempts[ip] = 0
-					failed_attempts[ip] += 1
-		
-		# Flag IPs exceeding threshold
-		brute_force_attempts = []
-		
-		for ip, count in failed_attempts.items():
-			if count >= threshold:
-				brute_force_attempts.append({
-					"ip": ip,
-					"failed_attempts": count,
-					"severity": "critical" if count >= threshold * 3 else "high"
-				})
-		
-		return sorted(brute_force_attempts, key=lambda x: x['failed_attempts'], reverse=True)
+		return self._scanner().scan(logs, anomalies=False, patterns=False).bruteForce(threshold)
+	
+	def bruteForceMonitor(self, threshold: int = 5, window: float = 300.0, **options) -> BruteForceMonitor:
+		"""Online detectBruteForce over a sliding time window, for live logs.
+		
+		Args:
+		    threshold: Failed attempts within the window before an alert
+		    window: Window length in seconds
+		    **options: buckets, max_ips, on_alert, clock (see BruteForceMonitor)
+		
+		Example:
+		    >>> monitor = SecurityAI().bruteForceMonitor(5, 60, on_alert=print)
+		    >>> monitor.follow("/var/log/auth.log")
+		"""
+		return BruteForceMonitor(threshold, window, **options)
+	
+	@_traced("oaiftrs.SecurityAI.analyzeAll")
+	def analyzeAll(self, logs: List[str], threshold: int = 5) -> Dict[str, Any]:
+		"""Run every log analyzer in a single pass over the lines.
+		
+		Args:
+		    logs: List of log lines
+		    threshold: Failed attempts before an IP is flagged for brute force
+		
+		Returns:
+		    Dict with "anomalies", "log_patterns" and "brute_force", shaped like
+		    detectAnomalies, analyzeLogPatterns and detectBruteForce
+		"""
+		if not logs:
+			return {"anomalies": [], "log_patterns": {}, "brute_force": []}
+		
+		return self._scanner().scan(logs).result(threshold)
+	
+	@_traced("oaiftrs.SecurityAI.analyzeStream")
+	def analyzeStream(self, source: Union[str, os.PathLike, Iterable[str]], threshold: int = 5,
+			max_anomalies: Optional[int] = None) -> Dict[str, Any]:
+		"""analyzeAll over a log file or any iterable of lines, in constant memory.
+		
+		Args:
+		    source: Path of a log file (read in large chunks) or an iterable of lines
+		    threshold: Failed attempts before an IP is flagged for brute force
+		    max_anomalies: Keep only the first N anomaly records (None keeps all)
+		
+		Returns:
+		    analyzeAll's dict plus "lines" and "anomaly_count"
+		"""
+		return self.streamAggregate(source, max_anomalies=max_anomalies).partial(threshold)
+	
+	@_traced("oaiftrs.SecurityAI.analyzeParallel")
+	def analyzeParallel(self, path: Union[str, os.PathLike], workers: Optional[int] = None, threshold: int = 5,
+			max_anomalies: Optional[int] = None) -> Dict[str, Any]:
+		"""analyzeStream for a log file, split at line boundaries across worker processes.
+		
+		Args:
+		    path: Log file path
+		    workers: Worker processes (default: one per CPU)
+		    threshold: Failed attempts before an IP is flagged for brute force
+		    max_anomalies: Keep only the first N anomaly records (None keeps all)
+		
+		Returns:
+		    Same dict as analyzeStream; "log_patterns" and "brute_force" are shaped
+		    like analyzeLogPatterns and detectBruteForce
+		
+		Example:
+		    >>> report = SecurityAI().analyzeParallel("/var/log/auth.log.1", workers=8)
+		"""
+		return scanParallel(self, path, workers, max_anomalies=max_anomalies).partial(threshold)
+	
+	def iterAnalysis(self, source: Union[str, os.PathLike, Iterable[str]], every: int = 1000000,
+			threshold: int = 5, max_anomalies: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+		"""Yield analyzeStream's result so far after about every `every` lines; the last one is final.
+		
+		Example:
+		    >>> for report in SecurityAI().iterAnalysis("/var/log/auth.log", every=500000):
+		    ...     print(report["lines"], report["brute_force"][:3])
+		"""
+		aggregate = self._scanner().aggregate(max_anomalies=max_anomalies)
+		reported = None
+		for block in self._blocks(source):
+			if isinstance(block, str):
+				aggregate.feedText(block)
+			else:
+				aggregate.feedBlock(block)
+			if aggregate.lines - (reported or 0) >= every:
+				reported = aggregate.lines
+				yield aggregate.partial(threshold)
+		if aggregate.lines != reported:
+			yield aggregate.partial(threshold)
+	
+	def streamAggregate(self, source: Union[str, os.PathLike, Iterable[str]], **options) -> LogAggregate:
+		"""Fed LogAggregate for a log file or iterable; options go to LogScanner.aggregate."""
+		aggregate = self._scanner().aggregate(**options)
+		if isinstance(source, (str, bytes, os.PathLike)):
+			return aggregate.feedFile(source)
+		return aggregate.feedAll(source)
+	
+	def _blocks(self, source):
+		"""Joined texts from a file, or lists of lines from an iterable."""
+		if isinstance(source, (str, bytes, os.PathLike)):
+			yield from readChunks(source)
+			return
+		batch = []
+		for log in source:
+			batch.append(log)
+			if len(batch) >= BLOCK_LINES:
+				yield batch
+				batch = []
+		if batch:
+			yield batch
+	
+	def _scanner(self) -> LogScanner:
+		"""Compiled scanner for the current suspicious_patterns, rebuilt when they change."""
+		key = tuple(self.suspicious_patterns)
+		if getattr(self, "_scanner_key", None) != key:
+			self._log_scanner = LogScanner(self)
+			self._scanner_key = key
+		return self._log_scanner
 	
 	def _classifySeverity(self, text: str) -> str:
 		"""Classify severity of a security event."""
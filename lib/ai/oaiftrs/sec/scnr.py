@@ -0,0 +1,485 @@
+"""
+Stamp Security Scanner Module
+
+Shared single-pass scanning engine behind SecurityAI and AdvancedSecurityAI.
+
+Usage:
+    >>> from stamp.oaiftrs.sec.scnr import LogScanner
+    >>> scanner = LogScanner(SecurityAI())
+    >>> report = scanner.scan(log_lines).result()
+    >>> report = scanner.aggregate().feedFile("/var/log/auth.log").result()
+    >>> report = scanParallel(SecurityAI(), "/var/log/auth.log", workers=8).result()
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left
+from itertools import accumulate
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional, Sequence
+
+# Module-level constants
+IP_PATTERN = re.compile(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}')
+TIME_PATTERN = re.compile(r'\d{2}:\d{2}:\d{2}')
+HOUR_PATTERN = re.compile(r'(\d{2}):\d{2}:\d{2}')
+FAILURE_PATTERN = re.compile(r'failed|denied|incorrect', re.IGNORECASE)
+ERROR_KEYWORDS = ("error", "fail", "exception", "critical")
+WARNING_KEYWORDS = ("warning", "warn", "alert")
+# Block scans run over the lowered text (offsets are unchanged when lowering keeps its length), where a
+# case-sensitive search for lowercase literals is the same test as `kw in line.lower()` and much faster
+# than IGNORECASE
+ERROR_LOWER = re.compile("|".join(ERROR_KEYWORDS))
+WARNING_LOWER = re.compile("|".join(WARNING_KEYWORDS))
+FAILURE_LOWER = re.compile(r'failed|denied|incorrect')
+BLOCK_LINES = 4096
+CHUNK_BYTES = 1 << 20
+SUSPICIOUS_IP_COUNT = 10
+BRUTE_FORCE_THRESHOLD = 5
+
+class RuleSet:
+	"""Ordered rules behind one combined alternation.
+
+	The alternation is non-capturing, so Python's re keeps its literal-prefix
+	and charset optimizations. A text it rejects is rejected by every rule,
+	making the common no-match case a single pass. On a hit the rules are
+	tried in list order, so results equal a per-rule loop.
+	"""
+
+	def __init__(self, patterns: Sequence[str], flags: int = 0, literal: bool = False):
+		"""Initialize RuleSet.
+
+		Args:
+		    patterns: Regexes, or plain substrings when literal is True (str, or bytes to scan bytes)
+		    flags: re flags applied to every rule
+		    literal: Treat patterns as substrings (escaped into the alternation)
+		"""
+		self.patterns = list(patterns)
+		self.literal = literal
+		self.rules = [re.compile(re.escape(p) if literal else p, flags) for p in self.patterns]
+		self.prefilter = self.block = self.blockLower = None
+		if self.rules:
+			binary = isinstance(self.rules[0].pattern, bytes)
+			alternation = (b"|" if binary else "|").join((b"(?:%s)" if binary else "(?:%s)") % r.pattern for r in self.rules)
+			try:
+				self.prefilter = re.compile(alternation, flags)
+			except re.error:
+				self.prefilter = None  # e.g. inline flags that must lead a pattern; fall back to the loop
+			# Over a block of lines joined by newlines, MULTILINE gives ^ and $ their per-line meaning;
+			# string anchors and lookbehinds cannot be translated, so those rule sets stay per line
+			if self.prefilter is not None and not binary and not re.search(r'\\[AZ]|\(\?<[=!]', alternation):
+				self.block = re.compile(alternation, flags | re.MULTILINE)
+				# With IGNORECASE and a pattern that never names an uppercase letter, matching the lowered
+				# text case-sensitively finds exactly the same lines
+				if flags & re.IGNORECASE and _caseNeutral(alternation):
+					self.blockLower = re.compile(alternation, (flags & ~re.IGNORECASE) | re.MULTILINE)
+
+	def test(self, text: str) -> bool:
+		"""Whether any rule is found in text."""
+		if self.prefilter is not None:
+			return self.prefilter.search(text) is not None
+		return any(rule.search(text) is not None for rule in self.rules)
+
+	def first(self, text: str) -> Optional[int]:
+		"""Index of the first rule, in list order, found anywhere in text."""
+		if self.prefilter is not None and self.prefilter.search(text) is None:
+			return None
+		if self.literal and not (self.rules and self.rules[0].flags & re.IGNORECASE):
+			for i, p in enumerate(self.patterns):
+				if text.find(p) >= 0:  # not `in`, which tests single bytes on an mmap
+					return i
+			return None
+		for i, rule in enumerate(self.rules):
+			if rule.search(text) is not None:
+				return i
+		return None
+
+	def all(self, text: str) -> List[int]:
+		"""Indexes of every rule found in text, in list order."""
+		if self.prefilter is not None and self.prefilter.search(text) is None:
+			return []
+		return [i for i, rule in enumerate(self.rules) if rule.search(text) is not None]
+
+	def __len__(self) -> int:
+		return len(self.rules)
+
+class LogAggregate:
+	"""Running state of one pass over log lines; feed() takes one line at a time."""
+
+	def __init__(self, scanner: "LogScanner", anomalies: bool = True, patterns: bool = True, brute_force: bool = True,
+			max_anomalies: Optional[int] = None):
+		"""Initialize LogAggregate.
+
+		Args:
+		    scanner: LogScanner holding the compiled rules
+		    anomalies: Collect detectAnomalies results
+		    patterns: Collect analyzeLogPatterns counters
+		    brute_force: Collect detectBruteForce failure counts
+		    max_anomalies: Keep only the first N anomalies (all are still counted),
+		        so memory stays bounded however long the stream is
+		"""
+		self.scanner = scanner
+		self.want_anomalies = anomalies
+		self.want_patterns = patterns
+		self.want_brute_force = brute_force
+		self.max_anomalies = max_anomalies
+		self.lines = 0
+		self.anomaly_count = 0
+		self.anomalies = []
+		self.error_count = 0
+		self.warning_count = 0
+		self.ips = Counter()
+		self.hours = Counter()
+		self.failures = {}
+
+	def feed(self, log: str) -> None:
+		"""Account for one log line."""
+		index = self.lines
+		self.lines += 1
+		if not isinstance(log, str):
+			if self.want_patterns or self.want_brute_force:
+				raise TypeError(f"log lines must be str, not {type(log).__name__}")
+			return
+		scanner = self.scanner
+		if self.want_anomalies:
+			hit = scanner.suspicious.first(log)
+			if hit is not None:
+				self._anomaly(index, log, hit)
+		if self.want_patterns:
+			lower = log.lower()
+			if any(kw in lower for kw in ERROR_KEYWORDS):
+				self.error_count += 1
+			if any(kw in lower for kw in WARNING_KEYWORDS):
+				self.warning_count += 1
+			found = IP_PATTERN.findall(log)
+			if found:
+				self.ips.update(found)
+			for ts in TIME_PATTERN.findall(log):
+				self.hours[ts[:2]] += 1
+			first_ip = found[0] if found else None
+		elif self.want_brute_force:
+			m = IP_PATTERN.search(log)
+			first_ip = m.group() if m else None
+		if self.want_brute_force and first_ip is not None and FAILURE_PATTERN.search(log):
+			self.failures[first_ip] = self.failures.get(first_ip, 0) + 1
+
+	def feedAll(self, logs: Iterable[str], block: int = BLOCK_LINES) -> "LogAggregate":
+		"""Feed every line of an iterable, a block of lines at a time; returns self."""
+		if isinstance(logs, (list, tuple)):
+			for i in range(0, len(logs), block):
+				self.feedBlock(logs[i:i + block])
+			return self
+		batch = []
+		for log in logs:
+			batch.append(log)
+			if len(batch) >= block:
+				self.feedBlock(batch)
+				batch = []
+		if batch:
+			self.feedBlock(batch)
+		return self
+
+	def feedText(self, text: str) -> None:
+		"""Account for the lines of a newline-separated text (no trailing newline)."""
+		self._scanBlock(text.split("\n"), text)
+
+	def feedFile(self, path, start: int = 0, end: Optional[int] = None, encoding: str = "utf-8",
+			errors: str = "replace", chunk: int = CHUNK_BYTES) -> "LogAggregate":
+		"""Feed the lines of a log file in large reads; returns self.
+
+		Only one chunk is held at a time, so memory does not grow with the file.
+		start/end select the lines that begin inside that byte range (see readChunks).
+		"""
+		for text in readChunks(path, start, end, encoding, errors, chunk):
+			self.feedText(text)
+		return self
+
+	def feedBlock(self, logs: Sequence[str]) -> None:
+		"""Account for consecutive lines, equivalent to feed() on each of them.
+
+		The lines are joined once and every regex runs over the whole block;
+		Python-level work is only done for the lines a regex hits.
+		"""
+		try:
+			text = "\n".join(logs)
+		except TypeError:
+			text = None
+		self._scanBlock(logs, text)
+
+	def _scanBlock(self, logs: Sequence[str], text: Optional[str]) -> None:
+		"""feedBlock on lines already joined into text."""
+		low = None if text is None else text.lower()
+		if low is None or len(low) != len(text):
+			for log in logs:
+				self.feed(log)
+			return
+		# Outside ASCII, IGNORECASE also folds characters lower() keeps (e.g. U+017F to s),
+		# so case-insensitive rules must then run over the original text
+		ascii = text.isascii()
+		base = self.lines
+		self.lines += len(logs)
+		# ends[i] is the offset of the separator after line i
+		ends = [n + i for i, n in enumerate(accumulate(map(len, logs)))]
+		scanner = self.scanner
+		if self.want_anomalies:
+			rules = scanner.suspicious
+			if ascii and rules.blockLower is not None:
+				candidates = _hitLines(rules.blockLower, low, ends)
+			elif rules.block is not None:
+				candidates = _hitLines(rules.block, text, ends)
+			else:
+				candidates = range(len(logs))
+			for i in candidates:
+				log = logs[i]
+				hit = rules.first(log)
+				if hit is not None:
+					self._anomaly(base + i, log, hit)
+		if self.want_patterns:
+			self.error_count += sum(1 for _ in _hitLines(ERROR_LOWER, low, ends))
+			self.warning_count += sum(1 for _ in _hitLines(WARNING_LOWER, low, ends))
+			self.ips.update(IP_PATTERN.findall(text))
+			self.hours.update(HOUR_PATTERN.findall(text))
+		if self.want_brute_force:
+			failures = self.failures
+			if ascii:
+				hits = _hitLines(FAILURE_LOWER, low, ends)
+			else:
+				hits = _hitLines(FAILURE_PATTERN, text, ends)
+			for i in hits:
+				m = IP_PATTERN.search(logs[i])
+				if m is not None:
+					ip = m.group()
+					failures[ip] = failures.get(ip, 0) + 1
+
+	def _anomaly(self, index: int, log: str, hit: int) -> None:
+		self.anomaly_count += 1
+		if self.max_anomalies is None or len(self.anomalies) < self.max_anomalies:
+			self.anomalies.append({
+				"line_index": index,
+				"line": log.strip(),
+				"pattern": self.scanner.suspicious.patterns[hit],
+				"severity": self.scanner.severity(log)
+			})
+
+	def merge(self, other: "LogAggregate") -> "LogAggregate":
+		"""Append the counts of an aggregate over the lines that follow ours; returns self.
+
+		Line indexes of the other aggregate's anomalies are shifted by our line count,
+		so merging shard aggregates in file order gives the single-pass result.
+		"""
+		offset = self.lines
+		for anomaly in other.anomalies:
+			if self.max_anomalies is not None and len(self.anomalies) >= self.max_anomalies:
+				break
+			self.anomalies.append(dict(anomaly, line_index=anomaly["line_index"] + offset))
+		self.anomaly_count += other.anomaly_count
+		self.lines += other.lines
+		self.error_count += other.error_count
+		self.warning_count += other.warning_count
+		self.ips.update(other.ips)
+		self.hours.update(other.hours)
+		failures = self.failures
+		for ip, count in other.failures.items():
+			failures[ip] = failures.get(ip, 0) + count
+		return self
+
+	def partial(self, threshold: int = BRUTE_FORCE_THRESHOLD) -> Dict[str, Any]:
+		"""result() so far, plus the lines and anomalies seen; feeding can continue afterwards."""
+		out = self.result(threshold)
+		out["lines"] = self.lines
+		if self.want_anomalies:
+			out["anomaly_count"] = self.anomaly_count
+		return out
+
+	def logPatterns(self) -> Dict[str, Any]:
+		"""Result in the shape of SecurityAI.analyzeLogPatterns."""
+		if not self.lines:
+			return {}
+		return {
+			"total_logs": self.lines,
+			"error_count": self.error_count,
+			"warning_count": self.warning_count,
+			"suspicious_ips": [ip for ip, count in self.ips.items() if count > SUSPICIOUS_IP_COUNT],
+			"unique_ips": len(self.ips),
+			"peak_hours": [h for h, c in self.hours.most_common(3)] if self.hours else [],
+			"risk_score": self.scanner.risk(self.error_count, self.warning_count, self.lines)
+		}
+
+	def bruteForce(self, threshold: int = BRUTE_FORCE_THRESHOLD) -> List[Dict[str, Any]]:
+		"""Result in the shape of SecurityAI.detectBruteForce."""
+		attempts = [
+			{
+				"ip": ip,
+				"failed_attempts": count,
+				"severity": "critical" if count >= threshold * 3 else "high"
+			}
+			for ip, count in self.failures.items() if count >= threshold
+		]
+		return sorted(attempts, key=lambda x: x['failed_attempts'], reverse=True)
+
+	def result(self, threshold: int = BRUTE_FORCE_THRESHOLD) -> Dict[str, Any]:
+		"""All collected analyses, keyed like SecurityAI.analyzeAll."""
+		out = {}
+		if self.want_anomalies:
+			out["anomalies"] = list(self.anomalies)
+		if self.want_patterns:
+			out["log_patterns"] = self.logPatterns()
+		if self.want_brute_force:
+			out["brute_force"] = self.bruteForce(threshold)
+		return out
+
+def readChunks(path, start: int = 0, end: Optional[int] = None, encoding: str = "utf-8",
+		errors: str = "replace", chunk: int = CHUNK_BYTES) -> Iterable[str]:
+	"""Decoded runs of whole lines from a file, about chunk bytes each, without their final newline.
+
+	Yields the lines that begin at a byte offset in [start, end): a line straddling
+	start belongs to the previous range, one straddling end to this one, so ranges
+	that tile the file see every line exactly once. CRLF endings are read as LF.
+	"""
+	with open(path, "rb") as f:
+		size = os.fstat(f.fileno()).st_size
+		end = size if end is None else min(end, size)
+		pos = start
+		if start > 0:
+			# Skip the tail of the line that began before start
+			f.seek(start - 1)
+			if f.read(1) != b"\n":
+				pos += len(f.readline())
+		f.seek(pos)
+		rest = b""
+		while pos < end:
+			data = f.read(min(chunk, end - pos))
+			if not data:
+				break
+			pos += len(data)
+			if pos >= end and not data.endswith(b"\n"):
+				data += f.readline()  # finish the last line that began inside the range
+			cut = data.rfind(b"\n")
+			if cut < 0:
+				rest += data
+				continue
+			yield _decode(rest + data[:cut], encoding, errors)
+			rest = data[cut + 1:]
+		if rest:
+			yield _decode(rest, encoding, errors)
+
+def _decode(block: bytes, encoding: str, errors: str) -> str:
+	text = block.decode(encoding, errors)
+	if "\r" in text:
+		text = text.replace("\r\n", "\n")
+		if text.endswith("\r"):
+			text = text[:-1]
+	return text
+
+def shardRanges(path, shards: int) -> List[tuple]:
+	"""[start, end) byte ranges tiling a file in about equal parts; readChunks aligns them to lines."""
+	size = os.path.getsize(path)
+	shards = max(1, min(int(shards), size or 1))
+	cuts = [size * i // shards for i in range(shards + 1)]
+	return [(cuts[i], cuts[i + 1]) for i in range(shards) if cuts[i] < cuts[i + 1]]
+
+def scanParallel(security, path, workers: Optional[int] = None, shards: Optional[int] = None,
+		max_anomalies: Optional[int] = None, **analyses) -> "LogAggregate":
+	"""LogAggregate for a whole log file, scanned as byte-range shards in worker processes.
+
+	Each shard is analyzed independently and the partial aggregates are merged
+	in file order, so the result equals a single pass (including anomaly line
+	indexes). Shards default to four per worker so a slow shard does not leave
+	the other processes idle.
+
+	Args:
+	    security: SecurityAI instance (pickled to every worker)
+	    path: Log file path
+	    workers: Worker processes (default os.cpu_count()); 1 scans in this process
+	    shards: Byte ranges to split the file into
+	    max_anomalies: Keep only the first N anomaly records
+	    **analyses: anomalies/patterns/brute_force switches for LogAggregate
+	"""
+	workers = workers or os.cpu_count() or 1
+	ranges = shardRanges(path, shards or workers * 4)
+	tasks = [(security, os.fspath(path), start, end, max_anomalies, analyses) for start, end in ranges]
+	merged = LogScanner(security).aggregate(max_anomalies=max_anomalies, **analyses)
+	if workers == 1:
+		for part in map(_scanShard, tasks):
+			merged.merge(part)
+		return merged
+	with ProcessPoolExecutor(max_workers=min(workers, len(tasks) or 1)) as pool:
+		for part in pool.map(_scanShard, tasks):
+			merged.merge(part)
+	return merged
+
+def _scanShard(task) -> "LogAggregate":
+	"""Worker: aggregate of one byte range, detached from its scanner for the trip back."""
+	security, path, start, end, max_anomalies, analyses = task
+	aggregate = LogScanner(security).aggregate(max_anomalies=max_anomalies, **analyses)
+	aggregate.feedFile(path, start, end)
+	aggregate.scanner = None
+	return aggregate
+
+def _hitLines(pattern: "re.Pattern", text: str, ends: List[int]) -> Iterable[int]:
+	"""Ascending indexes of the lines of a joined block in which pattern has a match starting."""
+	pos = 0
+	search = pattern.search
+	while True:
+		m = search(text, pos)
+		if m is None:
+			return
+		i = bisect_left(ends, m.start())
+		yield i
+		if i + 1 >= len(ends):
+			return
+		pos = ends[i] + 1
+
+def _caseNeutral(pattern: str) -> bool:
+	"""Whether pattern can only refer to uppercase letters through IGNORECASE.
+
+	Rejects uppercase literals, character-code escapes (\\x41, \\101, \\N{...})
+	and ranges such as [;-^] that span A-Z without its lowercase twins.
+	"""
+	bare = re.sub(r'\\[\\SWDB]', '', pattern)  # \S, \W, \D, \B are case-neutral classes
+	if re.search(r'[A-Z]|\\[xuUN]|\\0|\\[1-7][0-7]{2}', bare):
+		return False
+	for low, high in re.findall(r'(.)-(.)', bare):
+		if any(chr(c).isupper() and not low <= chr(c).lower() <= high for c in range(ord(low), ord(high) + 1)):
+			return False
+	return True
+
+class LogScanner:
+	"""Compiled rules for the SecurityAI log analyzers, shared by a single pass."""
+
+	def __init__(self, security=None, suspicious_patterns: Optional[Sequence[str]] = None):
+		"""Initialize LogScanner.
+
+		Args:
+		    security: SecurityAI instance supplying patterns, severity and risk scoring
+		    suspicious_patterns: Overrides security.suspicious_patterns
+		"""
+		self.security = security
+		if suspicious_patterns is None:
+			suspicious_patterns = security.suspicious_patterns if security is not None else ()
+		self.suspicious = RuleSet(suspicious_patterns, re.IGNORECASE)
+
+	def severity(self, text: str) -> str:
+		"""Severity of an anomalous line (SecurityAI._classifySeverity)."""
+		if self.security is None:
+			return "info"
+		return self.security._classifySeverity(text)
+
+	def risk(self, error_count: int, warning_count: int, total_logs: int) -> float:
+		"""Risk score from log statistics (SecurityAI._calculateLogRisk)."""
+		if self.security is not None:
+			return self.security._calculateLogRisk(error_count, warning_count, total_logs)
+		if total_logs == 0:
+			return 0.0
+		return (error_count / total_logs * 0.7 + warning_count / total_logs * 0.3) * 10
+
+	def aggregate(self, **options) -> LogAggregate:
+		"""Empty aggregate; options select anomalies/patterns/brute_force (all by default) and max_anomalies."""
+		return LogAggregate(self, **options)
+
+	def scan(self, logs: Iterable[str], **analyses) -> LogAggregate:
+		"""One pass over logs feeding every selected analysis."""
+		return self.aggregate(**analyses).feedAll(logs)
+
+# Main exports
+__all__ = ["RuleSet", "LogScanner", "LogAggregate", "readChunks", "shardRanges", "scanParallel"]
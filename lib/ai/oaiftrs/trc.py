@@ -0,0 +1,15 @@
+"""
+Stamp oaiftrs tracing hook
+
+traced(name) decorates a method with stamp's utrace.span when the library
+is loaded as part of the stamp package. Imported on its own (e.g. as
+lib.ai.oaiftrs...) there is no tracer, and traced(name) returns the
+function unchanged.
+"""
+
+try:
+	from ...._trace import utrace
+	traced = utrace.span
+except ImportError:
+	def traced(name):
+		return lambda func: func
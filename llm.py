@@ -45,6 +45,8 @@ try:
 except ImportError:
     tiktoken = None
 
+from ._chunker import chunker
+from ._trace import utrace
 from rich import print as rp
 from rich.panel import Panel
 from rich.console import Console
@@ -287,6 +289,7 @@ class GPT2Generator:
         while len(self.cache) > self.cache_size:
             self.cache.popitem(last=False)
     
+    @utrace.span("llm.GPT2Generator._make_request")
     def _make_request(self, prompt, **kwargs):
         """Make a request to Ollama API."""
         if not requests:
@@ -313,6 +316,7 @@ class GPT2Generator:
         else:
             raise RuntimeError(f"Ollama API error: {response.status_code}")
     
+    @utrace.span("llm.GPT2Generator.generate")
     def generate(self, prompt, temperature=None, num_predict=None, show_progress=True, use_cache=True):
         """Generate text from prompt."""
         kwargs = {}
@@ -797,6 +801,15 @@ class FileProcessor:
     def summarize_file(self, filepath: str) -> str:
         """Summarize a file."""
         return self.process_text(filepath, "Summarize this file:")
+    
+    def process_chunks(self, filepath: str, prompt: str = "Summarize this text:", size: int = 2000,
+                       mode: str = "tokens", overlap: int = 200):
+        """Process a large file chunk by chunk, yielding (chunk, result) pairs.
+        
+        The file is memory-mapped and split by stamp._chunker, so only the current chunk is decoded.
+        """
+        for piece in chunker.file(filepath, size=size, mode=mode, overlap=overlap):
+            yield piece, self.generator.generate(f"{prompt}\n\n{piece.text()}", show_progress=False)
 
 # ============================================================================
 # FEATURE 8: WEB SCRAPING
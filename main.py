@@ -38,9 +38,19 @@ Stamp is version {STAMP_VERSION_STRING}
 #BUG!s reflist
 #None
 from .__fetch__ import Fetch
+from ._kvdb import kvengine
+from ._cmap import cmap
+from ._hist import histring
+from ._jconf import jsonconfig
+from ._slotmap import slotmap
+from ._chunker import chunker
+from ._xfer import transferjob
+from ._logsink import logsink
+from ._trace import utrace
 import sys
 import ast
 import base64
+import functools
 import shutil
 import random
 import datetime
@@ -551,86 +561,87 @@ class superobj():
             except Exception:
                 pass
 class __jsonconf__:
+    configs = {}  #abspath -> jsonconfig, so repeated lookups hit the parsed cache
     @staticmethod
-    def jsonconf(filepath=None, data=None, key=None, default=None):
+    def open(filepath=None, watch=False):
         if filepath is None or not isinstance(filepath, str) or not filepath.lower().endswith(".conf.json"):
             raise ValueError("File must use the '.conf.json' format and a valid filepath.")
+        path = os.path.abspath(filepath)
+        conf = __jsonconf__.configs.get(path)
+        if conf is None or (watch and not conf.watching):
+            if conf is not None:
+                conf.close()
+            conf = __jsonconf__.configs[path] = jsonconfig(path, watch=watch)
+        return conf
+    @staticmethod
+    @utrace.span("main.__jsonconf__.jsonconf")
+    def jsonconf(filepath=None, data=None, key=None, default=None):
+        conf = __jsonconf__.open(filepath)
         if data is not None and isinstance(data, dict):
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
+            conf.replace(data)
             return
-        _D = {}
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    _D = json.load(f)
-            except json.JSONDecodeError:
-                _D = {}
-        data = _D
         if key is not None and isinstance(key, str):
-            return data.get(key, default)
-        rp(data)
+            #an exact top-level key wins, otherwise key is read as a dotted path ("server.port")
+            return conf.get([key] if [key] in conf else key, default)
+        rp(conf.document())
     mlock = []
+    #kept for compatibility; the memory server lives in __msrv__
     @staticmethod
     def addMem(mem):
-        mem = mem
-        __msrv__.mlock.append(str(mem))
+        return __msrv__.addMem(mem)
     @staticmethod
     def delMem(index):
-        index = index
-        identifier = identifier
-        identifier = index
-        identifier = identifier
-        if isinstance(identifier, int) and 0 <= identifier < len(__msrv__.mlock):
-            del __msrv__.mlock[identifier]
-            rp(f"memsrv: msrv: success deleting index {identifier}")
-        else:
-            try:
-                __msrv__.mlock.remove(str(identifier))
-                rp(f"memsrv: msrv: success deleting item by value: {identifier}")
-            except ValueError:
-                rp(f"memsrv: msrv: error: Item '{identifier}' not found. .stderr")
+        return __msrv__.delMem(index)
     @staticmethod
     def resetMem():
-        __msrv__.mlock = []
+        __msrv__.resetMem()
     @staticmethod
     def srv():
-        if not __msrv__.mlock:
-            rp("memsrv: msrv: server mlock empty.")
-            return
-        for index, item in enumerate(__msrv__.mlock):
-            rp(f"[{index}]/{item}")#idx/itmname
+        __msrv__.srv()
 class __msrv__:
-    mlock = []
+    mlock = slotmap()  #handle -> item; handles stay valid until that item is deleted
     @staticmethod
     def addMem(mem):
-        mem = mem
-        __msrv__.mlock.append(str(mem))
+        return __msrv__.mlock.add(str(mem))
     @staticmethod
-    def delMem(index):
-        index = index
-        identifier = identifier
-        identifier = index
-        identifier = identifier
-        if isinstance(identifier, int) and 0 <= identifier < len(__msrv__.mlock):
-            del __msrv__.mlock[identifier]
+    def getMem(handle):
+        return __msrv__.mlock.get(handle)
+    @staticmethod
+    def findMem(mem):
+        return __msrv__.mlock.find(str(mem))
+    @staticmethod
+    def delMem(identifier):
+        if isinstance(identifier, int) and __msrv__.mlock.delete(identifier):
             rp(f"memsrv: msrv: success deleting index {identifier}")
-        else:
-            try:
-                __msrv__.mlock.remove(str(identifier))
-                rp(f"memsrv: msrv: success deleting item by value: {identifier}")
-            except ValueError:
-                rp(f"memsrv: msrv: error: Item '{identifier}' not found. .stderr")
+            return True
+        try:
+            __msrv__.mlock.remove(str(identifier))
+            rp(f"memsrv: msrv: success deleting item by value: {identifier}")
+            return True
+        except ValueError:
+            rp(f"memsrv: msrv: error: Item '{identifier}' not found. .stderr")
+            return False
     @staticmethod
     def resetMem():
-        __msrv__.mlock = []
+        __msrv__.mlock.clear()
+    @staticmethod
+    def items():
+        return __msrv__.mlock.items()
+    @staticmethod
+    def export(file=str):
+        #one "[handle]/item" line per entry, written in one pass
+        items = __msrv__.mlock.items()
+        tmp = f"{file}.tmp"
+        with open(tmp, "w", encoding="utf-8", buffering=1 << 16) as f:
+            f.writelines(f"[{handle}]/{item}\n" for handle, item in items)
+        os.replace(tmp, file)
+        return len(items)
     @staticmethod
     def srv():
         if not __msrv__.mlock:
             rp("memsrv: msrv: server mlock empty.")
             return
-        for index, item in enumerate(__msrv__.mlock):
-            rp(f"[{index}]/{item}")#idx/itmname
+        rp("\n".join(f"[{handle}]/{item}" for handle, item in __msrv__.mlock.items()))#idx/itmname
 class TimestampError(Exception): pass
 class Tara:
     def tara(year=2025, month=1, day=1, hour=0):
@@ -638,50 +649,113 @@ class Tara:
     def rtara(year=2025, month=1, day=1, hour=1):
         _RT = join3.join3(month, year, edit.join(day, hour))
 class _history:
-    history = []
+    history = histring(100000)  #ring buffer: the oldest entries drop off once it is full
+    def open(path=str, capacity=None):
+        #persist to an append-only file; the newest `capacity` entries are reloaded from it
+        _history.history.close()
+        _history.history = histring(capacity or _history.history.capacity, path=str(path))
+    def close():
+        _history.history.close()
     def add(cmd=str):
-        _history.history += [str(cmd)]
-    def show():
-        if not _history.history:
+        _history.history.append(str(cmd))
+    def show(limit=None):
+        if not len(_history.history):
             rp("history: empty")
             return
-        for i, item in enumerate(_history.history):
-            rp(f"[{i}] {item}")
+        n = len(_history.history)
+        items = _history.history.tail(limit) if limit is not None else list(_history.history)
+        rp("\n".join(f"[{i}] {item}" for i, item in enumerate(items, n - len(items))))
     def get(index=int):
         if 0 <= index < len(_history.history):
             return _history.history[index]
         rp(f"history: invalid index {index}")
+    def search(query=str, limit=None, prefix=False):
+        #newest first, as (index, cmd) pairs
+        return _history.history.search(query, limit, prefix)
     def export(file=str, end="\n", endOnNewline=True):
-        if not _history.history:
+        if not len(_history.history):
             rp("history: nothing to export")
             return
-        _export._export(data="\n".join(_history.history), file=file, end=end, endOnNewline=endOnNewline)
+        try:
+            with open(file, "x", encoding="utf-8", buffering=1 << 16) as f:
+                items = iter(_history.history)
+                f.write(next(items))
+                f.writelines("\n" + item for item in items)
+                f.write(f"\n{end}" if endOnNewline == True else end)
+        except IsADirectoryError:
+            raise IsADirectoryError("_export: isdir")
+        except OSError:
+            adverr.e9()
+            return
         rp(f"history: exported {len(_history.history)} items to {file}")
 class _kvstore:
-    store = {}
-    def set(key=str, value=str):
-        _kvstore.store[str(key)] = str(value)
-        rp(f"kvstore: set {key}={value}")
+    engine = kvengine()
+    store = engine.data
+    verbose = False  #echo set/delete/get-miss/export through rich
+    def open(path=None, fsync="batch", **options):
+        #path=None keeps the store in memory; maxsize/maxbytes/policy/tick turn it into a bounded cache
+        _kvstore.engine.close()
+        _kvstore.engine = kvengine(None if path is None else str(path), fsync=fsync, **options)
+        _kvstore.store = _kvstore.engine.data
+    def close():
+        _kvstore.engine.close()
+        _kvstore.engine = kvengine()
+        _kvstore.store = _kvstore.engine.data
+    def set(key=str, value=str, ttl=None):
+        _kvstore.engine.set(str(key), str(value), ttl)
+        if _kvstore.verbose:
+            rp(f"kvstore: set {key}={value}" + (f" (ttl {ttl}s)" if ttl is not None else ""))
     def get(key=str):
-        if key in _kvstore.store:
-            return _kvstore.store[key]
-        rp(f"kvstore: {key} not found")
-    def delete(key=str):
-        if key in _kvstore.store:
-            del _kvstore.store[key]
-            rp(f"kvstore: deleted {key}")
-        else:
+        value = _kvstore.engine.get(key)
+        if value is None and _kvstore.verbose:
             rp(f"kvstore: {key} not found")
+        return value
+    def delete(key=str):
+        found = _kvstore.engine.delete(key)
+        if _kvstore.verbose:
+            rp(f"kvstore: deleted {key}" if found else f"kvstore: {key} not found")
+        return found
+    def get_or_set(key=str, value=str):
+        return _kvstore.engine.get_or_set(str(key), str(value))
+    def compare_and_set(key=str, expected=None, value=str):
+        return _kvstore.engine.compare_and_set(str(key), None if expected is None else str(expected), str(value))
+    def incr(key=str, delta=1):
+        _kvstore.engine.get_or_set(str(key), "0")
+        return _kvstore.engine.incr(str(key), int(delta))
+    def mget(keys=list):
+        return _kvstore.engine.mget([str(k) for k in keys])
+    def mset(mapping=dict, ttl=None):
+        _kvstore.engine.mset({str(k): str(v) for k, v in dict(mapping).items()}, ttl)
+    def ttl(key=str):
+        return _kvstore.engine.ttl(str(key))
+    def stats():
+        return _kvstore.engine.stats()
+    def memoize(ttl=None):
+        #results are kept as objects; the engine is looked up per call, so a later _kvstore.open() applies
+        def decorate(func):
+            key = kvengine.memokey(func)
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return _kvstore.engine.cached(key(args, kwargs), lambda: func(*args, **kwargs), ttl)
+            return wrapper
+        return decorate
     def list():
         if not _kvstore.store:
             rp("kvstore: empty")
             return
-        for k, v in _kvstore.store.items():
+        for k, v in _kvstore.engine.items():
             rp(f"{k}: {v}")
     def export(file=str, end="\n", endOnNewline=True):
-        lines = [f"{k}={v}" for k, v in _kvstore.store.items()]
-        _export._export(data="\n".join(lines), file=file, end=end, endOnNewline=endOnNewline)
-        rp(f"kvstore: exported {len(lines)} items to {file}")
+        items = _kvstore.engine.items()
+        tmp = f"{file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{k}={v}\n" for k, v in items[:-1])
+            if items:
+                f.write(f"{items[-1][0]}={items[-1][1]}")
+            f.write(f"\n{end}" if endOnNewline == True else end)
+        os.replace(tmp, file)
+        if _kvstore.verbose:
+            rp(f"kvstore: exported {len(items)} items to {file}")
 class _transfer:
     def _transfer(item, source, target):
         if item in source:
@@ -708,20 +782,22 @@ class _ttransfer:
         newname = os.path.join(dirname, name + suffix + ext)
         shutil.copy(file, newname)
         rp(f"duplicated {file} -> {newname}")
+    def bulk(sources, dest, workers=8, verify=None, journal=None, progress=True, **options):
+        #copies a path, glob or list of them into dest with a thread pool; rerun with the same journal to resume
+        return transferjob(sources, dest, workers=workers, verify=verify, journal=journal, progress=progress, **options).run()
+    def bulk_mv(sources, dest, workers=8, verify=None, journal=None, progress=True, **options):
+        return transferjob(sources, dest, move=True, workers=workers, verify=verify, journal=journal, progress=progress, **options).run()
 class _chunk:
-    def chunk(text=str, chunksize=int):
+    def chunks(source, size=4096, mode="fixed", overlap=0, encoding="cl100k_base"):
+        #non-interactive: yields offset spans (see stamp._chunker) over text, bytes, mmap, open binary files or paths
+        return chunker.chunks(source, size=size, mode=mode, overlap=overlap, encoding=encoding)
+    def chunk(text=str, chunksize=int, interactive=True):
         text = str(text)
         chunksize = int(chunksize)
-        total_len = len(text)
-        total_chunks = (total_len + chunksize - 1) // chunksize
-        start = 0
-        current_chunk = 1
-        while start < total_len:
-            end = start + chunksize
-            rp(f"[{current_chunk}/{total_chunks}]\n {text[start:end]}")
-            start += chunksize
-            current_chunk += 1
-            if start < total_len:
+        total_chunks = (len(text) + chunksize - 1) // chunksize
+        for piece in chunker.chunks(text, chunksize):
+            rp(f"[{piece.index + 1}/{total_chunks}]\n {piece.text()}")
+            if interactive and piece.end < len(text):
                 f = input("-- More? --")
                 if f != "":
                     break
@@ -1630,15 +1706,23 @@ class __isin__:
             return False
 class __log__:
     def log(text=str, file=str, end=str):
+        #appends through the shared buffered sink for file (see stamp._logsink); call __log__.flush() before reading it back
         try:
-            with open(f"{file}", "x") as f:
-                f.write(f"{text}" + f"{end}")
+            logsink.shared(f"{file}").write(f"{text}" + f"{end}")
         except IsADirectoryError:
             raise IsADirectoryError("log: isdir")
         except OSError:
             adverr.e9()
         except KeyboardInterrupt:
             raise KeyboardInterrupt(f"{Unite.unite(O1="log", O2="logwriter")}: KeyboardInterrupt[LogwriteCorruption]")
+    def flush(file=None):
+        if file is None:
+            logsink.flushall()
+        else:
+            logsink.shared(f"{file}").flush()
+    def configure(file, **options):
+        #maxqueue, flushbytes, interval, maxbytes, rotate (seconds), backups; replaces the file's current sink
+        return logsink.configure(f"{file}", **options)
 class Royal:
     def _royal(w=int, x=int, y=int, z=str):
         e = math.e
@@ -1748,18 +1832,27 @@ class _seed:
         random.shuffle(seq)
         return seq
 class _dynvar:
-    dynstore = {}
+    dynstore = cmap()
     def _set(name=str, value=str):
-        _dynvar.dynstore[str(name)] = value
+        _dynvar.dynstore.set(str(name), value)
     def _get(name=str):
         return _dynvar.dynstore.get(str(name))
     def _del(name=str):
-        if str(name) in _dynvar.dynstore:
-            del _dynvar.dynstore[str(name)]
+        _dynvar.dynstore.delete(str(name))
     def _list():
-        return list(_dynvar.dynstore.keys())
+        return _dynvar.dynstore.keys()
     def _reset():
-        _dynvar.dynstore = {}
+        _dynvar.dynstore.clear()
+    def _get_or_set(name=str, value=None):
+        return _dynvar.dynstore.get_or_set(str(name), value)
+    def _cas(name=str, expected=None, value=None):
+        return _dynvar.dynstore.compare_and_set(str(name), expected, value)
+    def _incr(name=str, delta=1):
+        return _dynvar.dynstore.incr(str(name), delta)
+    def _mget(names=list):
+        return _dynvar.dynstore.mget([str(n) for n in names])
+    def _mset(mapping=dict):
+        _dynvar.dynstore.mset({str(k): v for k, v in dict(mapping).items()})
 class _link:
     def _link(Path1=str, Path2=str):
         with open(Path2, "a") as f:
@@ -1,17 +1,30 @@
 #server.py
-from .main import edit
+from .main import edit, _kvstore
+from ._trace import utrace
 import socket
 import threading
 import asyncio
 import websockets
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 import datetime
-__all__ = ["run_server", "run_ws", "run_http"]
+import time
+import ssl
+import subprocess
+import bisect
+import os
+import gzip
+import mimetypes
+import collections
+import contextlib
+import json
+import urllib.parse
+__all__ = ["run_server", "run_ws", "run_http", "run_all"]
 class _packet:
     @staticmethod
     def encode(text):
-        s = str(text)
-        return f"{len(s)}|{s}".encode()
+        b = str(text).encode()
+        return f"{len(b)}|".encode() + b
     @staticmethod
     def decode(raw):
         if isinstance(raw, bytes):
@@ -20,114 +33,732 @@ class _packet:
             return None
         l, data = raw.split("|", 1)
         return data
-class _router:
+    @staticmethod
+    async def aread(reader):
+        head = await reader.readuntil(b"|")
+        return await reader.readexactly(int(head[:-1]))
+    @staticmethod
+    def split(buf):
+        #complete payloads in buf, plus the unconsumed tail
+        out = []
+        pos = 0
+        while True:
+            bar = buf.find(b"|", pos)
+            if bar < 0:
+                break
+            end = bar + 1 + int(buf[pos:bar])
+            if end > len(buf):
+                break
+            out.append(buf[bar + 1:end])
+            pos = end
+        return out, buf[pos:]
+class _metrics:
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
     def __init__(self):
+        self.lock = threading.Lock()
+        self.conns = collections.Counter()     #open connections per protocol
+        self.accepted = collections.Counter()  #accepted connections per protocol
+        self.bytesin = collections.Counter()
+        self.bytesout = collections.Counter()
+        self.routes = {}                       #route -> [bucket counts..., +Inf count, sum]
+    def connect(self, proto):
+        with self.lock:
+            self.conns[proto] += 1
+            self.accepted[proto] += 1
+    def disconnect(self, proto):
+        with self.lock:
+            self.conns[proto] -= 1
+    def io(self, proto, nin=0, nout=0):
+        with self.lock:
+            self.bytesin[proto] += nin
+            self.bytesout[proto] += nout
+    def observe(self, route, seconds):
+        i = bisect.bisect_left(self.BUCKETS, seconds)
+        with self.lock:
+            h = self.routes.get(route)
+            if h is None:
+                h = self.routes[route] = [0] * (len(self.BUCKETS) + 1) + [0.0]
+            h[i] += 1
+            h[-1] += seconds
+    def render(self):
+        out = []
+        with self.lock:
+            for name, kind, counter in (
+                ("stamp_connections", "gauge", self.conns),
+                ("stamp_connections_total", "counter", self.accepted),
+                ("stamp_bytes_in_total", "counter", self.bytesin),
+                ("stamp_bytes_out_total", "counter", self.bytesout),
+            ):
+                out.append(f"# TYPE {name} {kind}")
+                out.extend(f'{name}{{proto="{p}"}} {v}' for p, v in sorted(counter.items()))
+            out.append("# TYPE stamp_route_seconds histogram")
+            for route, h in sorted(self.routes.items()):
+                total = 0
+                for le, n in zip(self.BUCKETS + ("+Inf",), h[:-1]):
+                    total += n
+                    out.append(f'stamp_route_seconds_bucket{{route="{route}",le="{le}"}} {total}')
+                out.append(f'stamp_route_seconds_sum{{route="{route}"}} {h[-1]:.6f}')
+                out.append(f'stamp_route_seconds_count{{route="{route}"}} {total}')
+        return "\n".join(out) + "\n"
+class _router:
+    def __init__(self, metrics=None):
         self.routes = {}
+        self.metrics = metrics
+    @staticmethod
+    def default(metrics=None):
+        r = _router(metrics)
+        r.add("ping", lambda t: "pong")
+        r.add("echo", lambda t: t)
+        return r
     def add(self, command, func):
         self.routes[str(command)] = func
-    def route(self, text):
+    def route(self, text, metrics=None):
+        #metrics overrides self.metrics, so a server can time a shared router into its own _metrics
         parts = str(text).split()
         if not parts:
             return "ERR"
         cmd = parts[0]
-        if cmd in self.routes:
+        if cmd not in self.routes:
+            return "NO_ROUTE"
+        metrics = metrics or self.metrics
+        if metrics is None:
             return self.routes[cmd](text)
-        return "NO_ROUTE"
+        t0 = time.perf_counter()
+        try:
+            return self.routes[cmd](text)
+        finally:
+            metrics.observe(cmd, time.perf_counter() - t0)
+class _tls:
+    @staticmethod
+    def server_context(certfile, keyfile=None, tickets=2):
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(certfile, keyfile)
+        ctx.num_tickets = int(tickets)  #TLS 1.3 session tickets issued per handshake
+        return ctx
+    @staticmethod
+    def client_context(cafile=None, verify=True):
+        ctx = ssl.create_default_context(cafile=cafile)
+        if not verify:
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        return ctx
+    @staticmethod
+    def selfsigned(directory, cn="localhost", days=1):
+        cert = os.path.join(directory, "cert.pem")
+        key = os.path.join(directory, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1", "-nodes",
+             "-keyout", key, "-out", cert, "-days", str(days), "-subj", f"/CN={cn}",
+             "-addext", f"subjectAltName=DNS:{cn},IP:127.0.0.1"],
+            check=True, capture_output=True)
+        return cert, key
 class _client:
-    def __init__(self, host="127.0.0.1", port=5050):
+    def __init__(self, host="127.0.0.1", port=5050, ssl_context=None, server_hostname=None):
         self.host = host
         self.port = int(port)
         self.addr = (self.host, self.port)
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.ssl_context = ssl_context
+        self.server_hostname = server_hostname or host
+        self.session = None  #last TLS session, offered again on reconnect to skip the full handshake
+        self.sock = self._socket()
         self.cserver = self.addr[0]
         self.cport = self.addr[1]
         self.cname = edit.join(edit.join(self.cserver, ":"), self.cport)
+    def _socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.ssl_context is None:
+            return sock
+        return self.ssl_context.wrap_socket(sock, server_hostname=self.server_hostname, session=self.session)
+    @property
+    def resumed(self):
+        return getattr(self.sock, "session_reused", False)
     def connect(self):
         self.sock.connect(self.addr)
+    def reconnect(self):
+        self.close()
+        self.sock = self._socket()
+        self.connect()
     def send(self, text):
         self.sock.sendall(_packet.encode(text))
     def recv(self, n=4096):
         return _packet.decode(self.sock.recv(int(n)))
     def close(self):
+        if getattr(self.sock, "session", None) is not None:
+            self.session = self.sock.session  #TLS 1.3 tickets arrive after the handshake, so keep the latest
         self.sock.close()
+class _kvservice:
+    #GET/SET/SETEX/DEL/MGET/SCAN routes over a kvengine; replies are JSON so misses and values stay unambiguous
+    def __init__(self, engine=None):
+        self.engine = engine  #None follows _kvstore.engine, so a later _kvstore.open() on the server applies
+    def store(self):
+        return self.engine if self.engine is not None else _kvstore.engine
+    def install(self, router):
+        router.add("GET", self.get)
+        router.add("SET", self.set)
+        router.add("SETEX", self.setex)
+        router.add("DEL", self.delete)
+        router.add("MGET", self.mget)
+        router.add("SCAN", self.scan)
+        return router
+    def get(self, text):
+        parts = text.split()
+        if len(parts) != 2:
+            return "ERR"
+        return json.dumps(self.store().get(parts[1]), default=str)
+    @staticmethod
+    def _args(text, n):
+        #n words after the command, then the value: the rest of the line after the single space that ends
+        #the last word (split(None, n) would also strip the value's leading whitespace)
+        parts = text.split(None, n)
+        if len(parts) < n + 1:
+            return None
+        last, _, value = parts[n].partition(" ")
+        return parts[1:n] + [last, value]
+    def set(self, text):
+        #SET key value: the value is the rest of the line
+        args = self._args(text, 1)
+        if args is None:
+            return "ERR"
+        self.store().set(args[0], args[1])
+        return "OK"
+    def setex(self, text):
+        args = self._args(text, 2)
+        if args is None:
+            return "ERR"
+        try:
+            ttl = float(args[1])
+        except ValueError:
+            return "ERR"
+        self.store().set(args[0], args[2], ttl)
+        return "OK"
+    def delete(self, text):
+        store = self.store()
+        return str(sum(bool(store.delete(key)) for key in text.split()[1:]))
+    def mget(self, text):
+        return json.dumps(self.store().mget(text.split()[1:]), default=str)
+    def scan(self, text):
+        #SCAN cursor [MATCH pattern] [COUNT n] -> [next cursor, keys]; cursor 0 means done
+        parts = text.split()
+        try:
+            cursor = int(parts[1]) if len(parts) > 1 else 0
+            options = dict(zip(parts[2::2], parts[3::2]))
+            count = int(options.get("COUNT", 100))
+        except ValueError:
+            return "ERR"
+        return json.dumps(list(self.store().scan(cursor, count, options.get("MATCH"))))
+class _kvclient:
+    #client for _kvservice; inside pipeline() commands are queued and sent in one write per `batch`
+    def __init__(self, host="127.0.0.1", port=5050, ssl_context=None, server_hostname=None, batch=256):
+        self.conn = _client(host, port, ssl_context=ssl_context, server_hostname=server_hostname)
+        self.batch = int(batch)
+        self.queued = []
+        self.piping = False
+        self.results = []
+        self.buf = b""
+        self.conn.connect()
+    @staticmethod
+    def _key(key):
+        key = str(key)
+        if not key or len(key.split()) != 1 or key != key.strip():
+            raise ValueError(f"kvclient: keys must be non-empty and contain no whitespace, got {key!r}")
+        return key
+    def get(self, key):
+        return self._submit(f"GET {self._key(key)}", json.loads)
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            return self._submit(f"SET {self._key(key)} {value}", str)
+        return self._submit(f"SETEX {self._key(key)} {float(ttl)} {value}", str)
+    def delete(self, *keys):
+        return self._submit("DEL " + " ".join(self._key(k) for k in keys), int)
+    def mget(self, keys):
+        return self._submit("MGET " + " ".join(self._key(k) for k in keys), json.loads)
+    def mset(self, mapping, ttl=None):
+        #one pipelined SET per key; inside an open pipeline() the SETs join it, so like any queued
+        #command this returns None and the replies arrive with that pipeline's results
+        nested = self.piping
+        with self.pipeline():
+            for key, value in dict(mapping).items():
+                self.set(key, value, ttl)
+        return None if nested else self.results
+    def scan(self, match=None, count=100):
+        cursor = 0
+        while True:
+            command = f"SCAN {cursor} COUNT {int(count)}" + (f" MATCH {match}" if match else "")
+            cursor, keys = self._submit(command, json.loads)
+            yield from keys
+            if not cursor:
+                return
+    @contextlib.contextmanager
+    def pipeline(self):
+        outer = self.piping
+        self.piping = True
+        try:
+            yield self
+        finally:
+            self.piping = outer
+        if not outer:
+            self.results = self.execute()
+    def execute(self):
+        queued, self.queued = self.queued, []
+        out = []
+        for i in range(0, len(queued), self.batch):
+            chunk = queued[i:i + self.batch]
+            self.conn.sock.sendall(b"".join(_packet.encode(command) for command, _ in chunk))
+            out.extend(self._decode(command, decode, reply) for (command, decode), reply in zip(chunk, self._read(len(chunk))))
+        return out
+    def close(self):
+        self.conn.close()
+    def _submit(self, command, decode):
+        self.queued.append((command, decode))
+        if self.piping:
+            return None
+        return self.execute()[-1]
+    def _read(self, n):
+        replies = []
+        while len(replies) < n:
+            data = self.conn.sock.recv(1 << 16)
+            if not data:
+                raise ConnectionError("kvclient: connection closed by server")
+            done, self.buf = _packet.split(self.buf + data)
+            replies.extend(done)
+        return replies
+    @staticmethod
+    def _decode(command, decode, reply):
+        reply = reply.decode()
+        if reply in ("ERR", "NO_ROUTE"):
+            raise ValueError(f"kvclient: {command.split()[0]} -> {reply}")
+        return decode(reply)
+class _wsclient:
+    def __init__(self, ws, maxqueue):
+        self.ws = ws
+        self.queue = asyncio.Queue(maxqueue)
+        self.topics = set()
+        self.dropped = False
 class _wsserver:
-    def __init__(self, host="127.0.0.1", port=8765):
+    def __init__(self, host="127.0.0.1", port=8765, router=None, compression="deflate", maxqueue=1024, batch=1, verbose=False,
+                 metrics=None):
         self.host = host
         self.port = int(port)
-    async def _log(self, msg):
-        t = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[WS {t}] {msg}")
-    async def _handler(self, ws, path):
-        await self._log("connect")
+        self.router = router or _router.default()
+        self.compression = compression  #"deflate" negotiates permessage-deflate, None disables it
+        self.maxqueue = int(maxqueue)   #per-client send queue bound
+        self.batch = int(batch)         #max queued messages taken per sender wake-up, sent back to back
+        self.verbose = verbose
+        self.metrics = metrics
+        self.clients = set()
+        self.topics = {}
+        self.slow = 0
+    def _log(self, msg):
+        if self.verbose:
+            t = datetime.datetime.now().strftime("%H:%M:%S")
+            print(f"[WS {t}] {msg}")
+    def subscribe(self, client, topic):
+        self.topics.setdefault(str(topic), set()).add(client)
+        client.topics.add(str(topic))
+    def unsubscribe(self, client, topic):
+        subs = self.topics.get(str(topic))
+        if subs is not None:
+            subs.discard(client)
+            if not subs:
+                del self.topics[str(topic)]
+        client.topics.discard(str(topic))
+    def publish(self, topic, message):
+        subs = self.topics.get(str(topic))
+        if not subs:
+            return 0
+        text = f"{topic} {message}"  #built once, shared by every recipient queue
+        return sum(self._enqueue(client, text) for client in list(subs))
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "topics": {t: len(s) for t, s in self.topics.items()},
+            "slow": self.slow,
+        }
+    def _enqueue(self, client, data):
+        #True when queued; a dropped or overflowing client gets nothing
+        if client.dropped:
+            return False
+        try:
+            client.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            client.dropped = True
+            self.slow += 1
+            self._log(f"slow consumer dropped ({client.queue.qsize()} queued)")
+            self._drop(client)
+            asyncio.ensure_future(client.ws.close(1008, "slow consumer"))
+            return False
+    def _drop(self, client):
+        for topic in list(client.topics):
+            self.unsubscribe(client, topic)
+        self.clients.discard(client)
+    def _dispatch(self, client, message):
+        parts = message.split(" ", 2)
+        if parts[0] == "sub" and len(parts) > 1:
+            self.subscribe(client, parts[1])
+            out = "OK"
+        elif parts[0] == "unsub" and len(parts) > 1:
+            self.unsubscribe(client, parts[1])
+            out = "OK"
+        elif parts[0] == "pub" and len(parts) > 1:
+            self.publish(parts[1], parts[2] if len(parts) > 2 else "")
+            out = "OK"
+        else:
+            out = self.router.route(message, self.metrics)
+        self._enqueue(client, str(out))
+    async def _sender(self, client):
+        q = client.queue
+        ws = client.ws
+        while True:
+            items = [await q.get()]
+            while len(items) < self.batch and not q.empty():
+                items.append(q.get_nowait())
+            for item in items:
+                await ws.send(item)  #public API, so permessage-deflate applies when negotiated
+            if self.metrics is not None:
+                self.metrics.io("ws", nout=sum(len(item.encode()) for item in items))
+    async def _handler(self, ws, path=None):
+        client = _wsclient(ws, self.maxqueue)
+        self.clients.add(client)
+        sender = asyncio.create_task(self._sender(client))
+        self._log("connect")
+        if self.metrics is not None:
+            self.metrics.connect("ws")
         try:
             async for message in ws:
-                await self._log(f"recv {message}")
-                await ws.send("OK")
-        except:
+                if isinstance(message, bytes):
+                    nin = len(message)
+                    message = message.decode(errors="ignore")
+                else:
+                    nin = len(message.encode())
+                if self.metrics is not None:
+                    self.metrics.io("ws", nin=nin)
+                self._dispatch(client, message)
+        except websockets.ConnectionClosed:
             pass
-        await self._log("disconnect")
+        finally:
+            sender.cancel()
+            done, = await asyncio.gather(sender, return_exceptions=True)
+            if not isinstance(done, (asyncio.CancelledError, websockets.ConnectionClosed)):
+                self._log(f"sender failed: {done!r}")
+            self._drop(client)
+            if self.metrics is not None:
+                self.metrics.disconnect("ws")
+        self._log("disconnect")
+    async def listen(self):
+        server = await websockets.serve(self._handler, self.host, self.port, compression=self.compression)
+        self.port = server.sockets[0].getsockname()[1]
+        return server
     async def start(self):
-        async with websockets.serve(self._handler, self.host, self.port):
-            await self._log("running")
+        server = await self.listen()
+        print(f"[WS] {self.host}:{self.port}")
+        async with server:
             await asyncio.Future()
+def _safepath(root, urlpath):
+    rel = urllib.parse.unquote(urllib.parse.urlsplit(urlpath).path).lstrip("/")
+    path = os.path.realpath(os.path.join(root, rel))
+    if path != root and not path.startswith(root + os.sep):
+        return None
+    if os.path.isdir(path):
+        path = os.path.join(path, "index.html")
+    return path if os.path.isfile(path) else None
+def _etagmatch(header, etag):
+    #If-None-Match: "*" or a comma-separated list of (possibly weak) entity tags, compared weakly
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (t.removeprefix("W/") for t in tags)
 class _httphandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        body = f"HTTP SERVER\nPath: {self.path}\nTime: {datetime.datetime.now()}"
-        b = body.encode()
-        self.send_response(200)
-        self.send_header("Content-Type", "text/plain")
-        self.send_header("Content-Length", len(b))
+    protocol_version = "HTTP/1.1"  #keep-alive
+    disable_nagle_algorithm = True  #headers and the sendfile body go out as separate writes
+    GZIPTYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+    def log_message(self, format, *args):
+        pass
+    def do_HEAD(self):
+        self.do_GET(body=False)
+    def do_GET(self, body=True):
+        if self.server.root is None:
+            text = f"HTTP SERVER\nPath: {self.path}\nTime: {datetime.datetime.now()}"
+            return self._reply(200, text.encode(), "text/plain", body)
+        path = self._resolve()
+        if path is None:
+            return self._reply(404, b"not found", "text/plain", body)
+        st = os.stat(path)
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        rng = self.headers.get("Range")
+        span = self._range(rng, st.st_size) if rng else None
+        #every variant of a compressible file says so, or a shared cache may hand gzip to a client without it
+        vary = {"Vary": "Accept-Encoding"} if self.server.gzip and ctype.startswith(self.GZIPTYPES) else {}
+        if vary and span is None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            etag = etag[:-1] + '-gz"'
+            if self._notmodified(etag, vary):
+                return
+            data = self.server.gzipped(path, st)
+            return self._reply(200, data, ctype, body, {"ETag": etag, "Content-Encoding": "gzip", **vary})
+        if self._notmodified(etag, vary):
+            return
+        if span == ():
+            return self._reply(416, b"", "text/plain", body, {"Content-Range": f"bytes */{st.st_size}"})
+        start, end = span or (0, st.st_size - 1)
+        self.send_response(206 if span else 200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", end - start + 1)
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        for k, v in vary.items():
+            self.send_header(k, v)
+        if span:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{st.st_size}")
+        self.end_headers()
+        if body and end >= start:
+            with open(path, "rb") as f:
+                self._sendfile(f, start, end - start + 1)
+    def _reply(self, code, data, ctype, body=True, headers=None):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", len(data))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if body:
+            self.wfile.write(data)
+    def _notmodified(self, etag, headers=None):
+        header = self.headers.get("If-None-Match")
+        if header is None or not _etagmatch(header, etag):
+            return False
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
         self.end_headers()
-        self.wfile.write(b)
+        return True
+    def _resolve(self):
+        return _safepath(self.server.root, self.path)
+    @staticmethod
+    def _range(header, size):
+        #(first, last) to serve; None ignores the header (other units, multiple or malformed ranges) and
+        #serves the whole file; () is unsatisfiable (416)
+        unit, _, spec = header.partition("=")
+        if unit.strip().lower() != "bytes" or "," in spec or "-" not in spec:
+            return None
+        first, last = (x.strip() for x in spec.split("-", 1))
+        if not first:
+            if not last.isdigit():
+                return None
+            if int(last) == 0 or size == 0:
+                return ()
+            return max(0, size - int(last)), size - 1
+        if not first.isdigit() or (last and not last.isdigit()) or (last and int(last) < int(first)):
+            return None
+        if int(first) >= size:
+            return ()
+        return int(first), min(int(last), size - 1) if last else size - 1
+    def _sendfile(self, f, offset, count):
+        if not hasattr(os, "sendfile") or not isinstance(self.connection, socket.socket) or hasattr(self.connection, "context"):
+            f.seek(offset)
+            while count > 0:
+                chunk = f.read(min(count, 1 << 20))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                count -= len(chunk)
+            return
+        out = self.connection.fileno()
+        while count > 0:
+            sent = os.sendfile(out, f.fileno(), offset, count)  #zero-copy file -> socket
+            if sent == 0:
+                break
+            offset += sent
+            count -= sent
 class _httpserver:
-    def __init__(self, host="127.0.0.1", port=8080):
+    def __init__(self, host="127.0.0.1", port=8080, root=None, gzip=False, threaded=True, gzcache=32 << 20):
         self.host = host
         self.port = int(port)
-        self.server = HTTPServer((host, port), _httphandler)
+        self.server = (ThreadingHTTPServer if threaded else HTTPServer)((host, self.port), _httphandler)
+        self.server.root = os.path.realpath(root) if root is not None else None
+        self.server.gzip = gzip
+        self.server.gzipped = self._gzipped
+        self.port = self.server.server_address[1]
+        self.gzcache = collections.OrderedDict()  #(path, mtime_ns, size) -> gzip bytes
+        self.gzcachemax = int(gzcache)            #bytes of compressed bodies kept
+        self.gzcachebytes = 0
+        self.gzlock = threading.Lock()
+    def _gzipped(self, path, st):
+        key = (path, st.st_mtime_ns, st.st_size)
+        with self.gzlock:
+            data = self.gzcache.get(key)
+            if data is not None:
+                self.gzcache.move_to_end(key)
+                return data
+        with open(path, "rb") as f:
+            data = gzip.compress(f.read(), 6)
+        if len(data) > self.gzcachemax:
+            return data
+        with self.gzlock:
+            if key not in self.gzcache:
+                self.gzcache[key] = data
+                self.gzcachebytes += len(data)
+            while self.gzcachebytes > self.gzcachemax:
+                self.gzcachebytes -= len(self.gzcache.popitem(last=False)[1])
+        return data
     def start(self):
         print(f"[HTTP] {self.host}:{self.port}")
         self.server.serve_forever()
     def stop(self):
         self.server.shutdown()
 class _server:
-    def __init__(self, host="127.0.0.1", port=5050):
+    def __init__(self, host="127.0.0.1", port=5050, router=None, ssl_context=None, verbose=True, kv=False):
         self.host = host
         self.port = int(port)
         self.addr = (host, port)
-        self.router = _router()
-        self.router.add("ping", lambda t: "pong")
-        self.router.add("echo", lambda t: t)
+        self.router = router or _router.default()
+        if kv is not False and kv is not None:
+            _kvservice(None if kv is True else kv).install(self.router)  #kv=True serves _kvstore, or pass a kvengine
+        self.ssl_context = ssl_context
+        self.verbose = verbose
     def _log(self, m):
-        t = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[TCP {t}] {m}")
+        if self.verbose:
+            t = datetime.datetime.now().strftime("%H:%M:%S")
+            print(f"[TCP {t}] {m}")
     def _handle(self, conn, addr):
         self._log(f"connect {addr}")
         try:
+            if self.ssl_context is not None:
+                conn = self.ssl_context.wrap_socket(conn, server_side=True)  #handshake runs on the connection thread
+            buf = b""
             while True:
-                raw = conn.recv(1024)
+                raw = conn.recv(1 << 16)
                 if not raw:
                     break
-                msg = _packet.decode(raw)
-                out = self.router.route(msg)
-                conn.sendall(_packet.encode(out))
+                #pipelined requests arriving in one read are answered with one write
+                msgs, buf = _packet.split(buf + raw)
+                if msgs:
+                    with utrace.span("server._server._handle", requests=len(msgs)):
+                        conn.sendall(b"".join(_packet.encode(self.router.route(m.decode(errors="ignore"))) for m in msgs))
         except:
             pass
         self._log(f"disconnect {addr}")
         conn.close()
-    def start(self):
+    def bind(self):
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.bind(self.addr)
         s.listen()
+        self.port = s.getsockname()[1]
+        self.addr = (self.host, self.port)
+        return s
+    def start(self):
+        s = self.bind()
         self._log(f"running {self.host}:{self.port}")
+        self.serve(s)
+    def serve(self, s):
         while True:
             conn, addr = s.accept()
             threading.Thread(target=self._handle, args=(conn, addr), daemon=True).start()
-def run_server(host="127.0.0.1", port=5050):
-    srv = _server(host, port)
+class _hub:
+    def __init__(self, host="127.0.0.1", tcp=5050, ws=8765, http=8080, router=None, root=None, verbose=False, ssl_context=None,
+                 kv=False):
+        self.host = host
+        self.ssl_context = ssl_context  #applied to the TCP listener
+        self.metrics = _metrics()  #owned by the hub; routes are timed into it without touching router.metrics
+        self.router = router or _router.default()
+        if kv is not False and kv is not None:
+            _kvservice(None if kv is True else kv).install(self.router)  #shared state reachable from every listener
+        self.ports = {"tcp": tcp, "ws": ws, "http": http}  #None disables a listener, 0 picks a free port
+        self.root = os.path.realpath(root) if root is not None else None
+        self.ws = _wsserver(host, ws or 0, router=self.router, verbose=verbose, metrics=self.metrics)
+        self.servers = []
+    async def listen(self):
+        if self.ports["tcp"] is not None:
+            self.servers.append(await asyncio.start_server(self._tcp, self.host, self.ports["tcp"], ssl=self.ssl_context))
+            self.ports["tcp"] = self.servers[-1].sockets[0].getsockname()[1]
+        if self.ports["ws"] is not None:
+            self.servers.append(await self.ws.listen())
+            self.ports["ws"] = self.ws.port
+        if self.ports["http"] is not None:
+            self.servers.append(await asyncio.start_server(self._http, self.host, self.ports["http"]))
+            self.ports["http"] = self.servers[-1].sockets[0].getsockname()[1]
+        return self.ports
+    async def close(self):
+        for srv in self.servers:
+            srv.close()
+            await srv.wait_closed()
+        self.servers = []
+    async def start(self):
+        await self.listen()
+        print(f"[HUB] {self.host} " + " ".join(f"{k}:{v}" for k, v in self.ports.items() if v is not None))
+        await asyncio.Future()
+    async def _tcp(self, reader, writer):
+        self.metrics.connect("tcp")
+        try:
+            while True:
+                raw = await _packet.aread(reader)
+                out = _packet.encode(self.router.route(raw.decode(errors="ignore"), self.metrics))
+                self.metrics.io("tcp", len(raw), len(out))
+                writer.write(out)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.metrics.disconnect("tcp")
+            writer.close()
+    async def _http(self, reader, writer):
+        self.metrics.connect("http")
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = lines[0].split(" ", 2)
+                headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+                nout = await self._respond(writer, method, target, headers)
+                self.metrics.io("http", len(head) + length, nout)
+                if version == "HTTP/1.0" or headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.metrics.disconnect("http")
+            writer.close()
+    async def _respond(self, writer, method, target, headers):
+        url = urllib.parse.urlsplit(target)
+        if url.path == "/metrics":
+            return await self._send(writer, 200, self.metrics.render().encode(), "text/plain; version=0.0.4", method)
+        if url.path == "/route":
+            q = urllib.parse.parse_qs(url.query).get("q", [""])[0]
+            return await self._send(writer, 200, str(self.router.route(q, self.metrics)).encode(), "text/plain", method)
+        path = _safepath(self.root, url.path) if self.root is not None else None
+        if path is None:
+            return await self._send(writer, 404, b"not found", "text/plain", method)
+        st = os.stat(path)
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if _etagmatch(headers.get("if-none-match", ""), etag):
+            return await self._send(writer, 304, b"", "text/plain", "HEAD", {"ETag": etag})
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        nout = await self._send(writer, 200, b"", ctype, "HEAD", {"ETag": etag, "Content-Length": st.st_size})
+        if method == "HEAD":
+            return nout
+        with open(path, "rb") as f:
+            return nout + await asyncio.get_running_loop().sendfile(writer.transport, f)
+    @staticmethod
+    async def _send(writer, code, data, ctype, method, headers=None):
+        fields = {"Content-Type": ctype, "Content-Length": len(data)}
+        fields.update(headers or {})
+        head = f"HTTP/1.1 {code} {HTTPStatus(code).phrase}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in fields.items()) + "\r\n"
+        out = head.encode() + (data if method != "HEAD" else b"")
+        writer.write(out)
+        await writer.drain()
+        return len(out)
+def run_server(host="127.0.0.1", port=5050, **options):
+    srv = _server(host, port, **options)
     srv.start()
-def run_ws(host="127.0.0.1", port=8765):
-    ws = _wsserver(host, port)
+def run_ws(host="127.0.0.1", port=8765, **options):
+    ws = _wsserver(host, port, **options)
     asyncio.run(ws.start())
-def run_http(host="127.0.0.1", port=8080):
-    http = _httpserver(host, port)
-    http.start()
\ No newline at end of file
+def run_http(host="127.0.0.1", port=8080, **options):
+    http = _httpserver(host, port, **options)
+    http.start()
+def run_all(host="127.0.0.1", tcp=5050, ws=8765, http=8080, **options):
+    hub = _hub(host, tcp, ws, http, **options)
+    asyncio.run(hub.start())
\ No newline at end of file
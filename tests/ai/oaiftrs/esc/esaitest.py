@@ -0,0 +1,89 @@
+"""
+Test suite for Stamp 4.7 AI Features - Advanced Security Intelligence Module
+
+Tests AdvancedSecurityAI vulnerability scanning
+"""
+import os
+import tempfile
+from rich import print as rp
+from rich.console import Console
+from rich.panel import Panel
+from lib.ai.oaiftrs.esc.esai import AdvancedSecurityAI
+from lib.ai.oaiftrs.esc.vscn import VulnScanner
+console = Console()
+class Tests:
+	def testScanVulnerabilities():
+		"""Test parallel, cached vulnerability scanning"""
+		rp("\n[bold cyan]=== Testing AdvancedSecurityAI.scanVulnerabilities ===[/bold cyan]\n")
+		security = AdvancedSecurityAI()
+		with tempfile.TemporaryDirectory() as tmp:
+			os.makedirs(os.path.join(tmp, "src", "web"))
+			files = {
+				os.path.join(tmp, "src", "db.py"): "cursor.execute(query)\npassword = 'hunter2'\n",
+				os.path.join(tmp, "src", "web", "app.js"): "el.innerHTML = data;\n",
+				os.path.join(tmp, "src", "clean.py"): "print('hello')\n",
+				os.path.join(tmp, "src", "notes.txt"): "os.system(cmd)\n",
+			}
+			for path, content in files.items():
+				with open(path, "w") as f:
+					f.write(content)
+			rp("[yellow]Test 1: Scan Directory[/yellow]")
+			findings = security.scanVulnerabilities(tmp)
+			for finding in findings:
+				rp(f"  • {os.path.relpath(finding['file'], tmp)}: {finding['type']} ({finding['severity']})")
+			assert sorted((os.path.basename(f["file"]), f["type"]) for f in findings) == [
+				("app.js", "XSS"), ("db.py", "Hardcoded Credentials"), ("db.py", "SQL Injection")]
+			rp("[green]✓ Directory scanning works[/green]\n")
+			rp("[yellow]Test 2: Incremental Rescan[/yellow]")
+			cache = os.path.join(tmp, "scan-cache.json")
+			first = VulnScanner(cache=cache)
+			assert list(first.scan(tmp)) == findings
+			again = VulnScanner(cache=cache)
+			assert list(again.scan(tmp)) == findings
+			rp(f"Files scanned: first run {first.scanned}, rescan {again.scanned}")
+			assert first.scanned == 3 and again.scanned == 0
+			with open(os.path.join(tmp, "src", "clean.py"), "a") as f:
+				f.write("os.system('ls')\n")
+			changed = VulnScanner(cache=cache)
+			rescan = list(changed.scan(tmp))
+			rp(f"After editing one file: {changed.scanned} scanned, {len(rescan)} findings")
+			assert changed.scanned == 1 and len(rescan) == 4
+			rp("[green]✓ Unchanged files come from the cache[/green]\n")
+			rp("[yellow]Test 3: Streamed Findings[/yellow]")
+			stream = security.iterVulnerabilities(tmp, workers=2)
+			first_finding = next(stream)
+			rp(f"First finding: {first_finding['type']} in {os.path.basename(first_finding['file'])}")
+			assert first_finding == rescan[0]
+			stream.close()
+			rp("[green]✓ Findings are streamed[/green]\n")
+		return True
+	def runTests():
+		"""Run all tests for advanced security intelligence AI"""
+		rp(Panel.fit(
+			"[bold magenta]Stamp 4.7 AI Test Suite - Advanced Security Intelligence[/bold magenta]\n"
+			"[yellow]Testing AdvancedSecurityAI class[/yellow]",
+			title="AdvancedSecurityAI Test Suite"
+		))
+		tests_passed = 0
+		tests_failed = 0
+		try:
+			if Tests.testScanVulnerabilities():
+				tests_passed += 1
+		except Exception as e:
+			tests_failed += 1
+			rp(f"[red]✗ AdvancedSecurityAI tests failed: {e}[/red]\n")
+		rp("\n" + "="*50)
+		rp(f"[bold]Test Summary[/bold]")
+		rp(f"[green]Passed: {tests_passed}[/green]")
+		rp(f"[red]Failed: {tests_failed}[/red]")
+		rp(f"[cyan]Total: {tests_passed + tests_failed}[/cyan]")
+		if tests_failed == 0:
+			rp("\n[bold green]🎉 All tests passed![/bold green]")
+		else:
+			if tests_failed > 1:
+				rp(f"\n[bold red]❌ {tests_failed} tests failed[/bold red]")
+			else:
+				rp(f"\n[bold red]❌ {tests_failed} test failed[/bold red]")
+		rp("="*50 + "\n")
+if __name__ == "__main__":
+	Tests.runTests()
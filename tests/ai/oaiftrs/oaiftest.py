@@ -5,6 +5,7 @@ Tests NLPText, SmartSearch, and OptimizationAI classes
 """
 import os
 import shutil
+import tempfile
 from rich import print as rp
 from rich.console import Console
 from rich.panel import Panel
@@ -80,6 +81,90 @@ class Tests:
         rp("[green]✓ Document clustering works[/green]\n")
         shutil.rmtree(test_dir)
         return True
+    def testSmartSearchIndex():
+        """Test the inverted index behind SmartSearch"""
+        rp("\n[bold cyan]=== Testing SmartSearch Index ===[/bold cyan]\n")
+        search = SmartSearch()
+        test_dir = tempfile.mkdtemp()
+        files = []
+        for name, text in (("ml.txt", "machine learning algorithms learn from data data data"),
+                           ("py.txt", "Python is a great programming language for data science"),
+                           ("stats.txt", "statistics and probability"),
+                           ("empty.txt", "")):
+            path = os.path.join(test_dir, name)
+            with open(path, "w") as f:
+                f.write(text)
+            files.append(path)
+        rp("[yellow]Test 1: BM25 Ranking[/yellow]")
+        ranked = search.searchScored("machine learning data", files)
+        rp(f"Ranked: {[(os.path.basename(p), round(s, 3)) for p, s in ranked]}")
+        assert [os.path.basename(p) for p, _ in ranked] == ["ml.txt", "py.txt"]
+        assert search.searchByMeaning("machine learning data", files) == [p for p, _ in ranked]
+        rp("[green]✓ BM25 ranking works[/green]\n")
+        rp("[yellow]Test 2: Similarity From the Index[/yellow]")
+        similar = search.findSimilar("python data science", files)
+        rp(f"Similar: {[(os.path.basename(p), round(s, 3)) for p, s in similar]}")
+        assert similar[0] == (files[1], 3 / 9)
+        rp("[green]✓ Jaccard similarity works[/green]\n")
+        rp("[yellow]Test 3: Incremental Updates[/yellow]")
+        reads = search._index.reads
+        search.searchByMeaning("probability", files)
+        assert search._index.reads == reads
+        with open(files[2], "w") as f:
+            f.write("bayesian probability and inference")
+        os.utime(files[2], ns=(0, 10 ** 9))
+        assert search.searchByMeaning("bayesian", files) == [files[2]]
+        os.remove(files[0])
+        assert search.searchByMeaning("machine", files) == []
+        rp(f"Index stats: {search._index.stats()}")
+        rp("[green]✓ Only changed files are re-read[/green]\n")
+        shutil.rmtree(test_dir)
+        return True
+    def testSmartSearchDiskIndex():
+        """Test the persistent on-disk index behind SmartSearch(index_dir=...)"""
+        rp("\n[bold cyan]=== Testing SmartSearch Disk Index ===[/bold cyan]\n")
+        test_dir = tempfile.mkdtemp()
+        index_dir = os.path.join(test_dir, "index")
+        files = []
+        for i in range(12):
+            path = os.path.join(test_dir, f"doc{i}.txt")
+            with open(path, "w") as f:
+                f.write(f"shared words doc{i} " + ("machine learning " * (i % 3)))
+            files.append(path)
+        rp("[yellow]Test 1: Same Ranking as the In-Memory Index[/yellow]")
+        memory = SmartSearch()
+        search = SmartSearch(index_dir=index_dir)
+        for i in range(0, len(files), 3):
+            search.indexFiles(files[i:i + 3])
+        expected = memory.searchScored("machine learning", files)
+        ranked = search.searchScored("machine learning", files)
+        assert [p for p, _ in ranked] == [p for p, _ in expected]
+        assert all(abs(s - t) < 1e-9 for (_, s), (_, t) in zip(ranked, expected))
+        assert search.findSimilar("shared words doc4", files) == memory.findSimilar("shared words doc4", files)
+        rp("[green]✓ Disk and memory indexes agree[/green]\n")
+        rp("[yellow]Test 2: Segments, Deletions and Merging[/yellow]")
+        index = search._index
+        os.remove(files[1])
+        with open(files[2], "a") as f:
+            f.write(" bayesian")
+        os.utime(files[2], ns=(0, 10 ** 9))
+        assert search.searchByMeaning("bayesian", files) == [files[2]]
+        assert files[1] not in search.searchByMeaning("machine", files)
+        index.wait()
+        index.merge()
+        rp(f"Index stats: {index.stats()}")
+        assert index.stats()["segments"] == 1 and index.stats()["deleted"] == 0
+        rp("[green]✓ Incremental segments merge[/green]\n")
+        rp("[yellow]Test 3: Cold Open[/yellow]")
+        expected = search.searchByMeaning("machine learning", files[2:])
+        index.close()
+        reopened = SmartSearch(index_dir=index_dir)
+        assert reopened.searchByMeaning("machine learning", None) == expected
+        assert reopened._index.reads == 0
+        reopened._index.close()
+        rp("[green]✓ A new process answers from the saved index[/green]\n")
+        shutil.rmtree(test_dir)
+        return True
     def testOptimizationAI():
         """Test OptimizationAI class with all methods"""
         rp("\n[bold cyan]=== Testing OptimizationAI ===[/bold cyan]\n")
@@ -130,6 +215,18 @@ class Tests:
         except Exception as e:
             tests_failed += 1
             rp(f"[red]✗ SmartSearch tests failed: {e}[/red]\n")
+        try:
+            if Tests.testSmartSearchIndex():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ SmartSearch index tests failed: {e}[/red]\n")
+        try:
+            if Tests.testSmartSearchDiskIndex():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ SmartSearch disk index tests failed: {e}[/red]\n")
         try:
             if Tests.testOptimizationAI():
                 tests_passed += 1
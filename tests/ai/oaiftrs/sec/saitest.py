@@ -6,7 +6,12 @@ Tests SecurityAI class
 from rich import print as rp
 from rich.console import Console
 from rich.panel import Panel
+import os
+import re
+import tempfile
 from lib.ai.oaiftrs.sec.scai import SecurityAI
+from lib.ai.oaiftrs.sec.scnr import LogScanner, RuleSet
+from lib.ai.oaiftrs.sec.mntr import BruteForceMonitor
 console = Console()
 class Tests:
 	def testSecurityAI():
@@ -68,6 +73,127 @@ class Tests:
 		rp(f"Threat 3 (DoS x1000): {severity3}/10")
 		rp("[green]✓ Threat severity scoring works[/green]\n")
 		return True
+	def testLogScanner():
+		"""Test the one-pass log scanner behind the log analysis methods"""
+		rp("\n[bold cyan]=== Testing LogScanner ===[/bold cyan]\n")
+		security = SecurityAI()
+		logs = [
+			"2024-01-01 10:00:01 Failed password for admin from 10.0.0.5",
+			"2024-01-01 10:00:02 Failed password for admin from 10.0.0.5",
+			"2024-01-01 10:00:03 Failed password for root from 10.0.0.5",
+			"2024-01-01 10:00:04 Login denied for guest from 10.0.0.5",
+			"2024-01-01 10:00:05 Incorrect password from 10.0.0.5",
+			"2024-01-01 11:00:00 GET /index.php?id=1 UNION SELECT password FROM users",
+			"2024-01-01 11:00:01 WARNING disk almost full",
+			"2024-01-01 11:00:02 Critical exception in worker",
+		]
+		rp("[yellow]Test 1: Combined Analysis[/yellow]")
+		result = security.analyzeAll(logs)
+		rp(f"Anomalies: {len(result['anomalies'])}")
+		rp(f"Log patterns: {result['log_patterns']}")
+		rp(f"Brute force: {result['brute_force']}")
+		assert result["anomalies"] == security.detectAnomalies(logs)
+		assert result["log_patterns"] == security.analyzeLogPatterns(logs)
+		assert result["brute_force"] == security.detectBruteForce(logs)
+		assert result["brute_force"][0]["ip"] == "10.0.0.5"
+		rp("[green]✓ analyzeAll matches the individual methods[/green]\n")
+		rp("[yellow]Test 2: Block Scan Matches Line Scan[/yellow]")
+		scanner = LogScanner(security)
+		blocks = scanner.scan(logs * 50)
+		lines = scanner.aggregate()
+		for log in logs * 50:
+			lines.feed(log)
+		assert blocks.result() == lines.result()
+		rp(f"Lines scanned: {len(logs) * 50}")
+		rp("[green]✓ Block scanning agrees with per-line scanning[/green]\n")
+		rp("[yellow]Test 3: Rule Set[/yellow]")
+		rules = RuleSet([r"union\s+select", r"\.\./"], re.IGNORECASE)
+		rp(f"First rule index for UNION SELECT: {rules.first('id=1 UNION SELECT 1')}")
+		rp(f"All rule indexes for ../ UNION SELECT: {rules.all('../ union select')}")
+		assert rules.first("id=1 UNION SELECT 1") == 0
+		assert rules.all("../ union select") == [0, 1]
+		assert rules.first("hello") is None
+		rp("[green]✓ Rule set matching works[/green]\n")
+		return True
+	def testStreaming():
+		"""Test file-backed streaming analysis and aggregate merging"""
+		rp("\n[bold cyan]=== Testing Streaming Analysis ===[/bold cyan]\n")
+		security = SecurityAI()
+		logs = []
+		for i in range(3000):
+			ip = f"10.0.0.{i % 7}"
+			if i % 3 == 0:
+				logs.append(f"2024-01-01 {i % 24:02d}:00:00 Failed password for root from {ip}")
+			elif i % 50 == 1:
+				logs.append(f"GET /q?x=<script>alert({i})</script> from {ip}")
+			else:
+				logs.append(f"2024-01-01 {i % 24:02d}:30:00 Accepted publickey for bob from {ip}")
+		expected = security.analyzeAll(logs)
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, "auth.log")
+			with open(path, "w", newline="") as f:
+				f.write("\r\n".join(logs) + "\r\n")
+			rp("[yellow]Test 1: Analyze a Log File[/yellow]")
+			result = security.analyzeStream(path)
+			rp(f"Lines: {result['lines']}, anomalies: {result['anomaly_count']}")
+			assert result["lines"] == len(logs)
+			for key in expected:
+				assert result[key] == expected[key]
+			rp("[green]✓ File analysis matches analyzeAll[/green]\n")
+			rp("[yellow]Test 2: Merge Byte-Range Shards[/yellow]")
+			size = os.path.getsize(path)
+			cuts = [0, size // 3, size // 2 + 5, size]
+			merged = None
+			for start, end in zip(cuts, cuts[1:]):
+				shard = LogScanner(security).aggregate().feedFile(path, start, end)
+				merged = shard if merged is None else merged.merge(shard)
+			rp(f"Shards: {len(cuts) - 1}, lines: {merged.lines}")
+			assert merged.result() == expected
+			rp("[green]✓ Merged shards match a single pass[/green]\n")
+			rp("[yellow]Test 3: Worker Processes[/yellow]")
+			parallel = security.analyzeParallel(path, workers=2)
+			rp(f"Lines: {parallel['lines']}, brute force IPs: {len(parallel['brute_force'])}")
+			assert parallel == result
+			rp("[green]✓ Parallel analysis matches a single pass[/green]\n")
+		rp("[yellow]Test 4: Partial Results[/yellow]")
+		reports = list(security.iterAnalysis(iter(logs), every=1000, max_anomalies=10))
+		rp(f"Reports: {[r['lines'] for r in reports]}")
+		assert reports[-1]["lines"] == len(logs)
+		assert len(reports[-1]["anomalies"]) == 10
+		assert reports[-1]["anomaly_count"] == len(expected["anomalies"])
+		assert reports[-1]["brute_force"] == expected["brute_force"]
+		rp("[green]✓ Partial results work[/green]\n")
+		return True
+	def testBruteForceMonitor():
+		"""Test the sliding-window brute-force monitor"""
+		rp("\n[bold cyan]=== Testing BruteForceMonitor ===[/bold cyan]\n")
+		alerts = []
+		monitor = SecurityAI().bruteForceMonitor(threshold=3, window=60, buckets=6, on_alert=alerts.append)
+		rp("[yellow]Test 1: Alerts as Thresholds Are Crossed[/yellow]")
+		for second in range(10):
+			monitor.feed("sshd: Failed password for root from 10.0.0.5 port 22", ts=1000 + second)
+			monitor.feed("sshd: Accepted publickey for bob from 10.0.0.6 port 22", ts=1000 + second)
+		rp(f"Alerts: {[(a['ip'], a['failed_attempts'], a['severity']) for a in alerts]}")
+		assert [(a["failed_attempts"], a["severity"]) for a in alerts] == [(3, "high"), (9, "critical")]
+		assert monitor.active(now=1009) == [{"ip": "10.0.0.5", "failed_attempts": 10, "severity": "critical"}]
+		rp("[green]✓ Threshold alerts work[/green]\n")
+		rp("[yellow]Test 2: Sliding Window[/yellow]")
+		rp(f"Failures in window at t=1009: {monitor.count('10.0.0.5', now=1009)}")
+		rp(f"Failures in window at t=1080: {monitor.count('10.0.0.5', now=1080)}")
+		assert monitor.count("10.0.0.5", now=1080) == 0
+		for second in range(3):
+			monitor.feed("Failed password for root from 10.0.0.5", ts=1200 + second)
+		assert len(alerts) == 3 and alerts[-1]["failed_attempts"] == 3
+		rp("[green]✓ Old failures leave the window and alerts re-arm[/green]\n")
+		rp("[yellow]Test 3: Bounded Memory[/yellow]")
+		bounded = BruteForceMonitor(max_ips=100)
+		for i in range(1000):
+			bounded.record(f"10.1.{i // 256}.{i % 256}", ts=0)
+		rp(f"Stats: {bounded.stats()}")
+		assert bounded.stats()["tracked_ips"] == 100
+		assert bounded.stats()["evicted_ips"] == 900
+		rp("[green]✓ Cold IPs are evicted[/green]\n")
+		return True
 	def runTests():
 		"""Run all tests for security intelligence AI"""
 		rp(Panel.fit(
@@ -83,6 +209,24 @@ class Tests:
 		except Exception as e:
 			tests_failed += 1
 			rp(f"[red]✗ SecurityAI tests failed: {e}[/red]\n")
+		try:
+			if Tests.testLogScanner():
+				tests_passed += 1
+		except Exception as e:
+			tests_failed += 1
+			rp(f"[red]✗ LogScanner tests failed: {e}[/red]\n")
+		try:
+			if Tests.testStreaming():
+				tests_passed += 1
+		except Exception as e:
+			tests_failed += 1
+			rp(f"[red]✗ Streaming tests failed: {e}[/red]\n")
+		try:
+			if Tests.testBruteForceMonitor():
+				tests_passed += 1
+		except Exception as e:
+			tests_failed += 1
+			rp(f"[red]✗ BruteForceMonitor tests failed: {e}[/red]\n")
 		rp("\n" + "="*50)
 		rp(f"[bold]Test Summary[/bold]")
 		rp(f"[green]Passed: {tests_passed}[/green]")
@@ -0,0 +1,92 @@
+"""
+Test suite for Stamp - Chunker Module
+
+Tests chunker spans over text, bytes and memory-mapped files
+"""
+import os
+import gc
+import tempfile
+from pathlib import Path
+from rich import print as rp
+from rich.console import Console
+from rich.panel import Panel
+from _chunker import chunker
+console = Console()
+class Tests:
+    def testChunks():
+        """Test chunk boundaries for str and bytes sources"""
+        rp("\n[bold cyan]=== Testing chunker.chunks ===[/bold cyan]\n")
+        rp("[yellow]Test 1: Fixed Chunks[/yellow]")
+        text = "alpha beta gamma delta epsilon " * 40
+        pieces = list(chunker.chunks(text, size=100, overlap=10))
+        rp(f"Chunks: {len(pieces)}")
+        assert all(len(p) <= 100 for p in pieces)
+        assert pieces[0].text() == text[:100] and pieces[1].start == 90
+        rp("[green]✓ Fixed chunking works[/green]\n")
+        rp("[yellow]Test 2: UTF-8 Boundaries[/yellow]")
+        data = ("é" * 300).encode()
+        pieces = list(chunker.chunks(data, size=101))
+        assert "".join(p.text() for p in pieces) == "é" * 300
+        assert all(len(p) % 2 == 0 for p in pieces)
+        rp("[green]✓ Byte chunks never split a character[/green]\n")
+        return True
+    def testSpansOutliveIteration():
+        """Test that spans over a mapped file stay readable after the loop ends"""
+        rp("\n[bold cyan]=== Testing span lifetime ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "corpus.txt")
+            content = "".join(f"line {i}\n" for i in range(5000))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            rp("[yellow]Test 1: Path Source[/yellow]")
+            pieces = list(chunker.chunks(Path(path), size=4096, mode="line"))
+            gc.collect()
+            rp(f"First span: {pieces[0]!r}")
+            assert pieces[0].text() == content[:pieces[0].end]
+            assert "".join(p.text() for p in pieces) == content
+            assert bytes(pieces[-1].view) == content.encode()[pieces[-1].start:]
+            rp("[green]✓ Spans from a path are readable after iteration[/green]\n")
+            rp("[yellow]Test 2: File Object Source[/yellow]")
+            pieces = list(chunker.file(path, size=1000))
+            gc.collect()
+            assert "".join(p.text() for p in pieces) == content
+            rp("[green]✓ Spans from chunker.file are readable after the file is closed[/green]\n")
+            del pieces
+            gc.collect()
+        return True
+    def runTests():
+        """Run all tests for the chunker"""
+        rp(Panel.fit(
+            "[bold magenta]Stamp Test Suite - Chunker[/bold magenta]\n"
+            "[yellow]Testing chunker and span[/yellow]",
+            title="Chunker Test Suite"
+        ))
+        tests_passed = 0
+        tests_failed = 0
+        try:
+            if Tests.testChunks():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ chunker tests failed: {e}[/red]\n")
+        try:
+            if Tests.testSpansOutliveIteration():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ span lifetime tests failed: {e}[/red]\n")
+        rp("\n" + "="*50)
+        rp(f"[bold]Test Summary[/bold]")
+        rp(f"[green]Passed: {tests_passed}[/green]")
+        rp(f"[red]Failed: {tests_failed}[/red]")
+        rp(f"[cyan]Total: {tests_passed + tests_failed}[/cyan]")
+        if tests_failed == 0:
+            rp("\n[bold green]🎉 All tests passed![/bold green]")
+        else:
+            if tests_failed > 1:
+                rp(f"\n[bold red]❌ {tests_failed} tests failed[/bold red]")
+            else:
+                rp(f"\n[bold red]❌ {tests_failed} test failed[/bold red]")
+        rp("="*50 + "\n")
+if __name__ == "__main__":
+    Tests.runTests()
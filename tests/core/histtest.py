@@ -0,0 +1,101 @@
+"""
+Test suite for Stamp - History Ring Module
+
+Tests ring eviction, trigram search and the append-only file
+"""
+import os
+import tempfile
+from rich import print as rp
+from rich.console import Console
+from rich.panel import Panel
+from _hist import histring
+console = Console()
+class Tests:
+    def _consistent(ring):
+        #the trigram postings must hold exactly the seqs of the live entries, ascending
+        expected = {}
+        for s in range(ring.first, ring.seq):
+            text = ring.buf[s % ring.capacity]
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                expected.setdefault(gram, []).append(s)
+        return {g: list(p) for g, p in ring.grams.items()} == expected
+    def testEviction():
+        """Test that wraparound drops the oldest entries from the ring and from the trigram postings"""
+        rp("\n[bold cyan]=== Testing histring eviction ===[/bold cyan]\n")
+        ring = histring(8)
+        assert ring.buf == []
+        rp("[yellow]Test 1: Wraparound[/yellow]")
+        for i in range(21):
+            ring.append(f"cmd {i} {'build' if i % 3 == 0 else 'test'}")
+            assert Tests._consistent(ring)
+        assert len(ring) == 8 and len(ring.buf) == 8
+        assert list(ring) == [f"cmd {i} {'build' if i % 3 == 0 else 'test'}" for i in range(13, 21)]
+        assert ring[0] == "cmd 13 test" and ring[-1] == "cmd 20 test" and ring.tail(2) == ["cmd 19 test", "cmd 20 test"]
+        rp("[green]✓ The newest entries are kept and the postings match them[/green]\n")
+        rp("[yellow]Test 2: Search[/yellow]")
+        assert ring.search("build") == [(5, "cmd 18 build"), (2, "cmd 15 build")]
+        assert ring.search("cmd 1", limit=2) == [(6, "cmd 19 test"), (5, "cmd 18 build")]
+        assert ring.search("cmd 2", prefix=True) == [(7, "cmd 20 test")]
+        assert ring.search("12") == [] and ring.search("bu") == [(5, "cmd 18 build"), (2, "cmd 15 build")]
+        rp("[green]✓ Search only finds live entries, newest first[/green]\n")
+        return True
+    def testFile():
+        """Test that the history file reloads the newest entries and is compacted"""
+        rp("\n[bold cyan]=== Testing histring file ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history")
+            ring = histring(4, path=path, flushevery=1)
+            rp("[yellow]Test 1: Compaction[/yellow]")
+            for i in range(15):
+                ring.append(f"line {i}\nsecond")
+            with open(path, encoding="utf-8") as f:
+                assert len(f.readlines()) == 15
+            ring.append("line 15\nsecond")
+            with open(path, encoding="utf-8") as f:
+                assert len(f.readlines()) == 4
+            ring.append("last")
+            ring.close()
+            rp("[green]✓ The file is rewritten with the live entries at four times the capacity[/green]\n")
+            rp("[yellow]Test 2: Reload[/yellow]")
+            ring = histring(4, path=path)
+            assert list(ring) == ["line 13\nsecond", "line 14\nsecond", "line 15\nsecond", "last"]
+            assert Tests._consistent(ring) and ring.search("line 1") == [(2, "line 15\nsecond"), (1, "line 14\nsecond"), (0, "line 13\nsecond")]
+            ring.close()
+            rp("[green]✓ Reopening restores the newest entries, newlines included[/green]\n")
+        return True
+    def runTests():
+        """Run all tests for the history ring"""
+        rp(Panel.fit(
+            "[bold magenta]Stamp Test Suite - History Ring[/bold magenta]\n"
+            "[yellow]Testing histring[/yellow]",
+            title="History Ring Test Suite"
+        ))
+        tests_passed = 0
+        tests_failed = 0
+        try:
+            if Tests.testEviction():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ eviction tests failed: {e!r}[/red]\n")
+        try:
+            if Tests.testFile():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ file tests failed: {e!r}[/red]\n")
+        rp("\n" + "="*50)
+        rp(f"[bold]Test Summary[/bold]")
+        rp(f"[green]Passed: {tests_passed}[/green]")
+        rp(f"[red]Failed: {tests_failed}[/red]")
+        rp(f"[cyan]Total: {tests_passed + tests_failed}[/cyan]")
+        if tests_failed == 0:
+            rp("\n[bold green]🎉 All tests passed![/bold green]")
+        else:
+            if tests_failed > 1:
+                rp(f"\n[bold red]❌ {tests_failed} tests failed[/bold red]")
+            else:
+                rp(f"\n[bold red]❌ {tests_failed} test failed[/bold red]")
+        rp("="*50 + "\n")
+if __name__ == "__main__":
+    Tests.runTests()
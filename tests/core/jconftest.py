@@ -0,0 +1,77 @@
+"""
+Test suite for Stamp - JSON Config Module
+
+Tests that partial updates render exactly like a full json.dumps
+"""
+import os
+import json
+import tempfile
+from rich import print as rp
+from rich.console import Console
+from rich.panel import Panel
+from _jconf import jsonconfig
+console = Console()
+class Tests:
+    def _same(conf):
+        with open(conf.path, encoding="utf-8") as f:
+            text = f.read()
+        return text == json.dumps(json.loads(text), indent=4) and json.loads(text) == conf.document()
+    def testFragments():
+        """Test that cached subtree fragments are invalidated along every changed path"""
+        rp("\n[bold cyan]=== Testing jsonconfig fragments ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            conf = jsonconfig(os.path.join(tmp, "conf.json"))
+            conf.replace({"app": {"name": "stamp", "ui": {"theme": "dark", "size": 12}}, "list": [1, {"a": {}}], "empty": {}})
+            assert Tests._same(conf)
+            rp("[yellow]Test 1: Nested Update[/yellow]")
+            conf.set("app.ui.theme", "light")
+            assert Tests._same(conf) and conf.get("app.ui") == {"theme": "light", "size": 12}
+            conf.update({"app.name": "stamp2", "extra.deep.key": [1, 2]})
+            assert Tests._same(conf) and conf.get("extra") == {"deep": {"key": [1, 2]}}
+            rp("[green]✓ Ancestors of a changed key are rendered again[/green]\n")
+            rp("[yellow]Test 2: Subtree Replacement And Delete[/yellow]")
+            conf.set("app.ui", {"theme": "blue"})
+            assert Tests._same(conf)
+            conf.set("list.1", {"b": {"c": 1}})
+            assert Tests._same(conf) and conf.get("list") == [1, {"b": {"c": 1}}]
+            assert conf.delete("app.ui.theme") and not conf.delete("app.missing")
+            assert Tests._same(conf) and "app.ui" in conf and "app.ui.theme" not in conf
+            rp("[green]✓ Replacing or deleting a subtree drops its cached descendants[/green]\n")
+            rp("[yellow]Test 3: Copies[/yellow]")
+            conf.get("app")["name"] = "changed"
+            conf.document()["app"]["name"] = "changed"
+            assert conf.get("app.name") == "stamp2"
+            conf.set("app.version", 2)
+            assert Tests._same(conf)
+            rp("[green]✓ Edits to returned values never reach the cache[/green]\n")
+        return True
+    def runTests():
+        """Run all tests for jsonconfig"""
+        rp(Panel.fit(
+            "[bold magenta]Stamp Test Suite - JSON Config[/bold magenta]\n"
+            "[yellow]Testing jsonconfig[/yellow]",
+            title="JSON Config Test Suite"
+        ))
+        tests_passed = 0
+        tests_failed = 0
+        try:
+            if Tests.testFragments():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ fragment tests failed: {e!r}[/red]\n")
+        rp("\n" + "="*50)
+        rp(f"[bold]Test Summary[/bold]")
+        rp(f"[green]Passed: {tests_passed}[/green]")
+        rp(f"[red]Failed: {tests_failed}[/red]")
+        rp(f"[cyan]Total: {tests_passed + tests_failed}[/cyan]")
+        if tests_failed == 0:
+            rp("\n[bold green]🎉 All tests passed![/bold green]")
+        else:
+            if tests_failed > 1:
+                rp(f"\n[bold red]❌ {tests_failed} tests failed[/bold red]")
+            else:
+                rp(f"\n[bold red]❌ {tests_failed} test failed[/bold red]")
+        rp("="*50 + "\n")
+if __name__ == "__main__":
+    Tests.runTests()
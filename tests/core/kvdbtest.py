@@ -0,0 +1,130 @@
+"""
+Test suite for Stamp - KV Engine Module
+
+Tests WAL recovery after torn or damaged tails, and compaction
+"""
+import os
+import tempfile
+from rich import print as rp
+from rich.console import Console
+from rich.panel import Panel
+from stamp._kvdb import kvengine, _SETO
+console = Console()
+class Tests:
+    def _fill(path):
+        kv = kvengine(path, fsync="always")
+        kv.set("a", "1")
+        kv.set("b", {"n": 2})
+        kv.set("c", "3")
+        kv.delete("c")
+        kv.set("d", [4])
+        kv.close()
+        return os.path.getsize(path + ".wal")
+    def testRecovery():
+        """Test that a torn or corrupt last record is dropped and the WAL truncated before it"""
+        rp("\n[bold cyan]=== Testing WAL recovery ===[/bold cyan]\n")
+        last = len(kvengine._setrecord("d", [4]))
+        with tempfile.TemporaryDirectory() as tmp:
+            rp("[yellow]Test 1: Torn Tail[/yellow]")
+            path = os.path.join(tmp, "torn")
+            size = Tests._fill(path)
+            with open(path + ".wal", "r+b") as f:
+                f.truncate(size - 3)
+            kv = kvengine(path)
+            assert dict(kv.items()) == {"a": "1", "b": {"n": 2}}
+            kv.close()
+            assert os.path.getsize(path + ".wal") == size - last
+            rp("[green]✓ A half-written record is dropped and cut off the WAL[/green]\n")
+            rp("[yellow]Test 2: CRC Mismatch[/yellow]")
+            path = os.path.join(tmp, "crc")
+            size = Tests._fill(path)
+            with open(path + ".wal", "r+b") as f:
+                f.seek(size - 1)
+                byte = f.read(1)
+                f.seek(size - 1)
+                f.write(bytes([byte[0] ^ 0xFF]))
+            kv = kvengine(path)
+            assert dict(kv.items()) == {"a": "1", "b": {"n": 2}}
+            kv.set("e", "5")
+            kv.close()
+            kv = kvengine(path)
+            assert dict(kv.items()) == {"a": "1", "b": {"n": 2}, "e": "5"}
+            kv.close()
+            rp("[green]✓ A record failing its CRC ends the replay; later writes survive a reopen[/green]\n")
+            rp("[yellow]Test 3: Undecodable Pickle[/yellow]")
+            path = os.path.join(tmp, "pickle")
+            size = Tests._fill(path)
+            with open(path + ".wal", "ab") as f:
+                f.write(kvengine._record(_SETO, "x", b"\x80\x05\x95garbage"))
+                f.write(kvengine._setrecord("y", "after"))
+            kv = kvengine(path)
+            assert dict(kv.items()) == {"a": "1", "b": {"n": 2}, "d": [4]}
+            kv.close()
+            assert os.path.getsize(path + ".wal") == size
+            rp("[green]✓ A record that fails to unpickle is treated as the end of the log[/green]\n")
+        return True
+    def testCompaction():
+        """Test that compaction keeps the state, including ttls, across a reopen"""
+        rp("\n[bold cyan]=== Testing compaction ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "db")
+            kv = kvengine(path, fsync="always")
+            for i in range(200):
+                kv.set(f"k{i}", str(i))
+            for i in range(0, 200, 2):
+                kv.delete(f"k{i}")
+            kv.set("obj", (1, 2))
+            kv.set("short", "x", ttl=3600)
+            before = os.path.getsize(path + ".wal")
+            rp("[yellow]Test 1: Compact[/yellow]")
+            assert kv.compact()
+            assert os.path.exists(path + ".snap") and not os.path.exists(path + ".wal.old")
+            assert os.path.getsize(path + ".wal") == 0 < before
+            kv.set("k1", "changed")
+            kv.delete("k3")
+            expected = dict(kv.items())
+            kv.close()
+            rp("[green]✓ Compaction writes a snapshot and starts an empty WAL[/green]\n")
+            rp("[yellow]Test 2: Reopen[/yellow]")
+            kv = kvengine(path)
+            assert dict(kv.items()) == expected and kv.get("obj") == (1, 2)
+            assert 3500 < kv.ttl("short") <= 3600
+            kv.close()
+            rp("[green]✓ Snapshot plus WAL replay restores the state[/green]\n")
+        return True
+    def runTests():
+        """Run all tests for the KV engine"""
+        rp(Panel.fit(
+            "[bold magenta]Stamp Test Suite - KV Engine[/bold magenta]\n"
+            "[yellow]Testing recovery and compaction[/yellow]",
+            title="KV Engine Test Suite"
+        ))
+        tests_passed = 0
+        tests_failed = 0
+        try:
+            if Tests.testRecovery():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ recovery tests failed: {e!r}[/red]\n")
+        try:
+            if Tests.testCompaction():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ compaction tests failed: {e!r}[/red]\n")
+        rp("\n" + "="*50)
+        rp(f"[bold]Test Summary[/bold]")
+        rp(f"[green]Passed: {tests_passed}[/green]")
+        rp(f"[red]Failed: {tests_failed}[/red]")
+        rp(f"[cyan]Total: {tests_passed + tests_failed}[/cyan]")
+        if tests_failed == 0:
+            rp("\n[bold green]🎉 All tests passed![/bold green]")
+        else:
+            if tests_failed > 1:
+                rp(f"\n[bold red]❌ {tests_failed} tests failed[/bold red]")
+            else:
+                rp(f"\n[bold red]❌ {tests_failed} test failed[/bold red]")
+        rp("="*50 + "\n")
+if __name__ == "__main__":
+    Tests.runTests()
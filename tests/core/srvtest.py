@@ -0,0 +1,138 @@
+"""
+Test suite for Stamp - Server Module
+
+Tests static file serving (ranges, conditional requests, gzip) and the pipelined kv service
+"""
+import os
+import gzip
+import tempfile
+import threading
+import http.client
+from rich import print as rp
+from rich.console import Console
+from rich.panel import Panel
+from stamp.server import _httpserver, _server, _kvclient
+from stamp._kvdb import kvengine
+console = Console()
+class Tests:
+    def _get(port, path, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", path, headers=headers or {})
+        res = conn.getresponse()
+        body = res.read()
+        conn.close()
+        return res, body
+    def testStaticFiles():
+        """Test Range, suffix ranges, 416, If-None-Match and gzip against a live server"""
+        rp("\n[bold cyan]=== Testing _httpserver ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            content = "".join(f"row {i}\n" for i in range(2000)).encode()
+            with open(os.path.join(tmp, "data.txt"), "wb") as f:
+                f.write(content)
+            http_server = _httpserver(port=0, root=tmp, gzip=True)
+            threading.Thread(target=http_server.start, daemon=True).start()
+            port = http_server.port
+            try:
+                rp("[yellow]Test 1: Range[/yellow]")
+                res, body = Tests._get(port, "/data.txt", {"Range": "bytes=10-19"})
+                assert res.status == 206 and body == content[10:20]
+                assert res.getheader("Content-Range") == f"bytes 10-19/{len(content)}"
+                rp("[green]✓ Byte ranges return 206 with the requested slice[/green]\n")
+                rp("[yellow]Test 2: Suffix Range[/yellow]")
+                res, body = Tests._get(port, "/data.txt", {"Range": "bytes=-7"})
+                assert res.status == 206 and body == content[-7:]
+                rp("[green]✓ Suffix ranges return the file's tail[/green]\n")
+                rp("[yellow]Test 3: Unsatisfiable Range[/yellow]")
+                res, body = Tests._get(port, "/data.txt", {"Range": f"bytes={len(content)}-"})
+                assert res.status == 416 and res.getheader("Content-Range") == f"bytes */{len(content)}"
+                rp("[green]✓ Ranges past the end return 416[/green]\n")
+                rp("[yellow]Test 4: If-None-Match[/yellow]")
+                res, body = Tests._get(port, "/data.txt")
+                etag = res.getheader("ETag")
+                assert res.status == 200 and body == content
+                assert res.getheader("Vary") == "Accept-Encoding"
+                res, body = Tests._get(port, "/data.txt", {"If-None-Match": etag})
+                assert res.status == 304 and body == b""
+                rp("[green]✓ A matching ETag returns 304[/green]\n")
+                rp("[yellow]Test 5: Gzip[/yellow]")
+                res, body = Tests._get(port, "/data.txt", {"Accept-Encoding": "gzip"})
+                assert res.status == 200 and res.getheader("Content-Encoding") == "gzip"
+                assert res.getheader("Vary") == "Accept-Encoding" and res.getheader("ETag") != etag
+                assert gzip.decompress(body) == content
+                res, _ = Tests._get(port, "/data.txt", {"Accept-Encoding": "gzip", "If-None-Match": res.getheader("ETag")})
+                assert res.status == 304
+                rp("[green]✓ Gzip bodies decompress to the file and both variants carry Vary[/green]\n")
+            finally:
+                http_server.stop()
+                http_server.server.server_close()
+        return True
+    def testKVPipeline():
+        """Test a pipelined SET/GET/MGET round trip against a live kv server"""
+        rp("\n[bold cyan]=== Testing _kvclient pipelining ===[/bold cyan]\n")
+        engine = kvengine()
+        srv = _server("127.0.0.1", 0, kv=engine, verbose=False)
+        listener = srv.bind()
+        threading.Thread(target=srv.serve, args=(listener,), daemon=True).start()
+        kv = _kvclient("127.0.0.1", srv.port, batch=3)
+        try:
+            rp("[yellow]Test 1: Pipeline[/yellow]")
+            with kv.pipeline():
+                assert kv.set("a", "1") is None
+                kv.set("b", "  two words ")
+                kv.set("c", "3", ttl=60)
+                kv.get("a")
+                kv.get("missing")
+                kv.mget(["a", "b", "missing", "c"])
+                kv.delete("a", "missing")
+                kv.get("a")
+            assert kv.results == ["OK", "OK", "OK", "1", None, ["1", "  two words ", None, "3"], 1, None]
+            rp(f"Results: {kv.results}")
+            rp("[green]✓ Replies come back in order across batches[/green]\n")
+            rp("[yellow]Test 2: MSET[/yellow]")
+            assert kv.mset({"x": 1, "y": 2}) == ["OK", "OK"]
+            with kv.pipeline():
+                assert kv.mset({"z": 3}) is None
+                kv.mget(["x", "y", "z"])
+            assert kv.results == ["OK", ["1", "2", "3"]]
+            assert engine.get("b") == "  two words " and 0 < engine.ttl("c") <= 60
+            rp("[green]✓ mset joins an open pipeline and values keep their whitespace[/green]\n")
+        finally:
+            kv.close()
+            listener.close()
+        return True
+    def runTests():
+        """Run all tests for the server"""
+        rp(Panel.fit(
+            "[bold magenta]Stamp Test Suite - Server[/bold magenta]\n"
+            "[yellow]Testing static files and the kv service[/yellow]",
+            title="Server Test Suite"
+        ))
+        tests_passed = 0
+        tests_failed = 0
+        try:
+            if Tests.testStaticFiles():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ static file tests failed: {e!r}[/red]\n")
+        try:
+            if Tests.testKVPipeline():
+                tests_passed += 1
+        except Exception as e:
+            tests_failed += 1
+            rp(f"[red]✗ kv pipeline tests failed: {e!r}[/red]\n")
+        rp("\n" + "="*50)
+        rp(f"[bold]Test Summary[/bold]")
+        rp(f"[green]Passed: {tests_passed}[/green]")
+        rp(f"[red]Failed: {tests_failed}[/red]")
+        rp(f"[cyan]Total: {tests_passed + tests_failed}[/cyan]")
+        if tests_failed == 0:
+            rp("\n[bold green]🎉 All tests passed![/bold green]")
+        else:
+            if tests_failed > 1:
+                rp(f"\n[bold red]❌ {tests_failed} tests failed[/bold red]")
+            else:
+                rp(f"\n[bold red]❌ {tests_failed} test failed[/bold red]")
+        rp("="*50 + "\n")
+if __name__ == "__main__":
+    Tests.runTests()
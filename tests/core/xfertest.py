@@ -0,0 +1,114 @@
+"""
+Test suite for Stamp - Transfer Module
+
+Tests resumed .part files, checksum verification and journaled moves
+"""
+import os
+import json
+import tempfile
+from rich import print as rp
+from rich.console import Console
+from rich.panel import Panel
+from _xfer import transferjob
+console = Console()
+class Tests:
+    def _write(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    def _read(path):
+        with open(path, "rb") as f:
+            return f.read()
+    def testResume():
+        """Test that a .part file is resumed only while its stamp matches the source"""
+        rp("\n[bold cyan]=== Testing transferjob resume ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src", "big.bin")
+            dst = os.path.join(tmp, "out", "big.bin")
+            data = os.urandom(300000)
+            Tests._write(src, data)
+            st = os.stat(src)
+            rp("[yellow]Test 1: Matching Stamp[/yellow]")
+            Tests._write(dst + ".part", data[:100000])
+            with open(dst + ".part.json", "w", encoding="utf-8") as f:
+                json.dump({"src": os.path.abspath(src), "size": st.st_size, "mtime_ns": st.st_mtime_ns}, f)
+            stats = transferjob(src, os.path.dirname(dst), verify="sha256").run()
+            assert stats["done"] == 1 and stats["failed"] == 0 and stats["bytes"] == len(data)
+            assert Tests._read(dst) == data
+            assert not os.path.exists(dst + ".part") and not os.path.exists(dst + ".part.json")
+            rp("[green]✓ The copy continues from the .part file[/green]\n")
+            rp("[yellow]Test 2: Stale Stamp[/yellow]")
+            os.remove(dst)
+            Tests._write(dst + ".part", b"\0" * 100000)
+            with open(dst + ".part.json", "w", encoding="utf-8") as f:
+                json.dump({"src": os.path.abspath(src), "size": st.st_size, "mtime_ns": st.st_mtime_ns - 1}, f)
+            stats = transferjob(src, os.path.dirname(dst)).run()
+            assert stats["done"] == 1 and Tests._read(dst) == data
+            rp("[green]✓ A .part file from another version of the source is started over[/green]\n")
+        return True
+    def testChecksumMismatch():
+        """Test that a copy whose digest differs from the source's fails and leaves nothing behind"""
+        rp("\n[bold cyan]=== Testing transferjob verify ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "a.txt")
+            Tests._write(src, b"payload" * 1000)
+            out = os.path.join(tmp, "out")
+            job = transferjob(src, out, verify="sha256", move=True)
+            job._digest = lambda path: "0" * 64
+            stats = job.run()
+            assert stats["failed"] == 1 and stats["done"] == 0 and "checksum mismatch" in stats["errors"][0][1]
+            assert os.listdir(out) == [] and os.path.exists(src)
+            rp("[green]✓ Mismatched copies are removed and the source is kept[/green]\n")
+        return True
+    def testJournaledMove():
+        """Test that rerunning a finished move with its journal skips every source"""
+        rp("\n[bold cyan]=== Testing transferjob move ===[/bold cyan]\n")
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = [os.path.join(tmp, "src", f"f{i}.txt") for i in range(3)]
+            for i, src in enumerate(sources):
+                Tests._write(src, f"file {i}".encode() * 100)
+            out = os.path.join(tmp, "out")
+            journal = os.path.join(tmp, "move.journal")
+            stats = transferjob(sources, out, move=True, journal=journal).run()
+            assert stats["done"] == 3 and not any(os.path.exists(s) for s in sources)
+            rp("[yellow]Test 1: Rerun[/yellow]")
+            stats = transferjob(sources, out, move=True, journal=journal).run()
+            assert stats["skipped"] == 3 and stats["failed"] == 0 and stats["errors"] == []
+            rp("[green]✓ Moved sources count as skipped[/green]\n")
+            rp("[yellow]Test 2: Missing Destination[/yellow]")
+            os.remove(os.path.join(out, "f0.txt"))
+            stats = transferjob(sources, out, move=True, journal=journal).run()
+            assert stats["skipped"] == 2 and stats["failed"] == 1 and stats["errors"][0][0] == sources[0]
+            rp("[green]✓ A moved file that is gone from the destination still fails[/green]\n")
+        return True
+    def runTests():
+        """Run all tests for transferjob"""
+        rp(Panel.fit(
+            "[bold magenta]Stamp Test Suite - Transfer[/bold magenta]\n"
+            "[yellow]Testing transferjob[/yellow]",
+            title="Transfer Test Suite"
+        ))
+        tests_passed = 0
+        tests_failed = 0
+        for name, test in (("resume", Tests.testResume), ("verify", Tests.testChecksumMismatch), ("move", Tests.testJournaledMove)):
+            try:
+                if test():
+                    tests_passed += 1
+            except Exception as e:
+                tests_failed += 1
+                rp(f"[red]✗ {name} tests failed: {e!r}[/red]\n")
+        rp("\n" + "="*50)
+        rp(f"[bold]Test Summary[/bold]")
+        rp(f"[green]Passed: {tests_passed}[/green]")
+        rp(f"[red]Failed: {tests_failed}[/red]")
+        rp(f"[cyan]Total: {tests_passed + tests_failed}[/cyan]")
+        if tests_failed == 0:
+            rp("\n[bold green]🎉 All tests passed![/bold green]")
+        else:
+            if tests_failed > 1:
+                rp(f"\n[bold red]❌ {tests_failed} tests failed[/bold red]")
+            else:
+                rp(f"\n[bold red]❌ {tests_failed} test failed[/bold red]")
+        rp("="*50 + "\n")
+if __name__ == "__main__":
+    Tests.runTests()